@@ -0,0 +1,486 @@
+"""
+Content-addressed cache for generated TTS audio.
+
+Audio files are named after a hash of the normalized text, language and
+speed, so the same narration is only ever synthesized once. An append-only
+log next to the files records each file's size and last access time. It is
+replayed on startup and rewritten once it holds many superseded records.
+
+Least-recently-used files are evicted as soon as the size or file count
+limits are exceeded. maintain(), run periodically in the background, also
+expires files that have not been played for ``max_age`` seconds and
+removes files no index entry refers to. Files being sent to a client are
+leased and never deleted while the lease is held; they are reconsidered
+on the next pass.
+
+Several server processes may share one directory, so a lease also holds a
+shared flock on the file, and a file is only deleted after an exclusive
+lock on it succeeds. The lock goes away with the process that held it.
+Appends to the log and its rewrite hold an exclusive flock on a lock file
+next to it, and a rewrite first folds in what other processes appended.
+Without fcntl (Windows) both only hold within one process.
+"""
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import IO, Any, Dict, Iterable, Iterator, List, Optional, Set
+
+try:
+    import fcntl
+except ImportError:  # not available on Windows; leases then only hold within this process
+    fcntl = None
+
+INDEX_FILENAME = "index.jsonl"
+INDEX_LOCK_FILENAME = "index.jsonl.lock"
+# Written by earlier versions; migrated to the log on first start
+LEGACY_INDEX_FILENAME = "index.json"
+
+# Rewrite the log once it holds this many records per live entry
+LOG_COMPACT_RATIO = 4
+LOG_COMPACT_MIN_RECORDS = 256
+
+# Unindexed files younger than this may be a put() that is still finishing
+ORPHAN_MIN_AGE = 300
+# Synthesis temp files left behind by a crash
+TEMP_FILE_MAX_AGE = 3600
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_text(text: str) -> str:
+    """Normalize text so trivially different inputs share one cache entry"""
+    return _WHITESPACE.sub(" ", unicodedata.normalize("NFC", text)).strip()
+
+
+def audio_key(text: str, lang: str = "bn", slow: bool = False) -> str:
+    """Stable cache key for a (text, lang, slow) request"""
+    material = f"{normalize_text(text)}\x00{lang}\x00{int(bool(slow))}"
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()[:32]
+
+
+def is_valid_key(key: str) -> bool:
+    return len(key) == 32 and all(c in "0123456789abcdef" for c in key)
+
+
+@contextmanager
+def exclusive_file(path: str) -> Iterator[bool]:
+    """Yield False if any process holds a lease on ``path``, else True.
+
+    The lock is held until the block ends, so the file can be deleted
+    without a reader taking a lease on it in between.
+    """
+    try:
+        f = open(path, "rb")
+    except FileNotFoundError:
+        yield True
+        return
+    with f:
+        if fcntl is not None:
+            try:
+                fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                yield False
+                return
+        yield True
+
+
+class AudioCache:
+    """Stores MP3 files by key with a persistent index, LRU eviction and expiry"""
+
+    def __init__(self, directory: str, max_bytes: int = 256 * 1024 * 1024, max_files: int = 5000,
+                 max_age: Optional[float] = None):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.max_files = max_files
+        self.max_age = max_age
+        self.index_path = os.path.join(directory, INDEX_FILENAME)
+        self.index_lock_path = os.path.join(directory, INDEX_LOCK_FILENAME)
+        # key -> {"size": int, "created": float, "last_access": float}, oldest access first
+        self._entries: "OrderedDict[str, Dict[str, float]]" = OrderedDict()
+        self._total_bytes = 0
+        # Keys accessed since their last log record
+        self._touched: Set[str] = set()
+        # key -> number of responses currently sending the file
+        self._leases: Dict[str, int] = {}
+        # key -> open file holding a shared lock for the leases of this process
+        self._lease_files: Dict[str, IO[bytes]] = {}
+        self._pending: List[str] = []
+        self._log_records = 0
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0, "expired": 0, "orphans": 0}
+        self.last_maintenance: Optional[Dict[str, float]] = None
+        os.makedirs(directory, exist_ok=True)
+        self._load_index()
+
+    def path_for(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.mp3")
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the file path for a cached key and mark it recently used.
+
+        A file another process has put into the shared directory since this
+        one last read the log is adopted, so the audio is not synthesized again.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                entry = self._adopt_file(key)
+            if entry is None:
+                self.stats["misses"] += 1
+                return None
+            path = self.path_for(key)
+            if not os.path.exists(path) or key in self._leases and not self._lock_lease(key):
+                # The file was removed behind our back; forget it
+                self._forget(key)
+                self._write_pending()
+                self.stats["misses"] += 1
+                return None
+            entry["last_access"] = time.time()
+            self._entries.move_to_end(key)
+            self._touched.add(key)
+            self.stats["hits"] += 1
+            return path
+
+    def put(self, key: str, source_path: str) -> str:
+        """Move a finished audio file into the cache under ``key``"""
+        path = self.path_for(key)
+        os.replace(source_path, path)
+        size = os.path.getsize(path)
+        now = time.time()
+        with self._lock:
+            if key in self._entries:
+                self._forget(key, log=False)
+            if key in self._leases:
+                self._unlock_lease(key)
+                self._lock_lease(key)
+            self._add(key, {"size": size, "created": now, "last_access": now})
+            self._evict()
+            self._write_pending()
+        return path
+
+    def acquire(self, key: str):
+        """Keep the file for ``key`` from being deleted until release() is called.
+
+        Acquire before looking the key up, so the file cannot disappear in
+        between. Other processes sharing the directory respect the lease
+        from the time get() or put() returns the file.
+        """
+        with self._lock:
+            self._leases[key] = self._leases.get(key, 0) + 1
+
+    def release(self, key: str):
+        with self._lock:
+            count = self._leases.get(key, 0) - 1
+            if count > 0:
+                self._leases[key] = count
+            else:
+                self._leases.pop(key, None)
+                self._unlock_lease(key)
+
+    def temp_path(self, key: str) -> str:
+        """A unique path in the cache directory to synthesize into"""
+        return os.path.join(self.directory, f".{key}.{os.getpid()}.{threading.get_ident()}.tmp")
+
+    def flush(self):
+        """Persist last-access times recorded since the last write"""
+        with self._lock:
+            self._log_touched()
+            self._write_pending()
+
+    def maintain(self, protected: Iterable[str] = ()) -> Dict[str, float]:
+        """Expire, evict and remove orphaned files, then compact the log.
+
+        Blocks on file system access, so run it off the event loop.
+        ``protected`` keys, such as audio a manifest links to, never expire;
+        the size and count limits still apply to them.
+        """
+        started = time.perf_counter()
+        now = time.time()
+        protected = set(protected)
+        with self._lock:
+            # Pick up entries another process (e.g. narrations.py) has logged
+            self._adopt(self._read_log())
+
+            expired = []
+            if self.max_age:
+                cutoff = now - self.max_age
+                for key, entry in self._entries.items():
+                    if entry["last_access"] >= cutoff:
+                        break
+                    if key not in protected and key not in self._leases:
+                        expired.append(key)
+            expired = [key for key in expired if self._remove(key)]
+            self.stats["expired"] += len(expired)
+
+            evictions = self.stats["evictions"]
+            self._evict()
+            self._log_touched()
+            self._write_pending()
+            known = set(self._entries) | set(self._leases) | protected
+
+        orphans = self._remove_orphans(known, now)
+
+        with self._lock:
+            self.stats["orphans"] += orphans
+            if self._log_records > max(LOG_COMPACT_MIN_RECORDS, LOG_COMPACT_RATIO * len(self._entries)):
+                self._rewrite_log()
+            self.last_maintenance = {
+                "at": now,
+                "seconds": round(time.perf_counter() - started, 3),
+                "expired": len(expired),
+                "evicted": self.stats["evictions"] - evictions,
+                "orphans": orphans,
+            }
+            return dict(self.last_maintenance)
+
+    def usage(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "files": len(self._entries),
+                "bytes": self._total_bytes,
+                "max_files": self.max_files,
+                "max_bytes": self.max_bytes,
+                "max_age": self.max_age,
+                "leased": len(self._leases),
+                "index_records": self._log_records,
+                **self.stats,
+            }
+
+    # Everything below expects self._lock to be held
+
+    def _add(self, key: str, entry: Dict[str, float]):
+        self._entries[key] = entry
+        self._total_bytes += int(entry["size"])
+        self._touched.discard(key)
+        self._pending.append(self._record(key, entry))
+
+    def _adopt_file(self, key: str) -> Optional[Dict[str, float]]:
+        """Index a file that exists under ``key`` but is unknown to this process.
+
+        put() renames finished files into place, so any file at the path is
+        complete, and the key is a hash of the text, so it is the right audio.
+        """
+        try:
+            st = os.stat(self.path_for(key))
+        except FileNotFoundError:
+            return None
+        entry = {"size": st.st_size, "created": st.st_mtime, "last_access": time.time()}
+        self._add(key, entry)
+        self._evict()
+        self._write_pending()
+        return entry
+
+    def _forget(self, key: str, log: bool = True):
+        entry = self._entries.pop(key)
+        self._total_bytes -= int(entry["size"])
+        self._touched.discard(key)
+        if log:
+            self._pending.append(json.dumps({"k": key, "d": 1}))
+
+    def _remove(self, key: str) -> bool:
+        """Forget ``key`` and delete its file, unless another process leases it"""
+        path = self.path_for(key)
+        with exclusive_file(path) as free:
+            if not free:
+                return False
+            self._forget(key)
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+        return True
+
+    def _lock_lease(self, key: str) -> bool:
+        """Share-lock the file of a leased key; False if it no longer exists"""
+        if fcntl is None or key in self._lease_files:
+            return True
+        path = self.path_for(key)
+        try:
+            f = open(path, "rb")
+        except FileNotFoundError:
+            return False
+        # Waits only while another process is deleting the file
+        fcntl.flock(f, fcntl.LOCK_SH)
+        try:
+            locked = os.fstat(f.fileno()).st_ino == os.stat(path).st_ino
+        except FileNotFoundError:
+            locked = False
+        if not locked:
+            f.close()
+            return False
+        self._lease_files[key] = f
+        return True
+
+    def _unlock_lease(self, key: str):
+        f = self._lease_files.pop(key, None)
+        if f is not None:
+            f.close()
+
+    def _evict(self):
+        # Always keep the newest entry, even if it alone exceeds the limits.
+        # Leased files are skipped; the next put() or maintain() retries them.
+        def over_limits():
+            return self._total_bytes > self.max_bytes or len(self._entries) > self.max_files
+
+        if not over_limits():
+            return
+        for key in list(self._entries)[:-1]:
+            if not over_limits():
+                break
+            if key in self._leases:
+                continue
+            if self._remove(key):
+                self.stats["evictions"] += 1
+
+    def _remove_orphans(self, known: Set[str], now: float) -> int:
+        removed = 0
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            if name.startswith(".") and name.endswith(".tmp"):
+                max_age = TEMP_FILE_MAX_AGE
+            elif name.endswith(".mp3") and name[:-4] not in known:
+                max_age = ORPHAN_MIN_AGE
+            else:
+                continue
+            try:
+                if os.path.getmtime(path) < now - max_age:
+                    with exclusive_file(path) as free:
+                        if free:
+                            os.remove(path)
+                            removed += 1
+            except FileNotFoundError:
+                pass
+        return removed
+
+    @staticmethod
+    def _record(key: str, entry: Dict[str, float]) -> str:
+        return json.dumps({"k": key, "s": entry["size"], "c": entry["created"], "a": entry["last_access"]})
+
+    def _log_touched(self):
+        for key in self._touched:
+            self._pending.append(self._record(key, self._entries[key]))
+        self._touched.clear()
+
+    @contextmanager
+    def _index_locked(self) -> Iterator[None]:
+        """Hold the log against appends and rewrites by other processes.
+
+        The lock is on a separate file because a rewrite replaces the log.
+        Not reentrant: flock also blocks a second descriptor in this process.
+        """
+        if fcntl is None:
+            yield
+            return
+        with open(self.index_lock_path, "a") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            yield
+
+    def _write_pending(self):
+        if not self._pending:
+            return
+        try:
+            with self._index_locked(), open(self.index_path, "a", encoding="utf-8") as f:
+                f.write("\n".join(self._pending) + "\n")
+            self._log_records += len(self._pending)
+        except OSError as e:
+            print(f"Error writing audio cache index: {str(e)}")
+        self._pending = []
+
+    def _read_log(self) -> Dict[str, Dict[str, float]]:
+        """Replay the log into ``{key: entry}``"""
+        entries: Dict[str, Dict[str, float]] = {}
+        records = 0
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                        key = record["k"]
+                        if record.get("d"):
+                            entries.pop(key, None)
+                        else:
+                            entries[key] = {"size": int(record["s"]), "created": record["c"],
+                                            "last_access": record["a"]}
+                    except (ValueError, KeyError, TypeError):
+                        # A torn final line from a crash; the rest is intact
+                        continue
+                    records += 1
+        except FileNotFoundError:
+            pass
+        self._log_records = records
+        return entries
+
+    def _adopt(self, stored: Dict[str, Dict[str, float]]):
+        """Add entries with an existing file that are not indexed in memory yet"""
+        adopted = False
+        for key, entry in stored.items():
+            if key not in self._entries and is_valid_key(key) and os.path.exists(self.path_for(key)):
+                self._entries[key] = entry
+                self._total_bytes += int(entry.get("size", 0))
+                adopted = True
+        if adopted:
+            self._entries = OrderedDict(sorted(self._entries.items(), key=lambda item: item[1]["last_access"]))
+
+    def _merge_log(self):
+        """Fold in records other processes appended since this one last read the log"""
+        stored = self._read_log()
+        for key, entry in stored.items():
+            current = self._entries.get(key)
+            if current is not None and entry["last_access"] > current["last_access"]:
+                current["last_access"] = entry["last_access"]
+        self._adopt(stored)
+        # Their deletions only show as a missing file once the log is compacted
+        for key in [key for key in self._entries if not os.path.exists(self.path_for(key))]:
+            self._forget(key, log=False)
+        self._entries = OrderedDict(sorted(self._entries.items(), key=lambda item: item[1]["last_access"]))
+
+    def _rewrite_log(self):
+        tmp_path = f"{self.index_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with self._index_locked():
+            self._merge_log()
+            try:
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    for key, entry in self._entries.items():
+                        f.write(self._record(key, entry) + "\n")
+                os.replace(tmp_path, self.index_path)
+            except BaseException:
+                try:
+                    os.remove(tmp_path)
+                except FileNotFoundError:
+                    pass
+                raise
+        # The snapshot already holds every pending change and access time
+        self._log_records = len(self._entries)
+        self._pending = []
+        self._touched.clear()
+
+    def _load_index(self):
+        stored = self._read_log() if os.path.exists(self.index_path) else self._read_legacy_index()
+        with self._lock:
+            self._adopt(stored)
+            self._evict()
+            self._rewrite_log()
+        legacy_path = os.path.join(self.directory, LEGACY_INDEX_FILENAME)
+        if os.path.exists(legacy_path):
+            os.remove(legacy_path)
+
+    def _read_legacy_index(self) -> Dict[str, Dict[str, float]]:
+        try:
+            with open(os.path.join(self.directory, LEGACY_INDEX_FILENAME), "r", encoding="utf-8") as f:
+                stored = json.load(f)
+        except FileNotFoundError:
+            return {}
+        except Exception as e:
+            print(f"Error reading audio cache index: {str(e)}")
+            return {}
+        return {
+            key: {"size": int(entry.get("size", 0)), "created": entry.get("created", 0),
+                  "last_access": entry.get("last_access", 0)}
+            for key, entry in stored.items() if isinstance(entry, dict)
+        }
@@ -0,0 +1,10 @@
+"""
+Benchmark harness for the API.
+
+Run from the backend directory::
+
+    python -m benchmarks.run --scale 1 --scale 100 --save benchmarks/results/HEAD.json
+    python -m benchmarks.run --compare benchmarks/results/HEAD.json
+
+See run.py for the options.
+"""
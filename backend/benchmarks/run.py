@@ -0,0 +1,334 @@
+"""
+Run the API benchmarks and compare them with a saved baseline.
+
+For every data scale a working directory is prepared with the content files
+(reactions.json and biology.json multiplied by the scale factor) and a copy
+of the static assets. Every scenario then runs in its own process, so peak
+RSS is attributable to that scenario and no cache carries over. The app is
+driven in-process through httpx's ASGI transport, without a network, and
+TTS uses the stub backend. Start-up is measured too: the time to import the
+app, to answer its first request and until /api/ready reports it warm.
+
+Examples, from the backend directory::
+
+    python -m benchmarks.run                                  # all scenarios at 1x
+    python -m benchmarks.run --scale 1 --scale 10 --scale 100 --scenario reaction-pairs
+    python -m benchmarks.run --save benchmarks/results/before.json
+    python -m benchmarks.run --compare benchmarks/results/before.json --fail-on-regression
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List, Optional
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# A route regresses when its p95 grows by this fraction and by at least REGRESSION_MIN_MS
+REGRESSION_THRESHOLD = 0.2
+REGRESSION_MIN_MS = 1.0
+# Routes with fewer measured requests are reported but never flagged; their p95 is noise
+REGRESSION_MIN_REQUESTS = 20
+
+# Warm-up requests per scenario, as a fraction of the measured count
+WARMUP_FRACTION = 0.1
+WARMUP_MIN = 50
+
+# Longest wait for static asset sidecars generated during warm-up
+SIDECAR_TIMEOUT = 300
+# Longest wait for /api/ready after start-up
+READY_TIMEOUT = 300
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, math.ceil(fraction * len(sorted_values)) - 1))
+    return sorted_values[rank]
+
+
+def summarize(latencies: List[float], errors: int, seconds: float) -> Dict[str, Any]:
+    values = sorted(latencies)
+    return {
+        "requests": len(values),
+        "errors": errors,
+        "throughput_rps": round(len(values) / seconds, 1) if seconds > 0 else 0.0,
+        "mean_ms": round(sum(values) / len(values) * 1000, 3) if values else 0.0,
+        "p50_ms": round(percentile(values, 0.50) * 1000, 3),
+        "p95_ms": round(percentile(values, 0.95) * 1000, 3),
+        "p99_ms": round(percentile(values, 0.99) * 1000, 3),
+        "max_ms": round(values[-1] * 1000, 3) if values else 0.0,
+    }
+
+
+def prepare_workdir(scale: int, root: str) -> str:
+    """Content scaled by ``scale`` plus a private copy of the static assets"""
+    from benchmarks.synthetic import write_dataset
+
+    workdir = os.path.join(root, f"scale-{scale}")
+    write_dataset(os.path.join(BACKEND_DIR, "data", "experiments"), os.path.join(workdir, "data", "experiments"), scale)
+    # Sidecars would otherwise be generated inside the repository
+    shutil.copytree(os.path.join(BACKEND_DIR, "app"), os.path.join(workdir, "app"),
+                    ignore=shutil.ignore_patterns("*.br", "*.gz"))
+    return workdir
+
+
+# Worker side: runs inside the scenario's own process, with the workdir as cwd
+
+async def drive(app, requests, concurrency: int) -> Dict[str, Any]:
+    import httpx
+
+    etags: Dict[str, str] = {}
+    per_route: Dict[str, List[float]] = {}
+    errors: Dict[str, int] = {}
+    queue = list(reversed(requests))
+
+    async def worker(client):
+        while queue:
+            request = queue.pop()
+            headers = dict(request.headers)
+            if request.revalidate and request.url in etags:
+                headers["If-None-Match"] = etags[request.url]
+            started = time.perf_counter()
+            try:
+                response = await client.request(request.method, request.url, headers=headers, json=request.json)
+                await response.aread()
+                failed = response.status_code >= 500 or response.status_code == 404
+                if "etag" in response.headers:
+                    etags[request.url] = response.headers["etag"]
+            except Exception as e:
+                print(f"Error requesting {request.url}: {str(e)}")
+                failed = True
+            per_route.setdefault(request.route, []).append(time.perf_counter() - started)
+            if failed:
+                errors[request.route] = errors.get(request.route, 0) + 1
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://benchmark") as client:
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(client) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    routes = {route: summarize(latencies, errors.get(route, 0), elapsed) for route, latencies in per_route.items()}
+    overall = summarize([value for values in per_route.values() for value in values], sum(errors.values()), elapsed)
+    return {"seconds": round(elapsed, 3), "overall": overall, "routes": routes}
+
+
+async def measure_startup(app, request, started: float) -> Dict[str, Optional[float]]:
+    """Seconds from before the import to the first response and to readiness"""
+    import httpx
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://benchmark") as client:
+        await client.request(request.method, request.url, headers=request.headers, json=request.json)
+        first_request = time.perf_counter() - started
+
+        ready = None
+        deadline = time.monotonic() + READY_TIMEOUT
+        while time.monotonic() < deadline:
+            response = await client.get("/api/ready")
+            if response.status_code == 200:
+                ready = round(time.perf_counter() - started, 3)
+                break
+            if response.json()["warmup"]["status"] == "failed":
+                break
+            await asyncio.sleep(0.005)
+    return {"first_request_seconds": round(first_request, 3), "ready_seconds": ready}
+
+
+async def run_scenario(name: str, workdir: str, count: int, concurrency: int, seed: int) -> Dict[str, Any]:
+    from benchmarks.scenarios import build
+
+    started = time.perf_counter()
+    import main
+    import_seconds = time.perf_counter() - started
+
+    async with main.app.router.lifespan_context(main.app):
+        warmup = build(name, workdir, max(WARMUP_MIN, int(count * WARMUP_FRACTION)), seed + 1)
+        startup = await measure_startup(main.app, warmup[0], started)
+        # Warm up imports, indexes and caches the way a running server would have
+        await drive(main.app, warmup[1:], concurrency)
+        # Sidecar compression runs once per deployment; do not measure it
+        deadline = time.monotonic() + SIDECAR_TIMEOUT
+        while (main.svg_assets.compressing or main.model_assets.compressing) and time.monotonic() < deadline:
+            await asyncio.sleep(0.1)
+        result = await drive(main.app, build(name, workdir, count, seed), concurrency)
+    result["import_seconds"] = round(import_seconds, 3)
+    result.update(startup)
+    return result
+
+
+def peak_rss_mb() -> Optional[float]:
+    try:
+        import resource
+    except ImportError:  # not available on Windows
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kilobytes on Linux, bytes on macOS
+    return round(peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024, 1)
+
+
+def run_worker(args):
+    os.chdir(args.workdir)
+    result = asyncio.run(run_scenario(args.scenario[0], args.workdir, args.requests, args.concurrency, args.seed))
+    result["peak_rss_mb"] = peak_rss_mb()
+    with open(args.result_file, "w", encoding="utf-8") as f:
+        json.dump(result, f)
+
+
+# Parent side
+
+def run_in_process(scenario: str, workdir: str, args) -> Dict[str, Any]:
+    result_file = os.path.join(workdir, f"{scenario}.result.json")
+    env = {
+        **os.environ,
+        "PYTHONPATH": os.pathsep.join(filter(None, [BACKEND_DIR, os.environ.get("PYTHONPATH")])),
+        "TTS_BACKEND": "stub",
+        "TTS_STUB_DELAY": str(args.tts_delay),
+    }
+    command = [
+        sys.executable, "-m", "benchmarks.run", "--worker",
+        "--workdir", workdir, "--scenario", scenario, "--result-file", result_file,
+        "--requests", str(args.requests), "--concurrency", str(args.concurrency), "--seed", str(args.seed),
+    ]
+    completed = subprocess.run(command, cwd=workdir, env=env, stdout=subprocess.DEVNULL if not args.verbose else None)
+    if completed.returncode != 0 or not os.path.exists(result_file):
+        raise RuntimeError(f"Scenario {scenario} failed with exit code {completed.returncode}")
+    with open(result_file, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_report(report: Dict[str, Any]):
+    header = f"{'scale':>6} {'scenario':<16} {'route':<42} {'reqs':>6} {'err':>4} {'rps':>8} " \
+             f"{'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'rss MB':>7}"
+    print(header)
+    print("-" * len(header))
+    for run in report["runs"]:
+        for route, stats in sorted(run["routes"].items()):
+            print(f"{run['scale']:>6} {run['scenario']:<16} {route:<42} {stats['requests']:>6} {stats['errors']:>4} "
+                  f"{stats['throughput_rps']:>8} {stats['p50_ms']:>8} {stats['p95_ms']:>8} {stats['p99_ms']:>8} "
+                  f"{run['peak_rss_mb'] or '':>7}")
+
+    header = f"{'scale':>6} {'scenario':<16} {'import ms':>10} {'first request ms':>17} {'ready ms':>9}"
+    print(f"\n{header}")
+    print("-" * len(header))
+    for run in report["runs"]:
+        # ready_seconds is None if the app never became ready
+        ready = run["ready_seconds"]
+        print(f"{run['scale']:>6} {run['scenario']:<16} {round(run['import_seconds'] * 1000):>10} "
+              f"{round(run['first_request_seconds'] * 1000):>17} {round(ready * 1000) if ready is not None else '-':>9}")
+
+
+def compare(report: Dict[str, Any], baseline: Dict[str, Any]) -> List[str]:
+    """Print p50/p95 changes against a baseline and return the regressed routes"""
+    previous = {
+        (run["scale"], run["scenario"], route): stats
+        for run in baseline["runs"] for route, stats in run["routes"].items()
+    }
+    regressions = []
+    print(f"\nCompared with {baseline['meta'].get('commit') or 'baseline'}:")
+    for run in report["runs"]:
+        for route, stats in sorted(run["routes"].items()):
+            old = previous.get((run["scale"], run["scenario"], route))
+            if old is None:
+                continue
+            p95_change = (stats["p95_ms"] - old["p95_ms"]) / old["p95_ms"] if old["p95_ms"] else 0.0
+            regressed = (p95_change > REGRESSION_THRESHOLD
+                         and stats["p95_ms"] - old["p95_ms"] >= REGRESSION_MIN_MS
+                         and min(stats["requests"], old["requests"]) >= REGRESSION_MIN_REQUESTS)
+            marker = "  REGRESSION" if regressed else ""
+            print(f"{run['scale']:>6} {run['scenario']:<16} {route:<42} "
+                  f"p50 {old['p50_ms']:>8} -> {stats['p50_ms']:<8} p95 {old['p95_ms']:>8} -> {stats['p95_ms']:<8}"
+                  f" ({p95_change:+.0%}){marker}")
+            if regressed:
+                regressions.append(f"{run['scale']}x {run['scenario']} {route}")
+    return regressions
+
+
+def main():
+    from benchmarks.scenarios import SCENARIOS
+
+    parser = argparse.ArgumentParser(description="Benchmark the API in-process")
+    parser.add_argument("--scenario", action="append", choices=sorted(SCENARIOS),
+                        help="Scenario to run; repeat for several (default: all)")
+    parser.add_argument("--scale", action="append", type=int,
+                        help="Multiply reactions.json and biology.json by this factor; repeat for several (default: 1)")
+    parser.add_argument("--requests", type=int, default=500, help="Measured requests per scenario (default: 500)")
+    parser.add_argument("--concurrency", type=int, default=16, help="Requests in flight (default: 16)")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for the request mixes")
+    parser.add_argument("--tts-delay", type=float, default=0.02, help="Seconds the stub TTS backend takes per call")
+    parser.add_argument("--save", help="Write the results as JSON to this path")
+    parser.add_argument("--compare", help="Compare with results saved earlier with --save")
+    parser.add_argument("--fail-on-regression", action="store_true", help="Exit with status 1 if a route regressed")
+    parser.add_argument("--verbose", action="store_true", help="Show the server's output")
+    # Internal: run one scenario in this process
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--workdir", help=argparse.SUPPRESS)
+    parser.add_argument("--result-file", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        run_worker(args)
+        return
+
+    scenarios = args.scenario or sorted(SCENARIOS)
+    scales = args.scale or [1]
+    report = {
+        "meta": {
+            "commit": git_commit(),
+            "created_at": time.time(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "seed": args.seed,
+            "tts_delay": args.tts_delay,
+        },
+        "runs": [],
+    }
+
+    root = tempfile.mkdtemp(prefix="bigganbondhu-bench-")
+    try:
+        for scale in scales:
+            workdir = prepare_workdir(scale, root)
+            for scenario in scenarios:
+                print(f"Running {scenario} at {scale}x...", file=sys.stderr)
+                result = run_in_process(scenario, workdir, args)
+                report["runs"].append({"scale": scale, "scenario": scenario, **result})
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+    print_report(report)
+    if args.save:
+        os.makedirs(os.path.dirname(os.path.abspath(args.save)), exist_ok=True)
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nSaved results to {args.save}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            regressions = compare(report, json.load(f))
+        if regressions and args.fail_on_regression:
+            print(f"\n{len(regressions)} route(s) regressed", file=sys.stderr)
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,234 @@
+"""
+Request mixes for the benchmark.
+
+Each scenario turns the content of the benchmark's working directory into
+a deterministic list of requests modelled on how the frontend uses a group
+of endpoints. Requests are labelled with the route they exercise, so the
+report can break latency down per route.
+"""
+import json
+import os
+import random
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+from urllib.parse import urlencode
+
+
+@dataclass
+class BenchRequest:
+    route: str
+    method: str
+    url: str
+    headers: Dict[str, str] = field(default_factory=dict)
+    json: Any = None
+    # Send If-None-Match with the ETag last seen for this URL
+    revalidate: bool = False
+
+
+class Content:
+    """The content files and assets the scenarios draw requests from"""
+
+    def __init__(self, workdir: str):
+        self.workdir = workdir
+        self._cache: Dict[str, Any] = {}
+
+    def load(self, name: str) -> Dict[str, Any]:
+        if name not in self._cache:
+            with open(os.path.join(self.workdir, "data", "experiments", f"{name}.json"), encoding="utf-8") as f:
+                self._cache[name] = json.load(f)
+        return self._cache[name]
+
+    def models(self) -> List[str]:
+        directory = os.path.join(self.workdir, "app", "webmodel")
+        return sorted(name for name in os.listdir(directory) if name.endswith((".glb", ".gltf")))
+
+
+ACCEPT_COMPRESSED = {"Accept-Encoding": "br, gzip"}
+
+
+def biology_listing(rng: random.Random, content: Content, count: int) -> List[BenchRequest]:
+    """Students opening the biology section: listings, pages and detail views"""
+    ids = [e["id"] for e in content.load("biology")["experiments"] if "id" in e]
+    total = len(content.load("biology")["experiments"])
+    requests = []
+    for _ in range(count):
+        roll = rng.random()
+        if roll < 0.55:
+            request = BenchRequest("/api/experiments/biology", "GET", "/api/experiments/biology",
+                                   dict(ACCEPT_COMPRESSED), revalidate=rng.random() < 0.3)
+        elif roll < 0.7:
+            request = BenchRequest("/api/experiments/biology", "GET", "/api/experiments/biology?view=summary",
+                                   dict(ACCEPT_COMPRESSED))
+        elif roll < 0.85:
+            query = urlencode({"limit": 20, "offset": rng.randrange(0, max(1, total), 20)})
+            request = BenchRequest("/api/experiments/biology", "GET", f"/api/experiments/biology?{query}",
+                                   dict(ACCEPT_COMPRESSED))
+        else:
+            request = BenchRequest("/api/experiments/biology/{experiment_id}", "GET",
+                                   f"/api/experiments/biology/{rng.choice(ids)}", dict(ACCEPT_COMPRESSED))
+        requests.append(request)
+    return requests
+
+
+def reaction_pairs(rng: random.Random, content: Content, count: int) -> List[BenchRequest]:
+    """The chemistry simulator probing pairs under changing conditions"""
+    reactions = content.load("reactions")["reactions"]
+    chemicals = [c["id"] for c in content.load("chemicals")["chemicals"]]
+    pairs = [(r["reactant1"], r["reactant2"]) for r in reactions]
+
+    def pair():
+        if rng.random() < 0.7:
+            return rng.choice(pairs)
+        return rng.choice(chemicals), rng.choice(chemicals)
+
+    def conditions():
+        return {"temperature": rng.choice([5, 25, 25, 60]), "mixing_speed": rng.choice([50, 50, 90])}
+
+    requests = []
+    for _ in range(count):
+        roll = rng.random()
+        if roll < 0.8:
+            chem1, chem2 = pair()
+            query = urlencode({"chem1": chem1, "chem2": chem2, **conditions()})
+            requests.append(BenchRequest("/api/chemistry/react", "GET", f"/api/chemistry/react?{query}"))
+        elif roll < 0.9:
+            chem1, chem2 = pair()
+            query = urlencode({"chem1": chem1, "chem2": chem2})
+            requests.append(BenchRequest("/api/reactions", "GET", f"/api/reactions?{query}"))
+        else:
+            batch = [{"chem1": c1, "chem2": c2, **conditions()} for c1, c2 in (pair() for _ in range(50))]
+            requests.append(BenchRequest("/api/chemistry/react/batch", "POST", "/api/chemistry/react/batch",
+                                         json={"reactions": batch}))
+    return requests
+
+
+def tts(rng: random.Random, content: Content, count: int) -> List[BenchRequest]:
+    """Narration playback: mostly repeated texts, some new ones, some streamed"""
+    texts = []
+    for name in ("physics", "biology", "chemistry"):
+        for experiment in content.load(name).get("experiments", []):
+            for key in ("narration", "description"):
+                if isinstance(experiment.get(key), str) and experiment[key].strip():
+                    texts.append(experiment[key])
+    texts = texts[:40] or ["পরীক্ষা"]
+    long_texts = sorted(texts, key=len)[-5:]
+
+    requests = []
+    for i in range(count):
+        roll = rng.random()
+        if roll < 0.6:
+            text = rng.choice(texts)
+            requests.append(BenchRequest("/api/audio", "GET", "/api/audio?" + urlencode({"text": text})))
+        elif roll < 0.8:
+            text = f"{rng.choice(texts)} {i}"
+            requests.append(BenchRequest("/api/audio", "GET", "/api/audio?" + urlencode({"text": text})))
+        else:
+            text = rng.choice(long_texts)
+            requests.append(BenchRequest("/api/audio/stream", "GET", "/api/audio/stream?" + urlencode({"text": text})))
+    return requests
+
+
+def model_ranges(rng: random.Random, content: Content, count: int) -> List[BenchRequest]:
+    """3D viewers fetching GLB files in resumable chunks"""
+    models = content.models()
+    sizes = {name: os.path.getsize(os.path.join(content.workdir, "app", "webmodel", name)) for name in models}
+    chunk = 256 * 1024
+    requests = []
+    for _ in range(count):
+        name = rng.choice(models)
+        if rng.random() < 0.1:
+            requests.append(BenchRequest("/api/models/{filename}", "GET", f"/api/models/{name}", dict(ACCEPT_COMPRESSED)))
+            continue
+        start = rng.randrange(0, max(1, sizes[name]), chunk)
+        headers = {"Range": f"bytes={start}-{start + chunk - 1}"}
+        requests.append(BenchRequest("/api/models/{filename}", "GET", f"/api/models/{name}", headers))
+    return requests
+
+
+def physics(rng: random.Random, content: Content, count: int) -> List[BenchRequest]:
+    """Slider moves on the physics simulations and circuit builder"""
+    params = {e.get("type"): e.get("params", {}) for e in content.load("physics")["experiments"]}
+
+    def value(bounds):
+        steps = int(round((bounds["max"] - bounds["min"]) / bounds["step"]))
+        return round(bounds["min"] + rng.randint(0, steps) * bounds["step"], 6)
+
+    requests = []
+    for _ in range(count):
+        roll = rng.random()
+        if roll < 0.5:
+            sim_type = rng.choice([t for t in ("projectile", "pendulum", "newton") if t in params])
+            query = {name: value(bounds) for name, bounds in params[sim_type].items()}
+            requests.append(BenchRequest("/api/physics/simulate/{sim_type}", "GET",
+                                         f"/api/physics/simulate/{sim_type}?{urlencode(query)}"))
+        elif roll < 0.7:
+            query = {"vary": "angle", "velocity": value(params["projectile"]["velocity"])}
+            requests.append(BenchRequest("/api/physics/sweep/{sim_type}", "GET",
+                                         f"/api/physics/sweep/projectile?{urlencode(query)}"))
+        else:
+            voltage = rng.randint(1, 24)
+            components = [{"id": "B", "type": "battery", "nodes": ["p", "gnd"], "voltage": voltage}]
+            for i in range(20):
+                components.append({"type": "resistor", "nodes": [f"n{i}" if i else "p", f"n{i + 1}"], "resistance": 100})
+                components.append({"type": "bulb", "nodes": [f"n{i + 1}", "gnd"]})
+            requests.append(BenchRequest("/api/physics/circuit/solve", "POST", "/api/physics/circuit/solve",
+                                         json={"components": components}))
+    return requests
+
+
+def routes(rng: random.Random, content: Content, count: int) -> List[BenchRequest]:
+    """Every remaining GET route, so none of them goes unmeasured"""
+    svgs = sorted(os.listdir(os.path.join(content.workdir, "app", "svg")))
+    svgs = [name for name in svgs if name.endswith(".svg")]
+    chemistry = content.load("chemistry")
+    physics_ids = [e["id"] for e in content.load("physics")["experiments"] if "id" in e]
+    reaction_types = sorted({r.get("reactionType") for r in content.load("reactions")["reactions"]})
+    chemistry_ids = [c["id"] for c in chemistry.get("chemicals", []) if "id" in c]
+    # Search for words from chemical names and biology titles, sometimes only their start
+    terms = [c["name"] for c in content.load("chemicals")["chemicals"] if c.get("name")]
+    terms += [e["title"] for e in content.load("biology")["experiments"] if e.get("title")]
+    terms = sorted({word for term in terms for word in term.split()})
+
+    def search():
+        word = rng.choice(terms)
+        if len(word) > 4 and rng.random() < 0.3:
+            word = word[:rng.randint(3, len(word) - 1)]
+        return "/api/search?" + urlencode({"q": word})
+
+    pool = [
+        ("/api/health", "/api/health"),
+        ("/api/metrics", "/api/metrics"),
+        ("/api/chemistry/chemicals", "/api/chemistry/chemicals"),
+        ("/api/chemistry/reactions", "/api/chemistry/reactions"),
+        ("/api/chemistry/reactions/matrix", "/api/chemistry/reactions/matrix"),
+        ("/api/chemistry/reactions-by-type", lambda: "/api/chemistry/reactions-by-type?type=" + rng.choice(reaction_types)),
+        ("/api/experiments/physics", "/api/experiments/physics"),
+        ("/api/experiments/physics/{experiment_id}", lambda: "/api/experiments/physics/" + rng.choice(physics_ids)),
+        ("/api/experiments/chemistry", "/api/experiments/chemistry"),
+        ("/api/narrations", "/api/narrations"),
+        ("/api/search", search),
+    ]
+    if chemistry_ids:
+        pool.append(("/api/experiments/chemistry/{item_id}", lambda: "/api/experiments/chemistry/" + rng.choice(chemistry_ids)))
+    if svgs:
+        pool.append(("/api/svg/{filename}", lambda: "/api/svg/" + rng.choice(svgs)))
+
+    requests = []
+    for i in range(count):
+        route, url = pool[i % len(pool)]
+        requests.append(BenchRequest(route, "GET", url() if callable(url) else url, dict(ACCEPT_COMPRESSED)))
+    return requests
+
+
+SCENARIOS: Dict[str, Callable[[random.Random, Content, int], List[BenchRequest]]] = {
+    "biology-listing": biology_listing,
+    "reaction-pairs": reaction_pairs,
+    "tts": tts,
+    "model-ranges": model_ranges,
+    "physics": physics,
+    "routes": routes,
+}
+
+
+def build(name: str, workdir: str, count: int, seed: Optional[int] = 0) -> List[BenchRequest]:
+    return SCENARIOS[name](random.Random(seed), Content(workdir), count)
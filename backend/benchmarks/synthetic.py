@@ -0,0 +1,66 @@
+"""
+Synthetic content for measuring how endpoints scale with data size.
+
+The real reactions.json and biology.json are multiplied by cloning their
+items under new, unique ids and reactant names, so every clone is a
+distinct entry for the indexes while the shape of the data stays real.
+"""
+import json
+import os
+import shutil
+from typing import Any, Dict
+
+
+def scale_reactions(data: Dict[str, Any], factor: int) -> Dict[str, Any]:
+    """``factor`` copies of every reaction, each between its own pair of reactants"""
+    reactions = []
+    for copy in range(factor):
+        for reaction in data.get("reactions", []):
+            if copy == 0:
+                reactions.append(reaction)
+                continue
+            clone = dict(reaction)
+            clone["reactant1"] = f"{reaction['reactant1']}~{copy}"
+            clone["reactant2"] = f"{reaction['reactant2']}~{copy}"
+            clone["id"] = f"{clone['reactant1']}-{clone['reactant2']}"
+            reactions.append(clone)
+    return {**data, "reactions": reactions}
+
+
+def scale_biology(data: Dict[str, Any], factor: int) -> Dict[str, Any]:
+    """``factor`` copies of every experiment, keeping their categories"""
+    experiments = []
+    for copy in range(factor):
+        for experiment in data.get("experiments", []):
+            if copy == 0:
+                experiments.append(experiment)
+                continue
+            clone = dict(experiment)
+            if "id" in clone:
+                clone["id"] = f"{experiment['id']}-{copy}"
+            experiments.append(clone)
+    return {**data, "experiments": experiments}
+
+
+SCALERS = {
+    "reactions": scale_reactions,
+    "biology": scale_biology,
+}
+
+
+def write_dataset(source_dir: str, target_dir: str, factor: int):
+    """Copy the content files from ``source_dir``, scaling the ones in SCALERS"""
+    os.makedirs(target_dir, exist_ok=True)
+    for filename in os.listdir(source_dir):
+        name, ext = os.path.splitext(filename)
+        if ext != ".json":
+            continue
+        source = os.path.join(source_dir, filename)
+        target = os.path.join(target_dir, filename)
+        if name in SCALERS and factor > 1:
+            with open(source, encoding="utf-8") as f:
+                data = json.load(f)
+            with open(target, "w", encoding="utf-8") as f:
+                json.dump(SCALERS[name](data, factor), f, ensure_ascii=False)
+        else:
+            shutil.copyfile(source, target)
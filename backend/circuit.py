@@ -0,0 +1,313 @@
+"""
+DC circuit solver for the circuit simulator, based on modified nodal analysis.
+
+A netlist of batteries, resistors, bulbs, LEDs, switches, ammeters,
+voltmeters and wires is turned into the MNA system ``A x = z``: one row per
+node voltage plus one per ideal voltage source (ideal batteries, ammeters
+and switches). Wires simply merge their two nodes.
+
+Component values that only act as sources (battery voltages, LED forward
+voltages) appear in ``z`` alone. The factorized ``A`` is cached, so moving a
+voltage slider re-solves with the existing factorization, which takes only
+a forward/back substitution. The matrix is sparse and factorized with
+SciPy's SuperLU when SciPy is installed, and densely with NumPy otherwise.
+
+LEDs are modelled as ideal diodes with a forward voltage and a series
+resistance; their on/off states are found by re-solving until they agree
+with the computed voltages.
+"""
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, Hashable, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+
+try:
+    from scipy.sparse import csc_matrix
+    from scipy.sparse.linalg import splu
+except ImportError:  # scipy is optional; circuits are small enough for dense solves
+    csc_matrix = splu = None
+
+# Tiny conductance from every node to ground so floating parts stay solvable
+GMIN = 1e-12
+
+DEFAULTS = {
+    "battery": {"voltage": 9.0, "internalResistance": 0.0},
+    "resistor": {"resistance": 100.0},
+    "bulb": {"resistance": 10.0},
+    "led": {"forwardVoltage": 2.0, "resistance": 10.0},
+    "switch": {"closed": True},
+}
+
+COMPONENT_TYPES = ("battery", "resistor", "bulb", "led", "switch", "ammeter", "voltmeter", "wire")
+
+MAX_COMPONENTS = 2000
+
+
+class CircuitError(ValueError):
+    """Raised for netlists that are malformed or cannot be solved"""
+
+
+@dataclass
+class Element:
+    id: str
+    type: str
+    nodes: Tuple[int, int]
+    values: Dict[str, Any]
+
+
+class _Nodes:
+    """Union-find over node names, so wires merge the nodes they connect"""
+
+    def __init__(self):
+        self.parent: Dict[str, str] = {}
+
+    def find(self, name: str) -> str:
+        self.parent.setdefault(name, name)
+        while self.parent[name] != name:
+            self.parent[name] = self.parent[self.parent[name]]
+            name = self.parent[name]
+        return name
+
+    def union(self, a: str, b: str):
+        self.parent[self.find(a)] = self.find(b)
+
+
+def parse_netlist(components: Sequence[Mapping[str, Any]], ground: Optional[str] = None):
+    """Check a netlist and number its nodes.
+
+    Returns ``(elements, node_names, ground_name)``. ``node_names[i]`` lists
+    the names merged into node ``i``; node 0 is ground.
+    """
+    if not components:
+        raise CircuitError("The circuit has no components")
+    if len(components) > MAX_COMPONENTS:
+        raise CircuitError(f"Circuits are limited to {MAX_COMPONENTS} components")
+
+    nodes = _Nodes()
+    seen_ids = set()
+    checked = []
+    for position, component in enumerate(components):
+        kind = component.get("type")
+        if kind not in COMPONENT_TYPES:
+            raise CircuitError(f"Unknown component type: {kind}")
+        terminals = component.get("nodes") or ()
+        if len(terminals) != 2 or not all(isinstance(name, str) and name for name in terminals):
+            raise CircuitError(f"Component {position} needs exactly two node names")
+        component_id = component.get("id") or f"{kind}{position + 1}"
+        if component_id in seen_ids:
+            raise CircuitError(f"Duplicate component id: {component_id}")
+        seen_ids.add(component_id)
+
+        values = dict(DEFAULTS.get(kind, {}))
+        values.update({key: value for key, value in component.items() if key in values and value is not None})
+        for key in ("resistance", "forwardVoltage", "internalResistance"):
+            if key in values and (values[key] < 0 or key == "resistance" and values[key] == 0):
+                raise CircuitError(f"{component_id}: {key} must be positive")
+
+        for name in terminals:
+            nodes.find(name)
+        if kind == "wire":
+            nodes.union(*terminals)
+        checked.append((component_id, kind, terminals, values))
+
+    if ground is None:
+        batteries = [terminals for _, kind, terminals, _ in checked if kind == "battery"]
+        ground = batteries[0][1] if batteries else checked[0][2][1]
+    elif ground not in nodes.parent:
+        raise CircuitError(f"Unknown ground node: {ground}")
+
+    index = {nodes.find(ground): 0}
+    for name in nodes.parent:
+        index.setdefault(nodes.find(name), len(index))
+    node_names: List[List[str]] = [[] for _ in index]
+    for name in nodes.parent:
+        node_names[index[nodes.find(name)]].append(name)
+
+    elements = [
+        Element(component_id, kind, (index[nodes.find(terminals[0])], index[nodes.find(terminals[1])]), values)
+        for component_id, kind, terminals, values in checked
+    ]
+    return elements, node_names, ground
+
+
+class _Factorization:
+    """Solves ``A x = z`` for many right-hand sides"""
+
+    def __init__(self, size: int, rows: List[int], cols: List[int], vals: List[float]):
+        if splu is not None:
+            try:
+                self._lu = splu(csc_matrix((vals, (rows, cols)), shape=(size, size)))
+            except RuntimeError:
+                raise CircuitError("The circuit contains a short circuit or a loop of voltage sources")
+            self._inverse = None
+        else:
+            matrix = np.zeros((size, size))
+            np.add.at(matrix, (rows, cols), vals)
+            try:
+                self._inverse = np.linalg.inv(matrix)
+            except np.linalg.LinAlgError:
+                raise CircuitError("The circuit contains a short circuit or a loop of voltage sources")
+            if not np.isfinite(self._inverse).all() or np.linalg.cond(matrix) > 1e15:
+                raise CircuitError("The circuit contains a short circuit or a loop of voltage sources")
+
+    def solve(self, z: np.ndarray) -> np.ndarray:
+        x = self._lu.solve(z) if self._inverse is None else self._inverse @ z
+        if not np.isfinite(x).all():
+            raise CircuitError("The circuit contains a short circuit or a loop of voltage sources")
+        return x
+
+
+class CircuitSolver:
+    """Solves netlists, caching factorizations by matrix contents"""
+
+    def __init__(self, max_factorizations: int = 64):
+        self.max_factorizations = max_factorizations
+        self._factorizations: "OrderedDict[Hashable, _Factorization]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"solves": 0, "factorizations": 0, "reused": 0}
+
+    def solve(self, components: Sequence[Mapping[str, Any]], ground: Optional[str] = None) -> Dict[str, Any]:
+        elements, node_names, ground = parse_netlist(components, ground)
+        leds = [element for element in elements if element.type == "led"]
+        led_on = {element.id: False for element in leds}
+
+        # Re-solve until every LED's state agrees with the voltage across it
+        reused = True
+        for _ in range(2 * len(leds) + 1):
+            x, sources, was_reused = self._solve_once(elements, len(node_names), led_on)
+            reused = reused and was_reused
+            changed = False
+            for element in leds:
+                anode, cathode = element.nodes
+                drop = _voltage(x, anode) - _voltage(x, cathode)
+                threshold = element.values["forwardVoltage"]
+                lit = drop > threshold - 1e-9 if led_on[element.id] else drop > threshold + 1e-9
+                if lit != led_on[element.id]:
+                    led_on[element.id] = lit
+                    changed = True
+            if not changed:
+                break
+
+        self.stats["solves"] += 1
+        return _report(elements, node_names, ground, x, sources, led_on, reused)
+
+    def _solve_once(self, elements: List[Element], node_count: int, led_on: Dict[str, bool]):
+        size = node_count - 1
+        stamps: List[Tuple[int, int, float]] = [(i, i, GMIN) for i in range(size)]
+        z_terms: List[Tuple[int, float]] = []
+        # element id -> row of its current in x
+        sources: Dict[str, int] = {}
+
+        def conductance(a: int, b: int, g: float):
+            for p, q, value in ((a, a, g), (b, b, g), (a, b, -g), (b, a, -g)):
+                if p and q:
+                    stamps.append((p - 1, q - 1, value))
+
+        def inject(a: int, b: int, current: float):
+            # ``current`` leaves node a through the element and enters node b
+            if a:
+                z_terms.append((a - 1, -current))
+            if b:
+                z_terms.append((b - 1, current))
+
+        def voltage_source(element: Element, value: Optional[float]):
+            # Current variable flows from nodes[0] through the element to nodes[1]
+            row = size + len(sources)
+            sources[element.id] = row
+            plus, minus = element.nodes
+            if value is None:
+                # Open: force the current to zero
+                stamps.append((row, row, 1.0))
+            for node, sign in ((plus, 1.0), (minus, -1.0)):
+                if node:
+                    stamps.append((node - 1, row, sign))
+                    if value is not None:
+                        stamps.append((row, node - 1, sign))
+            z_terms.append((row, value or 0.0))
+
+        for element in elements:
+            a, b = element.nodes
+            values = element.values
+            if element.type == "battery":
+                if values["internalResistance"] > 0:
+                    g = 1.0 / values["internalResistance"]
+                    conductance(a, b, g)
+                    inject(a, b, -values["voltage"] * g)
+                else:
+                    voltage_source(element, values["voltage"])
+            elif element.type in ("resistor", "bulb"):
+                conductance(a, b, 1.0 / values["resistance"])
+            elif element.type == "led":
+                if led_on[element.id]:
+                    g = 1.0 / values["resistance"]
+                    conductance(a, b, g)
+                    inject(a, b, -values["forwardVoltage"] * g)
+            elif element.type == "switch":
+                voltage_source(element, 0.0 if values["closed"] else None)
+            elif element.type == "ammeter":
+                voltage_source(element, 0.0)
+
+        total = size + len(sources)
+        if total == 0:
+            return np.zeros(0), sources, True
+
+        rows, cols, vals = zip(*stamps) if stamps else ((), (), ())
+        key = (total, rows, cols, vals)
+        with self._lock:
+            factorization = self._factorizations.get(key)
+            if factorization is not None:
+                self._factorizations.move_to_end(key)
+                self.stats["reused"] += 1
+        was_reused = factorization is not None
+        if factorization is None:
+            factorization = _Factorization(total, list(rows), list(cols), list(vals))
+            with self._lock:
+                self.stats["factorizations"] += 1
+                self._factorizations[key] = factorization
+                while len(self._factorizations) > self.max_factorizations:
+                    self._factorizations.popitem(last=False)
+
+        z = np.zeros(total)
+        for row, value in z_terms:
+            z[row] += value
+        return factorization.solve(z), sources, was_reused
+
+
+def _voltage(x: np.ndarray, node: int) -> float:
+    return float(x[node - 1]) if node else 0.0
+
+
+def _report(elements, node_names, ground, x, sources, led_on, reused) -> Dict[str, Any]:
+    voltages = {name: _voltage(x, index) for index, names in enumerate(node_names) for name in names}
+    results = {}
+    for element in elements:
+        a, b = element.nodes
+        drop = _voltage(x, a) - _voltage(x, b)
+        values = element.values
+        if element.id in sources:
+            current = float(x[sources[element.id]])
+        elif element.type == "battery":
+            current = (drop - values["voltage"]) / values["internalResistance"]
+        elif element.type in ("resistor", "bulb"):
+            current = drop / values["resistance"]
+        elif element.type == "led":
+            current = (drop - values["forwardVoltage"]) / values["resistance"] if led_on[element.id] else 0.0
+        else:
+            # Wires carry an unknown share of the current; voltmeters none
+            current = None
+
+        result: Dict[str, Any] = {"type": element.type, "voltage": drop}
+        if element.type == "battery":
+            # Reported as the current the battery delivers from its + terminal
+            result["current"] = -current
+            result["power"] = -current * drop
+        elif current is not None:
+            result["current"] = current
+            result["power"] = drop * current
+        if element.type == "led":
+            result["lit"] = led_on[element.id]
+        results[element.id] = result
+
+    return {"ground": ground, "nodes": voltages, "components": results, "factorizationReused": reused}
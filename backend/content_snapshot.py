@@ -0,0 +1,256 @@
+"""
+Compiled content snapshot shared by all server processes.
+
+The prebuilt response bodies for the content endpoints (whole listings,
+category listings, single items and the reaction matrix), with their gzip
+and brotli variants, are written into one binary file. Every worker maps
+that file read-only and serves slices of it without copying, so the bodies
+live once in the page cache rather than once per process.
+
+Layout: an 8 byte magic, then the offset and length of a JSON table of
+contents (little-endian uint64 each), the body blobs, and the table of
+contents itself. The table maps each key, usually the request path, to the
+ETag and the ``(offset, length)`` of each variant, and records the state of
+the source files the snapshot was built from.
+
+A new snapshot is written next to the old one and renamed over it, so a
+reader sees either the old or the new file, never a partial one. Processes
+that still map the old file keep using it until they notice the change.
+
+The server compiles the snapshot itself when it is missing or stale. To
+compile it ahead of time, e.g. after deploying new content, run from the
+backend directory::
+
+    python content_snapshot.py [--force]
+"""
+import argparse
+import json
+import mmap
+import os
+import struct
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, Iterator, Optional, Tuple
+
+from http_cache import PrecompressedBody
+
+try:
+    import fcntl
+except ImportError:  # not available on Windows; concurrent builds then just race
+    fcntl = None
+
+MAGIC = b"BBSNAP01"
+_HEADER = struct.Struct("<8sQQ")
+
+# (mtime, size) of a source file, or None if it did not exist
+SourceState = Optional[Tuple[float, int]]
+
+
+def file_state(path: str) -> SourceState:
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return st.st_mtime, st.st_size
+
+
+def write_snapshot(path: str, sources: Dict[str, SourceState],
+                   bodies: Iterable[Tuple[str, PrecompressedBody]]) -> Dict[str, Any]:
+    """Write ``bodies`` to a new snapshot file and rename it into place.
+
+    ``sources`` maps each source file path to the state the bodies were
+    built from; the snapshot counts as stale once any of them changes.
+    """
+    started = time.perf_counter()
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    toc: Dict[str, Any] = {"created": time.time(), "sources": sources, "bodies": {}}
+    try:
+        with open(tmp_path, "wb") as f:
+            f.write(_HEADER.pack(MAGIC, 0, 0))
+            for key, body in bodies:
+                variants = []
+                for data in (body.identity, body.gzip, body.br):
+                    if data is None:
+                        variants.append(None)
+                    else:
+                        variants.append((f.tell(), len(data)))
+                        f.write(data)
+                toc["bodies"][key] = [body.etag, body.media_type, *variants]
+
+            toc_bytes = json.dumps(toc, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+            toc_offset = f.tell()
+            f.write(toc_bytes)
+            size = f.tell()
+            f.seek(0)
+            f.write(_HEADER.pack(MAGIC, toc_offset, len(toc_bytes)))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except FileNotFoundError:
+            pass
+        raise
+    return {"bodies": len(toc["bodies"]), "bytes": size, "seconds": round(time.perf_counter() - started, 3)}
+
+
+class ContentSnapshot:
+    """One mapped snapshot file"""
+
+    def __init__(self, path: str):
+        with open(path, "rb") as f:
+            st = os.fstat(f.fileno())
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self.inode = (st.st_dev, st.st_ino, st.st_mtime)
+        self.size = st.st_size
+
+        magic, toc_offset, toc_length = _HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC or toc_offset + toc_length > self.size:
+            raise ValueError(f"{path} is not a content snapshot")
+        toc = json.loads(self._map[toc_offset:toc_offset + toc_length].decode("utf-8"))
+        self.created = toc["created"]
+        self.sources: Dict[str, SourceState] = {
+            source: tuple(state) if state is not None else None for source, state in toc["sources"].items()
+        }
+        self._toc: Dict[str, list] = toc["bodies"]
+        self._view = memoryview(self._map)
+        self._bodies: Dict[str, PrecompressedBody] = {}
+
+    def __len__(self):
+        return len(self._toc)
+
+    def body(self, key: str) -> Optional[PrecompressedBody]:
+        """The prebuilt body for ``key``; its variants are views into the mapping"""
+        body = self._bodies.get(key)
+        if body is not None:
+            return body
+        entry = self._toc.get(key)
+        if entry is None:
+            return None
+        etag, media_type, *variants = entry
+        identity, gzip, br = (
+            self._view[variant[0]:variant[0] + variant[1]] if variant is not None else None
+            for variant in variants
+        )
+        # The view is never released, so the mapping lives as long as this
+        # snapshot and any response still sending one of its bodies
+        return self._bodies.setdefault(key, PrecompressedBody(identity, gzip, br, etag, media_type))
+
+    def is_current(self) -> bool:
+        """True while every source file is unchanged since the build"""
+        return all(file_state(source) == state for source, state in self.sources.items())
+
+
+class SnapshotStore:
+    """Maps the snapshot at ``path`` and swaps in a new one when it is replaced.
+
+    current() re-checks the snapshot file and its sources at most once per
+    ``check_interval`` and returns None while the snapshot is missing or
+    stale, in which case callers build the response themselves.
+    """
+
+    def __init__(self, path: str, check_interval: float = 1.0):
+        self.path = path
+        self.check_interval = check_interval
+        self._snapshot: Optional[ContentSnapshot] = None
+        self._current = False
+        self._checked_at = float("-inf")
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "swaps": 0, "builds": 0}
+
+    def current(self, refresh: bool = False) -> Optional[ContentSnapshot]:
+        now = time.monotonic()
+        if refresh or now - self._checked_at >= self.check_interval:
+            with self._lock:
+                self._refresh(now)
+        return self._snapshot if self._current else None
+
+    def write(self, sources: Dict[str, SourceState],
+              bodies: Iterable[Tuple[str, PrecompressedBody]]) -> Dict[str, Any]:
+        """Build a new snapshot, rename it into place and map it"""
+        report = write_snapshot(self.path, sources, bodies)
+        self.stats["builds"] += 1
+        self.current(refresh=True)
+        return report
+
+    def body(self, key: str) -> Optional[PrecompressedBody]:
+        snapshot = self.current()
+        body = snapshot.body(key) if snapshot is not None else None
+        self.stats["hits" if body is not None else "misses"] += 1
+        return body
+
+    @contextmanager
+    def build_lock(self) -> Iterator[bool]:
+        """Yield True if this process may build the next snapshot.
+
+        Only one process builds at a time; the others keep serving from
+        their own caches until the new file appears.
+        """
+        if fcntl is None:
+            yield True
+            return
+        with open(f"{self.path}.lock", "a") as f:
+            try:
+                fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                yield False
+                return
+            try:
+                yield True
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def usage(self) -> Dict[str, Any]:
+        snapshot = self._snapshot
+        return {
+            "current": self._current,
+            "bodies": len(snapshot) if snapshot is not None else 0,
+            "bytes": snapshot.size if snapshot is not None else 0,
+            "created": snapshot.created if snapshot is not None else None,
+            **self.stats,
+        }
+
+    def _refresh(self, now: float):
+        self._checked_at = now
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            self._snapshot, self._current = None, False
+            return
+
+        snapshot = self._snapshot
+        if snapshot is None or snapshot.inode != (st.st_dev, st.st_ino, st.st_mtime):
+            try:
+                snapshot = ContentSnapshot(self.path)
+            except (OSError, ValueError) as e:
+                print(f"Error mapping content snapshot: {str(e)}")
+                self._snapshot, self._current = None, False
+                return
+            # The old mapping is unmapped once no response uses it any more
+            self._snapshot = snapshot
+            self.stats["swaps"] += 1
+        self._current = snapshot.is_current()
+
+
+def run_cli():
+    parser = argparse.ArgumentParser(description="Compile the experiment content into the content snapshot")
+    parser.add_argument("--force", action="store_true", help="Rebuild even if the snapshot is current")
+    args = parser.parse_args()
+
+    # Reuse the server's configuration and response builders
+    import main
+
+    if main.content_snapshots is None:
+        parser.error("CONTENT_SNAPSHOT is empty, so the snapshot is disabled")
+    report = main.update_content_snapshot(force=args.force)
+    if report is None:
+        report = {"skipped": "snapshot is current or another process is building it",
+                  **main.content_snapshots.usage()}
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    run_cli()
@@ -0,0 +1,201 @@
+"""
+In-memory store for the experiment content files under data/experiments.
+
+Each category file is parsed once and kept in memory as a read-only object
+tree. A file is only re-read when its mtime or size changes, and the stat
+call used to detect that is itself rate limited so that bursts of requests
+do not turn into bursts of syscalls.
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, Optional
+
+
+class FrozenDict(dict):
+    """A dict that refuses in-place modification.
+
+    It is still a real ``dict`` so FastAPI and the json module serialize it
+    without any conversion. ``copy()`` returns a plain, mutable dict.
+    """
+
+    def _readonly(self, *args, **kwargs):
+        raise TypeError("content store objects are read-only; copy() them first")
+
+    __setitem__ = _readonly
+    __delitem__ = _readonly
+    clear = _readonly
+    pop = _readonly
+    popitem = _readonly
+    setdefault = _readonly
+    update = _readonly
+    __ior__ = _readonly
+
+    def copy(self):
+        return dict(self)
+
+    def __copy__(self):
+        return dict(self)
+
+    def __deepcopy__(self, memo):
+        return thaw(self)
+
+    def __reduce__(self):
+        return (dict, (dict(self),))
+
+
+def freeze(value: Any) -> Any:
+    """Recursively convert parsed JSON into FrozenDicts and tuples"""
+    if isinstance(value, dict):
+        frozen = FrozenDict()
+        for key, item in value.items():
+            dict.__setitem__(frozen, key, freeze(item))
+        return frozen
+    if isinstance(value, list):
+        return tuple(freeze(item) for item in value)
+    return value
+
+
+def thaw(value: Any) -> Any:
+    """Return a fully mutable deep copy of a frozen object tree"""
+    if isinstance(value, dict):
+        return {key: thaw(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [thaw(item) for item in value]
+    return value
+
+
+@dataclass
+class ContentEntry:
+    """One parsed content file plus the file state it was parsed from"""
+    name: str
+    path: str
+    data: Any
+    mtime: float
+    size: int
+    version: str
+    loaded_at: float
+    checked_at: float = field(default=0.0, compare=False)
+    _derived: Dict[str, Any] = field(default_factory=dict, repr=False, compare=False)
+
+    def derive(self, key: str, builder: Callable[[Any], Any]) -> Any:
+        """Return ``builder(self.data)``, computed once per loaded version.
+
+        Indexes and other structures built from the content are cached on the
+        entry itself, so they are rebuilt automatically when the file changes
+        and a new entry replaces this one.
+        """
+        try:
+            return self._derived[key]
+        except KeyError:
+            return self._derived.setdefault(key, builder(self.data))
+
+    def derived(self, key: str) -> Any:
+        """The structure derived under ``key`` if it has been built, else None"""
+        return self._derived.get(key)
+
+
+class ContentStore:
+    """Caches parsed JSON files from a directory, reloading them on change"""
+
+    def __init__(self, base_dir: str, check_interval: float = 1.0):
+        self.base_dir = base_dir
+        self.check_interval = check_interval
+        self._entries: Dict[str, ContentEntry] = {}
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "reloads": 0, "stats": 0}
+
+    def path_for(self, name: str) -> str:
+        return os.path.join(self.base_dir, f"{name}.json")
+
+    def get(self, name: str) -> Optional[ContentEntry]:
+        """Return the current entry for ``name`` or None if the file is missing"""
+        entry = self._entries.get(name)
+        now = time.monotonic()
+
+        if entry is not None and now - entry.checked_at < self.check_interval:
+            self.stats["hits"] += 1
+            return entry
+
+        path = self.path_for(name)
+        self.stats["stats"] += 1
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            with self._lock:
+                self._entries.pop(name, None)
+            self.stats["misses"] += 1
+            return None
+
+        if entry is not None and entry.mtime == st.st_mtime and entry.size == st.st_size:
+            entry.checked_at = now
+            self.stats["hits"] += 1
+            return entry
+
+        self.stats["misses"] += 1
+        return self._load(name, path)
+
+    def load(self, name: str) -> Any:
+        """Return the parsed data for ``name`` or None if the file is missing"""
+        entry = self.get(name)
+        return entry.data if entry is not None else None
+
+    def reload(self, name: str) -> Optional[ContentEntry]:
+        """Force a re-read of ``name`` regardless of the rate limit"""
+        with self._lock:
+            self._entries.pop(name, None)
+        return self.get(name)
+
+    def preload(self, names: Iterable[str]):
+        for name in names:
+            try:
+                self.get(name)
+            except Exception as e:
+                print(f"Error preloading {name}: {str(e)}")
+
+    def derive(self, name: str, key: str, builder: Callable[[Any], Any]) -> Any:
+        """Return a structure derived from ``name``, or None if the file is missing"""
+        entry = self.get(name)
+        return entry.derive(key, builder) if entry is not None else None
+
+    def peek(self, name: str) -> Optional[ContentEntry]:
+        """The cached entry for ``name``, without checking the file or counting"""
+        return self._entries.get(name)
+
+    def version(self, name: str) -> Optional[str]:
+        entry = self.get(name)
+        return entry.version if entry is not None else None
+
+    def _load(self, name: str, path: str) -> Optional[ContentEntry]:
+        with self._lock:
+            # Another thread may have loaded the same file while we waited
+            current = self._entries.get(name)
+            try:
+                st = os.stat(path)
+            except FileNotFoundError:
+                self._entries.pop(name, None)
+                return None
+            if current is not None and current.mtime == st.st_mtime and current.size == st.st_size:
+                current.checked_at = time.monotonic()
+                return current
+
+            with open(path, "rb") as f:
+                raw = f.read()
+            data = freeze(json.loads(raw.decode("utf-8")))
+
+            entry = ContentEntry(
+                name=name,
+                path=path,
+                data=data,
+                mtime=st.st_mtime,
+                size=st.st_size,
+                version=hashlib.sha1(raw).hexdigest()[:16],
+                loaded_at=time.time(),
+                checked_at=time.monotonic(),
+            )
+            self._entries[name] = entry
+            self.stats["reloads"] += 1
+            return entry
@@ -0,0 +1,120 @@
+"""
+Content written when an experiment file is missing, e.g. on a fresh volume.
+
+Kept out of main.py so the literals are only loaded when they are needed.
+"""
+
+DEFAULT_CONTENT = {
+    "physics": {
+        "experiments": [
+            {
+                "id": "projectile-motion",
+                "title": "প্রজেক্টাইল মোশন",
+                "description": "বস্তুর গতিবিদ্যা এবং প্রক্ষেপণের গতিপথ অধ্যয়ন করুন",
+                "parameters": {
+                    "angle": {"min": 0, "max": 90, "default": 45, "label": "কোণ (ডিগ্রি)"},
+                    "velocity": {"min": 1, "max": 50, "default": 20, "label": "বেগ (m/s)"},
+                    "gravity": {"min": 1, "max": 20, "default": 9.8, "label": "অভিকর্ষ (m/s²)"}
+                },
+                "narration": "প্রক্ষেপণ গতি হল একটি বস্তুর গতি যা শুধুমাত্র পৃথিবীর অভিকর্ষীয় আকর্ষণের অধীনে থাকে। কোণ এবং প্রাথমিক বেগ পরিবর্তন করে দেখুন গতিপথ কিভাবে পরিবর্তিত হয়।"
+            },
+            {
+                "id": "circuit-simulator",
+                "title": "ইলেকট্রিক সার্কিট সিমুলেটর",
+                "description": "ড্র্যাগ এন্ড ড্রপ উপাদান দিয়ে বৈদ্যুতিক সার্কিট তৈরি করে ওহমের সূত্র এবং সিরিজ ও প্যারালাল সার্কিট শিখুন",
+                "type": "circuit",
+                "parameters": {
+                    "voltage": {"min": 1, "max": 24, "default": 9, "label": "ভোল্টেজ (V)"},
+                    "resistance": {"min": 1, "max": 1000, "default": 100, "label": "রেজিস্টেন্স (Ω)"},
+                    "showLabels": {"min": 0, "max": 1, "default": 1, "label": "লেবেল দেখান"}
+                },
+                "narration": "এই সিমুলেটরে আপনি ব্যাটারি, রেজিস্টর, তার এবং সুইচগুলি টেনে এনে বৈদ্যুতিক সার্কিট তৈরি করতে পারেন। ওহমের সূত্র (V = IR) অনুসারে, আপনি দেখতে পাবেন কিভাবে কারেন্ট এবং ভোল্টেজ সার্কিটের মধ্যে প্রবাহিত হয়। সিরিজ এবং প্যারালাল কনফিগারেশনে রেজিস্টরের আচরণ দেখুন।"
+            },
+            {
+                "id": "newton-laws",
+                "title": "নিউটনের গতিসূত্র",
+                "description": "কার্ট ঠেলা বনাম রিকশা টানা - বল, ভর, ও ত্বরণের সম্পর্ক অধ্যয়ন করুন",
+                "type": "newton",
+                "parameters": {
+                    "mass": {"min": 10, "max": 100, "default": 50, "label": "ভর (kg)"},
+                    "force": {"min": 10, "max": 500, "default": 100, "label": "বল (N)"},
+                    "friction": {"min": 0, "max": 1, "default": 0.2, "label": "ঘর্ষণ সহগ"}
+                },
+                "narration": "নিউটনের দ্বিতীয় সূত্র অনুসারে, একটি বস্তুর ত্বরণ তার উপর প্রযুক্ত বলের সমানুপাতিক এবং ভরের ব্যস্তানুপাতিক (a = F/m)। বল এবং ভর পরিবর্তন করে দেখুন কিভাবে একটি কার্ট ঠেলা এবং রিকশা টানার গতি পরিবর্তিত হয়।"
+            },
+            {
+                "id": "pendulum",
+                "title": "দোলক গতি",
+                "description": "সাধারণ দোলক এবং তার দোলন বৈশিষ্ট্য অধ্যয়ন করুন",
+                "parameters": {
+                    "length": {"min": 0.1, "max": 3, "default": 1, "label": "দৈর্ঘ্য (m)"},
+                    "gravity": {"min": 1, "max": 20, "default": 9.8, "label": "অভিকর্ষ (m/s²)"},
+                    "angle": {"min": 0, "max": 45, "default": 20, "label": "প্রারম্ভিক কোণ (ডিগ্রি)"}
+                },
+                "narration": "একটি সাধারণ দোলক হল একটি সুতার সাথে বাঁধা একটি ভর যা এদিক-ওদিক দুলতে থাকে। দোলকের দৈর্ঘ্য পরিবর্তন করলে দোলনের সময়কাল কিভাবে প্রভাবিত হয় তা পর্যবেক্ষণ করুন।"
+            }
+        ]
+    },
+    "biology": {
+        "experiments": [
+            {
+                "id": "heart",
+                "title": "মানব হৃদয়",
+                "description": "হৃদয়ের গঠন এবং রক্ত প্রবাহ সিস্টেম শিখুন",
+                "model_url": "/models/heart.glb",
+                "parts": [
+                    {"id": "left-ventricle", "name": "বাম নিলয়", "description": "বাম নিলয় থেকে অক্সিজেনযুক্ত রক্ত শরীরের বিভিন্ন অংশে পাঠায়।"},
+                    {"id": "right-ventricle", "name": "ডান নিলয়", "description": "ডান নিলয় কার্বন ডাই অক্সাইডযুক্ত রক্ত ফুসফুসে পাঠায়।"},
+                    {"id": "left-atrium", "name": "বাম অলিন্দ", "description": "বাম অলিন্দ ফুসফুস থেকে অক্সিজেনযুক্ত রক্ত গ্রহণ করে।"},
+                    {"id": "right-atrium", "name": "ডান অলিন্দ", "description": "ডান অলিন্দ শরীর থেকে কার্বন ডাই অক্সাইডযুক্ত রক্ত গ্রহণ করে।"}
+                ],
+                "narration": "মানব হৃদয় চারটি কক্ষ নিয়ে গঠিত: দুটি অলিন্দ এবং দুটি নিলয়। হৃদয় রক্তকে পাম্প করে শরীরের বিভিন্ন অংশে ও ফুসফুসে সরবরাহ করে। বিভিন্ন অংশে ক্লিক করে আরো জানুন।"
+            },
+            {
+                "id": "cell",
+                "title": "জীব কোষ",
+                "description": "জীব কোষের আণবিক গঠন এবং অঙ্গগুলি অধ্যয়ন করুন",
+                "model_url": "/models/cell.glb",
+                "parts": [
+                    {"id": "nucleus", "name": "নিউক্লিয়াস", "description": "নিউক্লিয়াস কোষের মূল নিয়ন্ত্রক যা DNA ধারণ করে এবং প্রোটিন সংশ্লেষণ নিয়ন্ত্রণ করে।"},
+                    {"id": "mitochondria", "name": "মাইটোকন্ড্রিয়া", "description": "মাইটোকন্ড্রিয়া কোষের 'পাওয়ার হাউস' যা শক্তি উৎপাদন করে।"},
+                    {"id": "cell-membrane", "name": "কোষ ঝিল্লি", "description": "কোষ ঝিল্লি কোষকে সুরক্ষা দেয় এবং পদার্থের আদান-প্রদান নিয়ন্ত্রণ করে।"},
+                    {"id": "endoplasmic-reticulum", "name": "এন্ডোপ্লাজমিক রেটিকুলাম", "description": "প্রোটিন সংশ্লেষণ এবং পরিবহনে সাহায্য করে।"}
+                ],
+                "narration": "জীব কোষ হল জীবনের মৌলিক একক। একটি কোষের ভিতরে বিভিন্ন অঙ্গাণু রয়েছে, যেমন নিউক্লিয়াস, মাইটোকন্ড্রিয়া, এবং এন্ডোপ্লাজমিক রেটিকুলাম। প্রতিটি অঙ্গাণু কোষের জীবনধারণের জন্য নির্দিষ্ট ভূমিকা পালন করে।"
+            }
+        ]
+    },
+    "chemistry": {
+        "experiments": [
+            {
+                "id": "acid-base",
+                "title": "অম্ল-ক্ষার বিক্রিয়া",
+                "description": "বিভিন্ন অম্ল ও ক্ষারের মধ্যে বিক্রিয়া দেখুন",
+                "chemicals": [
+                    {"id": "HCl", "name": "হাইড্রোক্লোরিক অ্যাসিড", "type": "acid"},
+                    {"id": "H2SO4", "name": "সালফিউরিক অ্যাসিড", "type": "acid"},
+                    {"id": "CH3COOH", "name": "অ্যাসেটিক অ্যাসিড", "type": "acid"},
+                    {"id": "NaOH", "name": "সোডিয়াম হাইড্রক্সাইড", "type": "base"},
+                    {"id": "KOH", "name": "পটাসিয়াম হাইড্রক্সাইড", "type": "base"},
+                    {"id": "NH4OH", "name": "অ্যামোনিয়াম হাইড্রক্সাইড", "type": "base"}
+                ],
+                "narration": "অম্ল-ক্ষার বিক্রিয়ায় একটি অম্ল এবং একটি ক্ষার বিক্রিয়া করে লবণ ও পানি উৎপন্ন করে। বিভিন্ন অম্ল ও ক্ষার নির্বাচন করে তাদের বিক্রিয়া দেখুন।"
+            },
+            {
+                "id": "precipitation",
+                "title": "অধঃক্ষেপণ বিক্রিয়া",
+                "description": "দুটি দ্রবণের বিক্রিয়া থেকে অদ্রবণীয় পদার্থ গঠন প্রক্রিয়া",
+                "chemicals": [
+                    {"id": "AgNO3", "name": "সিলভার নাইট্রেট", "type": "solution"},
+                    {"id": "NaCl", "name": "সোডিয়াম ক্লোরাইড", "type": "solution"},
+                    {"id": "PbNO3", "name": "লেড নাইট্রেট", "type": "solution"},
+                    {"id": "KI", "name": "পটাসিয়াম আয়োডাইড", "type": "solution"},
+                    {"id": "BaCl2", "name": "বেরিয়াম ক্লোরাইড", "type": "solution"},
+                    {"id": "Na2SO4", "name": "সোডিয়াম সালফেট", "type": "solution"}
+                ],
+                "narration": "অধঃক্ষেপণ বিক্রিয়ায় দুটি দ্রবণীয় যৌগ বিক্রিয়া করে একটি অদ্রবণীয় পদার্থ বা অধঃক্ষেপ গঠন করে। বিভিন্ন দ্রবণ নির্বাচন করে তাদের বিক্রিয়ার ফলাফল দেখুন।"
+            }
+        ]
+    },
+}
@@ -0,0 +1,94 @@
+"""
+Id and category indexes over the item lists in the content files.
+
+Built once per content version (see ContentEntry.derive), they give O(1)
+detail lookups, pre-filtered category lists and precomputed summaries for
+the listing pages.
+"""
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
+
+# Fields returned by view=summary for each kind of item list
+SUMMARY_FIELDS = {
+    "experiments": ("id", "title", "description", "category", "type"),
+    "chemicals": ("id", "name", "bengaliName", "formula", "type", "color", "state"),
+    "reactions": ("id", "reactant1", "reactant2", "product", "equation", "reactionType"),
+}
+
+
+def project(item: Mapping[str, Any], fields: Iterable[str]) -> Dict[str, Any]:
+    """Copy only the requested fields of an item, skipping absent ones"""
+    return {field: item[field] for field in fields if field in item}
+
+
+def parse_fields(fields: Optional[str]) -> Optional[Tuple[str, ...]]:
+    """Turn a ``fields=a,b`` query value into a tuple that always includes id"""
+    if not fields:
+        return None
+    names = [name.strip() for name in fields.split(",") if name.strip()]
+    if "id" not in names:
+        names.insert(0, "id")
+    return tuple(dict.fromkeys(names))
+
+
+class CollectionIndex:
+    """Indexes for one list of items, such as experiments or chemicals"""
+
+    def __init__(self, items: Sequence[Mapping[str, Any]], summary_fields: Sequence[str]):
+        self.items = tuple(items)
+        self.summary_fields = tuple(summary_fields)
+        self.by_id: Dict[str, Mapping[str, Any]] = {}
+        by_category: Dict[str, List[Mapping[str, Any]]] = {}
+
+        for item in self.items:
+            item_id = item.get("id")
+            if item_id is not None:
+                self.by_id.setdefault(item_id, item)
+            if "category" in item:
+                by_category.setdefault(item["category"], []).append(item)
+
+        self.by_category = {category: tuple(items) for category, items in by_category.items()}
+        self._summaries: Dict[Optional[str], Tuple[Dict[str, Any], ...]] = {}
+
+    def get(self, item_id: str) -> Optional[Mapping[str, Any]]:
+        return self.by_id.get(item_id)
+
+    def select(self, category: Optional[str] = None) -> Tuple[Mapping[str, Any], ...]:
+        if not category:
+            return self.items
+        return self.by_category.get(category, ())
+
+    def summaries(self, category: Optional[str] = None) -> Tuple[Dict[str, Any], ...]:
+        """Summary projections of the items in a category, computed once"""
+        try:
+            return self._summaries[category]
+        except KeyError:
+            # Items without an id cannot be opened from a listing, so leave them out
+            summaries = tuple(
+                project(item, self.summary_fields) for item in self.select(category) if "id" in item
+            )
+            return self._summaries.setdefault(category, summaries)
+
+    def listing(self, category: Optional[str] = None, view: Optional[str] = None,
+                fields: Optional[Tuple[str, ...]] = None, limit: Optional[int] = None,
+                offset: int = 0) -> Tuple[Sequence[Mapping[str, Any]], int]:
+        """Return ``(items, total)`` for a filtered, projected and paged listing"""
+        if view == "summary" and fields is None:
+            items: Sequence[Mapping[str, Any]] = self.summaries(category)
+        else:
+            items = self.select(category)
+
+        total = len(items)
+        if offset or limit is not None:
+            items = items[offset:offset + limit if limit is not None else None]
+        if fields is not None:
+            items = [project(item, fields) for item in items]
+        return items, total
+
+
+def build_indexes(data: Mapping[str, Any]) -> Dict[str, CollectionIndex]:
+    """Index every known item list present in a content file"""
+    return {
+        key: CollectionIndex(data.get(key, ()), summary_fields)
+        for key, summary_fields in SUMMARY_FIELDS.items()
+        if key in data
+    }
@@ -0,0 +1,201 @@
+"""
+HTTP caching helpers shared by the endpoints.
+
+Static JSON responses are serialized and compressed once per content
+version and kept as ready-made bodies with a strong ETag, so a request
+either gets a 304 or the pre-built bytes in the best encoding the client
+accepts.
+
+Dynamic JSON goes through FastJSONResponse, which skips FastAPI's
+jsonable_encoder pass and encodes with orjson when it is installed. Both
+encoders write non-ASCII text as raw UTF-8 rather than \\u escapes, which
+roughly halves the size of the Bengali content.
+"""
+import gzip
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Hashable, Optional
+
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; gzip is always available
+    brotli = None
+
+try:
+    import orjson
+except ImportError:  # orjson is optional; the stdlib encoder is the fallback
+    orjson = None
+
+# Bodies smaller than this are not worth compressing
+MIN_COMPRESS_SIZE = 1024
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """True if an If-None-Match header value matches ``etag``.
+
+    Weak and strong forms of the same tag are treated as equal, which is the
+    comparison RFC 9110 requires for If-None-Match.
+    """
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    wanted = etag[2:] if etag.startswith("W/") else etag
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == wanted:
+            return True
+    return False
+
+
+def accepted_encodings(accept_encoding: Optional[str]) -> Dict[str, float]:
+    """Parse an Accept-Encoding header into ``{coding: qvalue}``"""
+    accepted = {}
+    for part in (accept_encoding or "").split(","):
+        coding, _, params = part.strip().partition(";")
+        if not coding:
+            continue
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[coding.strip().lower()] = quality
+    return accepted
+
+
+def serialize_json(content: Any) -> bytes:
+    """Compact UTF-8 JSON, with orjson if it is available.
+
+    The stdlib path matches FastAPI's JSONResponse. orjson also encodes
+    NumPy scalars and arrays, and writes NaN as null instead of raising.
+    """
+    if orjson is not None:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(
+        content, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")
+    ).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse encoded with serialize_json.
+
+    Return it from an endpoint to skip FastAPI's validation and
+    jsonable_encoder pass; the content must already be plain JSON data.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return serialize_json(content)
+
+
+@dataclass
+class PrecompressedBody:
+    """A response body with its compressed variants and validator"""
+    identity: bytes
+    gzip: Optional[bytes]
+    br: Optional[bytes]
+    etag: str
+    media_type: str = "application/json"
+
+    @classmethod
+    def build(cls, body: bytes, media_type: str = "application/json", gzip_level: int = 9,
+              brotli_quality: int = 11) -> "PrecompressedBody":
+        compressible = len(body) >= MIN_COMPRESS_SIZE
+        return cls(
+            identity=body,
+            gzip=gzip.compress(body, compresslevel=gzip_level, mtime=0) if compressible else None,
+            br=brotli.compress(body, quality=brotli_quality) if compressible and brotli is not None else None,
+            etag=f'"{hashlib.sha1(body).hexdigest()[:20]}"',
+            media_type=media_type,
+        )
+
+    def variant_etag(self, encoding: Optional[str]) -> str:
+        # Each content-coding is a different representation with its own tag
+        return self.etag if encoding is None else f'{self.etag[:-1]}-{encoding}"'
+
+    def matches(self, if_none_match: Optional[str]) -> bool:
+        return any(
+            etag_matches(if_none_match, self.variant_etag(encoding))
+            for encoding in (None, "gzip", "br")
+        )
+
+    def select(self, accept_encoding: Optional[str]):
+        """Pick the smallest variant the client accepts"""
+        accepted = accepted_encodings(accept_encoding)
+        if self.br is not None and accepted.get("br", 0) > 0:
+            return "br", self.br
+        if self.gzip is not None and accepted.get("gzip", accepted.get("*", 0)) > 0:
+            return "gzip", self.gzip
+        return None, self.identity
+
+    def respond(self, request: Request, cache_control: str) -> Response:
+        headers = {"Cache-Control": cache_control, "Vary": "Accept-Encoding"}
+        encoding, body = self.select(request.headers.get("accept-encoding"))
+        headers["ETag"] = self.variant_etag(encoding)
+
+        if self.matches(request.headers.get("if-none-match")):
+            return Response(status_code=304, headers=headers)
+
+        if encoding is not None:
+            headers["Content-Encoding"] = encoding
+        return Response(content=body, media_type=self.media_type, headers=headers)
+
+
+class ResponseCache:
+    """Bounded LRU of pre-built response bodies.
+
+    Keys should include the versions of the content they were built from, so
+    a content change produces a new key and the stale body ages out. The
+    default compression levels suit bodies built once and served many times;
+    lower them for computed results that are rarely requested twice.
+    """
+
+    def __init__(self, max_entries: int = 128, gzip_level: int = 9, brotli_quality: int = 11):
+        self.max_entries = max_entries
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        self._bodies: "OrderedDict[Hashable, PrecompressedBody]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0}
+
+    def get(self, key: Hashable) -> Optional[PrecompressedBody]:
+        """The body built for ``key``, or None; never builds one"""
+        with self._lock:
+            body = self._bodies.get(key)
+            if body is not None:
+                self._bodies.move_to_end(key)
+                self.stats["hits"] += 1
+            return body
+
+    def __len__(self) -> int:
+        return len(self._bodies)
+
+    def clear(self):
+        """Drop every body, e.g. once another source serves them"""
+        with self._lock:
+            self._bodies.clear()
+
+    def get_or_build(self, key: Hashable, build: Callable[[], Any]) -> PrecompressedBody:
+        body = self.get(key)
+        if body is not None:
+            return body
+
+        self.stats["misses"] += 1
+        body = PrecompressedBody.build(
+            serialize_json(build()), gzip_level=self.gzip_level, brotli_quality=self.brotli_quality
+        )
+        with self._lock:
+            self._bodies[key] = body
+            while len(self._bodies) > self.max_entries:
+                self._bodies.popitem(last=False)
+        return body
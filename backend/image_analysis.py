@@ -0,0 +1,502 @@
+"""
+Image analysis pipeline behind /api/analyze-image.
+
+The image is downloaded with a shared, pooled HTTP client, connecting to
+the address that was checked to be public rather than resolving the host
+again. Results are cached under a hash of the downloaded bytes, so the
+same image submitted again, also from another URL, is answered without
+decoding it or calling the vision model. New images are decoded and
+downscaled in a worker thread. Their perceptual hash (dHash) is only a
+hint: a miss that looks like a cached image is counted, but never answered
+from the cache, since similar photos can show different things.
+Concurrent requests for the same image share one call, downloads are
+capped separately, and once the workers and their queue are full new work
+is refused with AnalysisOverloaded before anything is downloaded.
+
+The vision model is a pluggable backend: "sample" returns a fixed answer
+without any network access, "openai" calls an OpenAI-compatible chat
+completions API such as OpenRouter or a local stand-in server. httpx and
+Pillow are imported on the first analysis, not at startup.
+"""
+import asyncio
+import base64
+import binascii
+import hashlib
+import io
+import ipaddress
+import json
+import math
+import os
+import re
+import socket
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import TYPE_CHECKING, Any, Dict, Optional, Tuple
+from urllib.parse import urljoin, urlsplit
+
+if TYPE_CHECKING:
+    import httpx
+
+# Largest image accepted, before downscaling
+MAX_IMAGE_BYTES = 10 * 1024 * 1024
+# Images are downscaled so their longest side is at most this many pixels
+MAX_DIMENSION = 1024
+JPEG_QUALITY = 85
+MAX_REDIRECTS = 3
+
+# Fields of an analysis, with the values used when a model leaves one out
+RESULT_FIELDS = {
+    "visible_objects": [],
+    "observation_type": "",
+    "is_useful": False,
+    "usefulness_reason": "",
+    "fun_fact": "",
+}
+
+SAMPLE_RESULT = {
+    "visible_objects": ["গাছপালা", "পাখি", "আকাশ", "মেঘ"],
+    "observation_type": "প্রকৃতি ও পরিবেশ",
+    "is_useful": True,
+    "usefulness_reason": "এই ছবিটি বাস্তুতন্ত্র ও প্রকৃতির সম্পর্ক বোঝাতে উপযোগী।",
+    "fun_fact": "আপনি যে গাছগুলো দেখছেন, সেগুলো প্রতিদিন প্রায় ৪০০ লিটার পানি শোষণ করে এবং অক্সিজেন উৎপাদন করে যা ৪ জন মানুষের দৈনিক অক্সিজেনের চাহিদা মেটাতে পারে!",
+}
+
+PROMPT = (
+    "You are a kind science teacher reviewing a photo a student took for a citizen science project. "
+    "Answer in simple, encouraging Bengali suitable for a school-aged child. Reply with a JSON object "
+    "with exactly these keys: visible_objects (list of things visible in the photo), observation_type "
+    "(what kind of observation it is, e.g. insect, plant, pollution, cloud, water), is_useful (boolean: "
+    "is the photo useful for learning science), usefulness_reason (why or why not) and fun_fact (one fun "
+    "fact or tip about what is shown)."
+)
+
+_JSON_OBJECT = re.compile(r"\{.*\}", re.DOTALL)
+
+
+class ImageAnalysisError(ValueError):
+    """Raised for image URLs or data that cannot be analyzed"""
+
+
+class VisionBackendError(Exception):
+    """Raised when the vision model fails or answers in an unusable form"""
+
+
+class AnalysisOverloaded(Exception):
+    """Raised when the analysis queue is full"""
+
+    def __init__(self, retry_after: int):
+        super().__init__(f"Image analysis queue is full, retry after {retry_after}s")
+        self.retry_after = retry_after
+
+
+@dataclass
+class PreparedImage:
+    """A decoded and downscaled image, ready to send to a vision model"""
+    data: bytes
+    media_type: str
+    width: Optional[int]
+    height: Optional[int]
+    # Perceptual hash, or None if Pillow is not installed
+    dhash: Optional[str]
+
+    def data_url(self) -> str:
+        return f"data:{self.media_type};base64,{base64.b64encode(self.data).decode('ascii')}"
+
+
+@lru_cache(maxsize=None)
+def _pillow():
+    """PIL.Image, or None if Pillow is not installed"""
+    try:
+        from PIL import Image
+    except ImportError:  # Pillow is optional; images are then sent as they are
+        return None
+    return Image
+
+
+def dhash(image, size: int = 8) -> str:
+    """Difference hash: one bit per horizontally adjacent pair of grey pixels"""
+    # Mode L has one byte per pixel
+    pixels = image.convert("L").resize((size + 1, size), _pillow().BILINEAR).tobytes()
+    bits = 0
+    for row in range(size):
+        for col in range(size):
+            left = pixels[row * (size + 1) + col]
+            bits = (bits << 1) | (left > pixels[row * (size + 1) + col + 1])
+    return f"{bits:0{size * size // 4}x}"
+
+
+def content_key(data: bytes) -> str:
+    """Cache key of an image: a hash of its exact bytes"""
+    return hashlib.sha256(data).hexdigest()[:32]
+
+
+def prepare_image(data: bytes, max_dimension: int = MAX_DIMENSION) -> PreparedImage:
+    """Decode, downscale and hash an image. Blocks; run it in a thread."""
+    Image = _pillow()
+    if Image is None:
+        return PreparedImage(data, _sniff_media_type(data), None, None, None)
+
+    try:
+        image = Image.open(io.BytesIO(data))
+        # JPEG can decode straight to a reduced size, which is much faster
+        image.draft("RGB", (max_dimension, max_dimension))
+        image.load()
+    except Exception:
+        raise ImageAnalysisError("The URL does not point to a supported image")
+
+    perceptual = dhash(image)
+    if image.mode not in ("RGB", "L"):
+        image = image.convert("RGB")
+    image.thumbnail((max_dimension, max_dimension))
+    out = io.BytesIO()
+    image.save(out, format="JPEG", quality=JPEG_QUALITY)
+    return PreparedImage(out.getvalue(), "image/jpeg", image.width, image.height, perceptual)
+
+
+def _sniff_media_type(data: bytes) -> str:
+    for signature, media_type in ((b"\xff\xd8\xff", "image/jpeg"), (b"\x89PNG", "image/png"),
+                                  (b"GIF8", "image/gif"), (b"RIFF", "image/webp")):
+        if data.startswith(signature):
+            return media_type
+    raise ImageAnalysisError("The URL does not point to a supported image")
+
+
+def normalize_result(result: Any) -> Dict[str, Any]:
+    """Keep the known fields of a model's answer, filling in missing ones"""
+    if not isinstance(result, dict):
+        raise VisionBackendError("The vision model did not return an object")
+    normalized = {}
+    for field, default in RESULT_FIELDS.items():
+        value = result.get(field, default)
+        if field == "visible_objects" and isinstance(value, str):
+            value = [part.strip() for part in value.split(",") if part.strip()]
+        normalized[field] = value
+    normalized["is_useful"] = bool(normalized["is_useful"])
+    return normalized
+
+
+class ResultCache:
+    """LRU cache of analysis results that expire after ``ttl`` seconds.
+
+    Results are keyed on content_key(). The perceptual hash of each cached
+    image is kept as well, to count misses on images similar to a cached one.
+    """
+
+    def __init__(self, max_entries: int = 1024, ttl: float = 86400):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        # key -> (expiry, result, perceptual hash)
+        self._results: "OrderedDict[str, tuple]" = OrderedDict()
+        # perceptual hash -> key of the cached image it was last seen on
+        self._perceptual: Dict[str, str] = {}
+        self.stats = {"hits": 0, "misses": 0, "expired": 0, "similar": 0}
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        item = self._results.get(key)
+        if item is not None and item[0] < time.monotonic():
+            self._remove(key)
+            self.stats["expired"] += 1
+            item = None
+        if item is None:
+            self.stats["misses"] += 1
+            return None
+        self._results.move_to_end(key)
+        self.stats["hits"] += 1
+        return item[1]
+
+    def note_similar(self, perceptual: Optional[str]):
+        """Count a new image whose perceptual hash matches a cached one"""
+        if perceptual is not None and perceptual in self._perceptual:
+            self.stats["similar"] += 1
+
+    def put(self, key: str, result: Dict[str, Any], perceptual: Optional[str] = None):
+        if key in self._results:
+            self._remove(key)
+        self._results[key] = (time.monotonic() + self.ttl, result, perceptual)
+        if perceptual is not None:
+            self._perceptual[perceptual] = key
+        while len(self._results) > self.max_entries:
+            self._remove(next(iter(self._results)))
+
+    def _remove(self, key: str):
+        perceptual = self._results.pop(key)[2]
+        if perceptual is not None and self._perceptual.get(perceptual) == key:
+            del self._perceptual[perceptual]
+
+    def __len__(self) -> int:
+        return len(self._results)
+
+
+class SampleVisionBackend:
+    """Offline stand-in that returns a fixed analysis.
+
+    ``delay`` simulates model latency, which makes it suitable for tests
+    and benchmarks.
+    """
+
+    name = "sample"
+
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.calls = 0
+
+    async def analyze(self, client: "httpx.AsyncClient", image: PreparedImage) -> Dict[str, Any]:
+        self.calls += 1
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        return dict(SAMPLE_RESULT)
+
+
+class OpenAIVisionBackend:
+    """Asks a model behind an OpenAI-compatible chat completions endpoint"""
+
+    name = "openai"
+
+    def __init__(self, url: str, model: str, api_key: Optional[str] = None):
+        self.url = url
+        self.model = model
+        self.api_key = api_key
+
+    async def analyze(self, client: "httpx.AsyncClient", image: PreparedImage) -> Dict[str, Any]:
+        import httpx
+
+        headers = {"Authorization": f"Bearer {self.api_key}"} if self.api_key else {}
+        body = {
+            "model": self.model,
+            "messages": [
+                {"role": "system", "content": PROMPT},
+                {"role": "user", "content": [
+                    {"type": "text", "text": "Please analyze this science observation image"},
+                    {"type": "image_url", "image_url": {"url": image.data_url()}},
+                ]},
+            ],
+        }
+        try:
+            response = await client.post(self.url, json=body, headers=headers)
+        except httpx.HTTPError as e:
+            raise VisionBackendError(f"Vision model request failed: {str(e)}")
+        if response.status_code >= 400:
+            raise VisionBackendError(f"Vision model returned status {response.status_code}")
+
+        try:
+            content = response.json()["choices"][0]["message"]["content"]
+            # Models often wrap the object in prose or a code fence
+            return normalize_result(json.loads(_JSON_OBJECT.search(content).group(0)))
+        except (KeyError, IndexError, TypeError, ValueError, AttributeError):
+            raise VisionBackendError("The vision model's answer could not be read")
+
+
+def create_vision_backend(name: str):
+    if name == "sample":
+        return SampleVisionBackend(delay=float(os.environ.get("VISION_STUB_DELAY", "0")))
+    if name == "openai":
+        url = os.environ.get("VISION_API_URL", "https://openrouter.ai/api/v1/chat/completions")
+        return OpenAIVisionBackend(url, os.environ.get("VISION_MODEL", "moonshotai/kimi-vl-a3b-thinking:free"),
+                                   os.environ.get("VISION_API_KEY"))
+    raise ValueError(f"Unknown vision backend: {name}")
+
+
+def pinned_target(url: str, address: str) -> Dict[str, Any]:
+    """httpx request arguments for ``url`` that connect to ``address`` instead
+    of resolving the host.
+
+    The Host header and the TLS server name stay those of ``url``, so the
+    certificate is still checked against the host name. A DNS answer that
+    changes after the check cannot redirect the request to another address.
+    """
+    parts = urlsplit(url)
+    userinfo, _, host = parts.netloc.rpartition("@")
+    netloc = f"[{address}]" if ":" in address else address
+    if parts.port is not None:
+        netloc = f"{netloc}:{parts.port}"
+    if userinfo:
+        netloc = f"{userinfo}@{netloc}"
+    return {
+        "url": parts._replace(netloc=netloc).geturl(),
+        "headers": {"Host": host},
+        "extensions": {"sni_hostname": parts.hostname},
+    }
+
+
+class ImageAnalyzer:
+    """Fetches, prepares and analyzes images with caching and bounded concurrency"""
+
+    def __init__(self, backend, max_workers: int = 4, max_queue: int = 32, cache: Optional[ResultCache] = None,
+                 timeout: float = 30.0, allow_private_urls: bool = False, max_downloads: Optional[int] = None):
+        self.backend = backend
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.max_downloads = max_downloads or max_workers * 2
+        self.cache = cache if cache is not None else ResultCache()
+        self.timeout = timeout
+        self.allow_private_urls = allow_private_urls
+        self._client: Optional["httpx.AsyncClient"] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._download_semaphore: Optional[asyncio.Semaphore] = None
+        # image key -> future shared by every request waiting on that analysis
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._pending = 0
+        self._downloading = 0
+        self._avg_seconds = 1.0
+        self.stats = {"analyzed": 0, "coalesced": 0, "rejected": 0, "failed": 0, "seconds_total": 0.0}
+
+    @property
+    def pending(self) -> int:
+        """Requests downloading, or analyses queued or running"""
+        return self._pending + self._downloading
+
+    @property
+    def client(self) -> "httpx.AsyncClient":
+        if self._client is None:
+            import httpx
+
+            self._client = httpx.AsyncClient(
+                timeout=httpx.Timeout(self.timeout, connect=min(self.timeout, 10.0)),
+                limits=httpx.Limits(max_connections=self.max_workers * 4, max_keepalive_connections=self.max_workers),
+            )
+        return self._client
+
+    async def close(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def analyze(self, image_url: str) -> Tuple[Dict[str, Any], str]:
+        """Return ``(result, source)`` for the image at ``image_url``.
+
+        ``source`` is "hit" for a cached result, "shared" if another request
+        was already analyzing the same image and "miss" otherwise.
+        """
+        # Refuse before downloading: up to MAX_IMAGE_BYTES per request
+        if self.pending >= self.max_workers + self.max_queue:
+            self.stats["rejected"] += 1
+            raise AnalysisOverloaded(self.retry_after())
+
+        if self._download_semaphore is None:
+            self._download_semaphore = asyncio.Semaphore(self.max_downloads)
+        self._downloading += 1
+        try:
+            async with self._download_semaphore:
+                data = await self.fetch(image_url)
+        finally:
+            self._downloading -= 1
+        key = content_key(data)
+
+        result = self.cache.get(key)
+        if result is not None:
+            return result, "hit"
+
+        future = self._inflight.get(key)
+        if future is not None:
+            self.stats["coalesced"] += 1
+            return await asyncio.shield(future), "shared"
+
+        if self._pending >= self.max_workers + self.max_queue:
+            self.stats["rejected"] += 1
+            raise AnalysisOverloaded(self.retry_after())
+
+        self._pending += 1
+        future = asyncio.ensure_future(self._run(key, data))
+        self._inflight[key] = future
+        # The analysis finishes and is cached even if every caller goes away
+        future.add_done_callback(lambda f: self._finish(key, f))
+        return await asyncio.shield(future), "miss"
+
+    async def fetch(self, image_url: str) -> bytes:
+        """Download an http(s) or data: URL, enforcing MAX_IMAGE_BYTES"""
+        import httpx
+
+        if image_url.startswith("data:"):
+            return self._decode_data_url(image_url)
+
+        url = image_url
+        for _ in range(MAX_REDIRECTS + 1):
+            address = await self._check_url(url)
+            try:
+                target = {"url": url} if address is None else pinned_target(url, address)
+                async with self.client.stream("GET", **target) as response:
+                    if response.is_redirect and "location" in response.headers:
+                        url = urljoin(url, response.headers["location"])
+                        continue
+                    if response.status_code >= 400:
+                        raise ImageAnalysisError(f"Downloading the image failed with status {response.status_code}")
+                    if int(response.headers.get("content-length") or 0) > MAX_IMAGE_BYTES:
+                        raise ImageAnalysisError("The image is too large")
+                    chunks, size = [], 0
+                    async for chunk in response.aiter_bytes():
+                        size += len(chunk)
+                        if size > MAX_IMAGE_BYTES:
+                            raise ImageAnalysisError("The image is too large")
+                        chunks.append(chunk)
+                    return b"".join(chunks)
+            except httpx.HTTPError as e:
+                raise ImageAnalysisError(f"Downloading the image failed: {str(e)}")
+        raise ImageAnalysisError("Too many redirects")
+
+    def retry_after(self) -> int:
+        """Seconds until a slot is likely to free up"""
+        waves = (self.pending + 1) / max(1, self.max_workers)
+        return max(1, math.ceil(waves * self._avg_seconds))
+
+    async def _run(self, key: str, data: bytes) -> Dict[str, Any]:
+        image = await asyncio.to_thread(prepare_image, data)
+        self.cache.note_similar(image.dhash)
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_workers)
+        async with self._semaphore:
+            started = time.perf_counter()
+            try:
+                result = normalize_result(await self.backend.analyze(self.client, image))
+            except Exception:
+                self.stats["failed"] += 1
+                raise
+            elapsed = time.perf_counter() - started
+        self._avg_seconds = 0.8 * self._avg_seconds + 0.2 * elapsed
+        self.stats["analyzed"] += 1
+        self.stats["seconds_total"] += elapsed
+        self.cache.put(key, result, image.dhash)
+        return result
+
+    def _finish(self, key: str, future: asyncio.Future):
+        if self._inflight.get(key) is future:
+            del self._inflight[key]
+            self._pending -= 1
+        if not future.cancelled():
+            # Nobody may be awaiting it any more; do not warn about the error
+            future.exception()
+
+    async def _check_url(self, url: str) -> Optional[str]:
+        """Validate ``url`` and return the public address to connect to.
+
+        Returns None if private URLs are allowed; httpx then resolves the
+        host itself.
+        """
+        parts = urlsplit(url)
+        if parts.scheme not in ("http", "https") or not parts.hostname:
+            raise ImageAnalysisError("image_url must be an http(s) or data: URL")
+        if self.allow_private_urls:
+            return None
+        # Do not let the server be used to reach hosts on its own network
+        try:
+            infos = await asyncio.get_running_loop().getaddrinfo(parts.hostname, parts.port or 443,
+                                                                 type=socket.SOCK_STREAM)
+        except OSError:
+            raise ImageAnalysisError(f"Cannot resolve {parts.hostname}")
+        addresses = [info[4][0].split("%")[0] for info in infos]
+        if not addresses or not all(ipaddress.ip_address(address).is_global for address in addresses):
+            raise ImageAnalysisError("image_url must point to a public host")
+        return addresses[0]
+
+    @staticmethod
+    def _decode_data_url(image_url: str) -> bytes:
+        header, _, payload = image_url.partition(",")
+        if not header.endswith(";base64"):
+            raise ImageAnalysisError("data: URLs must be base64 encoded")
+        if len(payload) > MAX_IMAGE_BYTES * 4 // 3 + 4:
+            raise ImageAnalysisError("The image is too large")
+        try:
+            return base64.b64decode(payload, validate=True)
+        except (binascii.Error, ValueError):
+            raise ImageAnalysisError("The data: URL is not valid base64")
@@ -1,24 +1,245 @@
-from fastapi import FastAPI, HTTPException, Query
+from fastapi import FastAPI, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse, FileResponse
+from fastapi.responses import JSONResponse, FileResponse, Response, StreamingResponse
 import json
 import os
-from gtts import gTTS
-import uuid
 from pydantic import BaseModel
 from pathlib import Path
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 import time
 import platform
-import requests
-from pydantic import BaseModel
+import asyncio
+import threading
+from contextlib import asynccontextmanager
+from urllib.parse import urlencode
+from content_store import ContentStore
+from reaction_index import ReactionIndex, NO_REACTION
+from reaction_rules import ReactionEngine, parse_actions
+from experiment_index import CollectionIndex, build_indexes, parse_fields
+from search_index import SearchIndex, build_search_index
+from audio_cache import AudioCache, is_valid_key
+from tts import TTSService, TTSOverloaded, create_backend
+from narrations import MANIFEST_NAME, category_audio_urls, prerender
+from http_cache import FastJSONResponse, PrecompressedBody, ResponseCache, etag_matches, serialize_json
+from content_snapshot import SnapshotStore, file_state
+from static_assets import AssetDirectory
+from physics_engine import (
+    DEFAULT_POINTS, SimulationError, check_model, parameter_schema, simulate, simulation_params, validate_params
+)
+from physics_sweep import parse_sweep, sweep, sweep_trajectories
+from circuit import CircuitError, CircuitSolver
+from image_analysis import (
+    AnalysisOverloaded, ImageAnalysisError, ImageAnalyzer, ResultCache, VisionBackendError, create_vision_backend
+)
+from metrics import Metrics, MetricsMiddleware, RequestProfiler, by_label, family
+
+EXPERIMENTS_DIR = "data/experiments"
+CONTENT_FILES = ["physics", "biology", "chemistry", "chemicals", "reactions"]
+
+# Parsed experiment content shared by all endpoints, re-read only when a file changes
+content_store = ContentStore(
+    EXPERIMENTS_DIR,
+    check_interval=float(os.environ.get("CONTENT_CHECK_INTERVAL", "1.0"))
+)
+
+# Prebuilt content bodies compiled into one file that every worker maps
+# read-only, so they are held once per host. An empty value turns it off.
+CONTENT_SNAPSHOT = os.environ.get("CONTENT_SNAPSHOT", "data/content.snapshot")
+content_snapshots = SnapshotStore(CONTENT_SNAPSHOT, check_interval=content_store.check_interval) \
+    if CONTENT_SNAPSHOT else None
+# Content files the snapshot is built from
+SNAPSHOT_CONTENT_FILES = ["physics", "biology", "chemicals", "reactions"]
+# Longest a starting worker waits for another one to finish the snapshot
+SNAPSHOT_WAIT_TIMEOUT = 120
+
+# Sources searched by /api/search: content file, item list and detail URL
+SEARCH_SOURCES = {
+    "physics": ("physics", "experiments", "/api/experiments/physics/{id}"),
+    "biology": ("biology", "experiments", "/api/experiments/biology/{id}"),
+    "chemicals": ("chemicals", "chemicals", "/api/experiments/chemistry/{id}"),
+    "reactions": ("reactions", "reactions", "/api/experiments/chemistry/{id}"),
+}
+# The search index and the state of the content files it was built from
+search_index: Optional[Tuple[tuple, SearchIndex]] = None
+search_index_lock = threading.Lock()
+
+AUDIO_DIR = "data/audio"
+
+# Generated TTS audio, keyed on the text so each narration is synthesized once
+audio_cache = AudioCache(
+    AUDIO_DIR,
+    max_bytes=int(os.environ.get("AUDIO_CACHE_MAX_MB", "256")) * 1024 * 1024,
+    max_files=int(os.environ.get("AUDIO_CACHE_MAX_FILES", "5000")),
+    # Files not played for this long are removed by the maintenance task; 0 keeps them
+    max_age=float(os.environ.get("AUDIO_CACHE_MAX_AGE_DAYS", "30")) * 86400 or None
+)
+AUDIO_MAINTENANCE_INTERVAL = float(os.environ.get("AUDIO_MAINTENANCE_INTERVAL", "600"))
+
+# Synthesis runs in a bounded worker pool so it never blocks the event loop
+tts_service = TTSService(
+    audio_cache,
+    backend=create_backend(os.environ.get("TTS_BACKEND", "gtts")),
+    max_workers=int(os.environ.get("TTS_MAX_WORKERS", "4")),
+    max_queue=int(os.environ.get("TTS_MAX_QUEUE", "32"))
+)
+
+# Manifest of pre-rendered narration audio, written by narrations.py
+narration_store = ContentStore(AUDIO_DIR)
+
+# Static assets, with cached metadata and precompressed sidecar files
+svg_assets = AssetDirectory(
+    "app/svg",
+    media_types={".svg": "image/svg+xml"},
+    cache_control="public, max-age=86400"
+)
+model_assets = AssetDirectory(
+    "app/webmodel",
+    media_types={".glb": "model/gltf-binary", ".gltf": "model/gltf+json"},
+    cache_control="public, max-age=604800",  # Cache for 1 week
+    extra_headers={
+        "Access-Control-Allow-Origin": "*",  # Allow CORS
+        "Access-Control-Allow-Methods": "GET, OPTIONS",
+        "Access-Control-Allow-Headers": "Content-Type, Range",
+        "Access-Control-Expose-Headers": "Content-Range, Content-Length, ETag"
+    }
+)
+
+# Full listings and files, serialized and compressed once per content version.
+# Kept apart from response_cache so paging and detail requests cannot evict them.
+static_cache = ResponseCache(max_entries=128)
+# Paged, filtered and projected listings: any query makes a new key, so
+# compress them quickly and keep only the recent ones
+response_cache = ResponseCache(max_entries=256, gzip_level=6, brotli_quality=5)
+# Simulation results: many distinct bodies, so compress them quickly
+simulation_cache = ResponseCache(max_entries=256, gzip_level=6, brotli_quality=5)
+# Sweeps with trajectories reach megabytes, so compress at the fastest levels
+sweep_cache = ResponseCache(max_entries=32, gzip_level=1, brotli_quality=1)
+# Single experiments and chemistry items: many small bodies, where the
+# highest brotli quality costs far more time than it saves bytes
+item_cache = ResponseCache(max_entries=1024, brotli_quality=6)
+
+circuit_solver = CircuitSolver()
+
+# Vision model calls, bounded and cached on a hash of the image bytes
+image_analyzer = ImageAnalyzer(
+    create_vision_backend(os.environ.get("VISION_BACKEND", "sample")),
+    max_workers=int(os.environ.get("VISION_MAX_WORKERS", "4")),
+    max_queue=int(os.environ.get("VISION_MAX_QUEUE", "32")),
+    cache=ResultCache(
+        max_entries=int(os.environ.get("VISION_CACHE_MAX_ENTRIES", "1024")),
+        ttl=float(os.environ.get("VISION_CACHE_TTL", "86400"))
+    ),
+    timeout=float(os.environ.get("VISION_TIMEOUT", "30")),
+    allow_private_urls=os.environ.get("VISION_ALLOW_PRIVATE_URLS", "false").lower() in ("1", "true", "yes"),
+    max_downloads=int(os.environ.get("VISION_MAX_DOWNLOADS", "0")) or None
+)
+
+metrics = Metrics()
+request_profiler = RequestProfiler(
+    sample_rate=float(os.environ.get("PROFILE_SAMPLE_RATE", "0")),
+    allow_header=os.environ.get("PROFILE_HEADER", "false").lower() in ("1", "true", "yes"),
+    slow_seconds=float(os.environ.get("PROFILE_SLOW_MS", "500")) / 1000,
+)
+CONTENT_CACHE_CONTROL = f"public, max-age={os.environ.get('CONTENT_CACHE_MAX_AGE', '300')}, must-revalidate"
+
+# Progress of the start-up warm-up, reported by /api/ready
+warmup_state: Dict[str, Any] = {"status": "warming", "seconds": None, "steps": {}, "error": None}
+
+async def run_warm_up():
+    try:
+        await asyncio.to_thread(warm_up)
+        warmup_state["status"] = "ready"
+        print(f"Warm-up finished in {warmup_state['seconds']}s: {warmup_state['steps']}")
+    except Exception as e:
+        warmup_state["status"] = "failed"
+        warmup_state["error"] = str(e)
+        print(f"Error warming up: {str(e)}")
 
-# Create necessary directories
-os.makedirs("data", exist_ok=True)
-os.makedirs("data/audio", exist_ok=True)
-os.makedirs("data/experiments", exist_ok=True)
+async def refresh_content_snapshot():
+    """Recompile the content snapshot whenever its source files change.
 
-app = FastAPI(title="Science Education Platform API")
+    Bodies this worker built while the snapshot was stale are dropped once a
+    current one is mapped, since it answers those requests from then on.
+    """
+    while True:
+        try:
+            if content_snapshots.current() is None:
+                await asyncio.to_thread(update_content_snapshot)
+            if content_snapshots.current() is not None:
+                drop_snapshot_bodies()
+        except Exception as e:
+            print(f"Error building content snapshot: {str(e)}")
+        await asyncio.sleep(content_snapshots.check_interval)
+
+async def refresh_search_index():
+    """Rebuild the search index in the background whenever its content changes.
+
+    Searches keep using the previous index until the new one is swapped in.
+    """
+    while True:
+        await asyncio.sleep(content_store.check_interval)
+        try:
+            if search_index is not None and search_index[0] != search_sources_state():
+                await asyncio.to_thread(update_search_index)
+        except Exception as e:
+            print(f"Error building search index: {str(e)}")
+
+async def prerender_narrations():
+    """Render missing narration audio in the background after startup"""
+    try:
+        report = await prerender(
+            content_store,
+            tts_service,
+            narration_store.path_for(MANIFEST_NAME),
+            # Leave half of the TTS pool for live requests
+            concurrency=max(1, tts_service.max_workers // 2)
+        )
+        print(f"Narration pre-render finished: {report}")
+    except Exception as e:
+        print(f"Error pre-rendering narrations: {str(e)}")
+
+def narration_audio_keys():
+    """Audio keys the narration manifest links to"""
+    return narration_store.derive(
+        MANIFEST_NAME, "keys",
+        lambda manifest: frozenset(entry["key"] for entry in manifest.get("entries", {}).values())
+    ) or frozenset()
+
+async def maintain_audio_cache():
+    """Expire, evict and clean up cached audio at startup and then periodically"""
+    while True:
+        try:
+            report = await asyncio.to_thread(audio_cache.maintain, narration_audio_keys())
+            if report["expired"] or report["evicted"] or report["orphans"]:
+                print(f"Audio cache maintenance: {report}")
+        except Exception as e:
+            print(f"Error maintaining audio cache: {str(e)}")
+        await asyncio.sleep(AUDIO_MAINTENANCE_INTERVAL)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Content, indexes and listing bodies are built in the background, so the
+    # process answers liveness checks at once and readiness checks once warm
+    warmup_task = asyncio.create_task(run_warm_up())
+    prerender_task = None
+    if os.environ.get("PRERENDER_NARRATIONS", "false").lower() in ("1", "true", "yes"):
+        prerender_task = asyncio.create_task(prerender_narrations())
+    maintenance_task = asyncio.create_task(maintain_audio_cache())
+    snapshot_task = asyncio.create_task(refresh_content_snapshot()) if content_snapshots is not None else None
+    search_task = asyncio.create_task(refresh_search_index())
+    yield
+    warmup_task.cancel()
+    search_task.cancel()
+    if snapshot_task is not None:
+        snapshot_task.cancel()
+    maintenance_task.cancel()
+    if prerender_task is not None:
+        prerender_task.cancel()
+    tts_service.shutdown()
+    await image_analyzer.close()
+    audio_cache.flush()
+
+app = FastAPI(title="Science Education Platform API", lifespan=lifespan, default_response_class=FastJSONResponse)
 
 # Configure CORS
 app.add_middleware(
@@ -29,212 +250,611 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Outermost, so it times everything including CORS handling
+app.add_middleware(MetricsMiddleware, metrics=metrics, profiler=request_profiler)
+
+def collect_app_metrics():
+    """Metric families for the caches and the TTS queue"""
+    def hit_miss(stats):
+        return {"hit": stats["hits"], "miss": stats["misses"]}
+
+    audio = audio_cache.usage()
+    families = [
+        family("content_store_lookups_total", "counter", "Content file lookups by result",
+               by_label("result", hit_miss(content_store.stats))),
+        family("content_store_loads_total", "counter", "Content files parsed", content_store.stats["reloads"]),
+        family("response_cache_lookups_total", "counter", "Prebuilt response lookups by result", [
+            ({"cache": name, "result": result}, count)
+            for name, cache in (("static", static_cache), ("content", response_cache),
+                                ("item", item_cache), ("simulation", simulation_cache),
+                                ("sweep", sweep_cache))
+            for result, count in hit_miss(cache.stats).items()
+        ]),
+        family("audio_cache_lookups_total", "counter", "Audio cache lookups by result",
+               by_label("result", hit_miss(audio))),
+        family("audio_cache_evictions_total", "counter", "Audio files evicted", audio["evictions"]),
+        family("audio_cache_expired_total", "counter", "Audio files removed for age", audio["expired"]),
+        family("audio_cache_orphans_removed_total", "counter", "Unindexed audio and temp files removed",
+               audio["orphans"]),
+        family("audio_cache_leased_files", "gauge", "Audio files being sent", audio["leased"]),
+        family("audio_cache_files", "gauge", "Audio files cached", audio["files"]),
+        family("audio_cache_bytes", "gauge", "Bytes of cached audio", audio["bytes"]),
+        family("tts_queue_depth", "gauge", "Syntheses queued or running", tts_service.pending),
+        family("tts_requests_total", "counter", "TTS requests by outcome", by_label("result", {
+            name: tts_service.stats[name] for name in ("synthesized", "coalesced", "rejected", "failed")
+        })),
+        family("tts_synthesis_seconds_total", "counter", "Time spent synthesizing audio",
+               tts_service.stats["seconds_total"]),
+        family("image_analysis_requests_total", "counter", "Image analyses by outcome", by_label("result", {
+            **{name: image_analyzer.stats[name] for name in ("analyzed", "coalesced", "rejected", "failed")},
+            "cached": image_analyzer.cache.stats["hits"],
+        })),
+        family("image_analysis_similar_total", "counter",
+               "Images analyzed although perceptually equal to a cached one", image_analyzer.cache.stats["similar"]),
+        family("image_analysis_queue_depth", "gauge", "Image requests downloading, or analyses queued or running", image_analyzer.pending),
+        family("circuit_factorizations_total", "counter", "Circuit matrix factorizations by result",
+               by_label("result", {"new": circuit_solver.stats["factorizations"],
+                                   "reused": circuit_solver.stats["reused"]})),
+    ]
+
+    if content_snapshots is not None:
+        snapshot = content_snapshots.usage()
+        families += [
+            family("content_snapshot_lookups_total", "counter", "Content snapshot lookups by result",
+                   by_label("result", hit_miss(snapshot))),
+            family("content_snapshot_builds_total", "counter", "Content snapshots compiled by this process",
+                   snapshot["builds"]),
+            family("content_snapshot_swaps_total", "counter", "Content snapshots mapped", snapshot["swaps"]),
+            family("content_snapshot_bytes", "gauge", "Size of the mapped content snapshot", snapshot["bytes"]),
+        ]
+
+    # Memoized computations; the reaction engine is only reported once built
+    caches = {"simulate": simulate.cache_info(), "sweep": sweep.cache_info()}
+    reactions = content_store.peek("reactions")
+    engine = reactions.derived("reaction_engine") if reactions is not None else None
+    if engine is not None:
+        caches["reactions"] = engine.cache_info()
+    if search_index is not None:
+        caches["search"] = search_index[1].cache_info()
+    families.append(family("memo_cache_lookups_total", "counter", "Memoized computation lookups by result", [
+        ({"cache": name, "result": result}, count)
+        for name, info in caches.items()
+        for result, count in (("hit", info.hits), ("miss", info.misses))
+    ]))
+    return families
+
+metrics.register(collect_app_metrics)
+
 # Health check endpoint
 @app.get("/api/health")
 async def health_check():
-    """Health check endpoint for monitoring and Docker healthchecks"""
+    """Liveness check: the process is up and serving requests"""
     return {
         "status": "healthy",
         "timestamp": time.time(),
         "version": "0.1.0",
         "environment": os.environ.get("ENVIRONMENT", "development"),
         "system": platform.system(),
-        "python_version": platform.python_version()
+        "python_version": platform.python_version(),
+        "audio_cache": {**audio_cache.usage(), "last_maintenance": audio_cache.last_maintenance}
     }
 
+@app.get("/api/ready")
+async def readiness_check():
+    """Readiness check for Docker and load balancers.
+
+    Returns 503 until the start-up warm-up has parsed the content and
+    prebuilt the common listings, then 200 with the time each step took.
+    """
+    ready = warmup_state["status"] == "ready"
+    return FastJSONResponse(
+        {
+            "status": "ready" if ready else "not ready",
+            "warmup": warmup_state,
+            "content_snapshot": content_snapshots.usage() if content_snapshots is not None else None
+        },
+        status_code=200 if ready else 503
+    )
+
+@app.get("/api/metrics")
+async def get_metrics():
+    """Request and cache metrics in the Prometheus text format"""
+    return Response(content=metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
 # Model for image analysis request
 class ImageAnalysisRequest(BaseModel):
     image_url: str
 
 @app.post("/api/analyze-image")
 async def analyze_image(request: ImageAnalysisRequest):
-    """Analyze an image and provide educational insights"""
+    """Analyze an image and provide educational insights.
+
+    ``image_url`` is an http(s) URL or a base64 data: URL. The
+    X-Analysis-Cache header tells whether the result was cached (hit),
+    shared with a concurrent request for the same image or newly computed.
+    """
     try:
-        # In a real implementation, this would call a vision AI model
-        # For now we'll return sample data
-
-        # You could implement OpenAI Vision API, Google Cloud Vision, or similar here
-        # Example: response = openai.ChatCompletion.create(model="gpt-4-vision-preview", ...)
-
-        # For now, return a sample response
-        return {
-            "visible_objects": ["গাছপালা", "পাখি", "আকাশ", "মেঘ"],
-            "observation_type": "প্রকৃতি ও পরিবেশ",
-            "is_useful": True,
-            "usefulness_reason": "এই ছবিটি বাস্তুতন্ত্র ও প্রকৃতির সম্পর্ক বোঝাতে উপযোগী।",
-            "fun_fact": "আপনি যে গাছগুলো দেখছেন, সেগুলো প্রতিদিন প্রায় ৪০০ লিটার পানি শোষণ করে এবং অক্সিজেন উৎপাদন করে যা ৪ জন মানুষের দৈনিক অক্সিজেনের চাহিদা মেটাতে পারে!"
-        }
+        result, source = await image_analyzer.analyze(request.image_url)
+        return FastJSONResponse(result, headers={"X-Analysis-Cache": source})
+    except ImageAnalysisError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except AnalysisOverloaded as e:
+        raise HTTPException(
+            status_code=503,
+            detail="Image analysis is busy, please try again shortly",
+            headers={"Retry-After": str(e.retry_after)}
+        )
+    except VisionBackendError as e:
+        print(f"Error analyzing image: {str(e)}")
+        raise HTTPException(status_code=502, detail=f"Image analysis failed: {str(e)}")
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Image analysis failed: {str(e)}")
 
 # Load experiment data
 def load_experiment_data(category: str):
     try:
-        file_path = f"data/experiments/{category}.json"
-        if not os.path.exists(file_path):
+        data = content_store.load(category)
+        if data is None:
             # Create default data if file doesn't exist
-            create_default_data(category)
-
-        with open(file_path, "r", encoding="utf-8") as f:
-            return json.load(f)
+            data = create_default_data(category)
+        return data
     except Exception as e:
         print(f"Error loading {category} data: {str(e)}")
         return []
 
 def create_default_data(category: str):
     """Create default data for each category"""
-    default_data = {}
-
-    if category == "physics":
-        default_data = {
-            "experiments": [
-                {
-                    "id": "projectile-motion",
-                    "title": "প্রজেক্টাইল মোশন",
-                    "description": "বস্তুর গতিবিদ্যা এবং প্রক্ষেপণের গতিপথ অধ্যয়ন করুন",
-                    "parameters": {
-                        "angle": {"min": 0, "max": 90, "default": 45, "label": "কোণ (ডিগ্রি)"},
-                        "velocity": {"min": 1, "max": 50, "default": 20, "label": "বেগ (m/s)"},
-                        "gravity": {"min": 1, "max": 20, "default": 9.8, "label": "অভিকর্ষ (m/s²)"}
-                    },
-                    "narration": "প্রক্ষেপণ গতি হল একটি বস্তুর গতি যা শুধুমাত্র পৃথিবীর অভিকর্ষীয় আকর্ষণের অধীনে থাকে। কোণ এবং প্রাথমিক বেগ পরিবর্তন করে দেখুন গতিপথ কিভাবে পরিবর্তিত হয়।"
-                },
-                {
-                    "id": "circuit-simulator",
-                    "title": "ইলেকট্রিক সার্কিট সিমুলেটর",
-                    "description": "ড্র্যাগ এন্ড ড্রপ উপাদান দিয়ে বৈদ্যুতিক সার্কিট তৈরি করে ওহমের সূত্র এবং সিরিজ ও প্যারালাল সার্কিট শিখুন",
-                    "type": "circuit",
-                    "parameters": {
-                        "voltage": {"min": 1, "max": 24, "default": 9, "label": "ভোল্টেজ (V)"},
-                        "resistance": {"min": 1, "max": 1000, "default": 100, "label": "রেজিস্টেন্স (Ω)"},
-                        "showLabels": {"min": 0, "max": 1, "default": 1, "label": "লেবেল দেখান"}
-                    },
-                    "narration": "এই সিমুলেটরে আপনি ব্যাটারি, রেজিস্টর, তার এবং সুইচগুলি টেনে এনে বৈদ্যুতিক সার্কিট তৈরি করতে পারেন। ওহমের সূত্র (V = IR) অনুসারে, আপনি দেখতে পাবেন কিভাবে কারেন্ট এবং ভোল্টেজ সার্কিটের মধ্যে প্রবাহিত হয়। সিরিজ এবং প্যারালাল কনফিগারেশনে রেজিস্টরের আচরণ দেখুন।"
-                },
-                {
-                    "id": "newton-laws",
-                    "title": "নিউটনের গতিসূত্র",
-                    "description": "কার্ট ঠেলা বনাম রিকশা টানা - বল, ভর, ও ত্বরণের সম্পর্ক অধ্যয়ন করুন",
-                    "type": "newton",
-                    "parameters": {
-                        "mass": {"min": 10, "max": 100, "default": 50, "label": "ভর (kg)"},
-                        "force": {"min": 10, "max": 500, "default": 100, "label": "বল (N)"},
-                        "friction": {"min": 0, "max": 1, "default": 0.2, "label": "ঘর্ষণ সহগ"}
-                    },
-                    "narration": "নিউটনের দ্বিতীয় সূত্র অনুসারে, একটি বস্তুর ত্বরণ তার উপর প্রযুক্ত বলের সমানুপাতিক এবং ভরের ব্যস্তানুপাতিক (a = F/m)। বল এবং ভর পরিবর্তন করে দেখুন কিভাবে একটি কার্ট ঠেলা এবং রিকশা টানার গতি পরিবর্তিত হয়।"
-                },
-                {
-                    "id": "pendulum",
-                    "title": "দোলক গতি",
-                    "description": "সাধারণ দোলক এবং তার দোলন বৈশিষ্ট্য অধ্যয়ন করুন",
-                    "parameters": {
-                        "length": {"min": 0.1, "max": 3, "default": 1, "label": "দৈর্ঘ্য (m)"},
-                        "gravity": {"min": 1, "max": 20, "default": 9.8, "label": "অভিকর্ষ (m/s²)"},
-                        "angle": {"min": 0, "max": 45, "default": 20, "label": "প্রারম্ভিক কোণ (ডিগ্রি)"}
-                    },
-                    "narration": "একটি সাধারণ দোলক হল একটি সুতার সাথে বাঁধা একটি ভর যা এদিক-ওদিক দুলতে থাকে। দোলকের দৈর্ঘ্য পরিবর্তন করলে দোলনের সময়কাল কিভাবে প্রভাবিত হয় তা পর্যবেক্ষণ করুন।"
-                }
-            ]
-        }
-    elif category == "biology":
-        default_data = {
-            "experiments": [
-                {
-                    "id": "heart",
-                    "title": "মানব হৃদয়",
-                    "description": "হৃদয়ের গঠন এবং রক্ত প্রবাহ সিস্টেম শিখুন",
-                    "model_url": "/models/heart.glb",
-                    "parts": [
-                        {"id": "left-ventricle", "name": "বাম নিলয়", "description": "বাম নিলয় থেকে অক্সিজেনযুক্ত রক্ত শরীরের বিভিন্ন অংশে পাঠায়।"},
-                        {"id": "right-ventricle", "name": "ডান নিলয়", "description": "ডান নিলয় কার্বন ডাই অক্সাইডযুক্ত রক্ত ফুসফুসে পাঠায়।"},
-                        {"id": "left-atrium", "name": "বাম অলিন্দ", "description": "বাম অলিন্দ ফুসফুস থেকে অক্সিজেনযুক্ত রক্ত গ্রহণ করে।"},
-                        {"id": "right-atrium", "name": "ডান অলিন্দ", "description": "ডান অলিন্দ শরীর থেকে কার্বন ডাই অক্সাইডযুক্ত রক্ত গ্রহণ করে।"}
-                    ],
-                    "narration": "মানব হৃদয় চারটি কক্ষ নিয়ে গঠিত: দুটি অলিন্দ এবং দুটি নিলয়। হৃদয় রক্তকে পাম্প করে শরীরের বিভিন্ন অংশে ও ফুসফুসে সরবরাহ করে। বিভিন্ন অংশে ক্লিক করে আরো জানুন।"
-                },
-                {
-                    "id": "cell",
-                    "title": "জীব কোষ",
-                    "description": "জীব কোষের আণবিক গঠন এবং অঙ্গগুলি অধ্যয়ন করুন",
-                    "model_url": "/models/cell.glb",
-                    "parts": [
-                        {"id": "nucleus", "name": "নিউক্লিয়াস", "description": "নিউক্লিয়াস কোষের মূল নিয়ন্ত্রক যা DNA ধারণ করে এবং প্রোটিন সংশ্লেষণ নিয়ন্ত্রণ করে।"},
-                        {"id": "mitochondria", "name": "মাইটোকন্ড্রিয়া", "description": "মাইটোকন্ড্রিয়া কোষের 'পাওয়ার হাউস' যা শক্তি উৎপাদন করে।"},
-                        {"id": "cell-membrane", "name": "কোষ ঝিল্লি", "description": "কোষ ঝিল্লি কোষকে সুরক্ষা দেয় এবং পদার্থের আদান-প্রদান নিয়ন্ত্রণ করে।"},
-                        {"id": "endoplasmic-reticulum", "name": "এন্ডোপ্লাজমিক রেটিকুলাম", "description": "প্রোটিন সংশ্লেষণ এবং পরিবহনে সাহায্য করে।"}
-                    ],
-                    "narration": "জীব কোষ হল জীবনের মৌলিক একক। একটি কোষের ভিতরে বিভিন্ন অঙ্গাণু রয়েছে, যেমন নিউক্লিয়াস, মাইটোকন্ড্রিয়া, এবং এন্ডোপ্লাজমিক রেটিকুলাম। প্রতিটি অঙ্গাণু কোষের জীবনধারণের জন্য নির্দিষ্ট ভূমিকা পালন করে।"
-                }
-            ]
-        }
-    elif category == "chemistry":
-        default_data = {
-            "experiments": [
-                {
-                    "id": "acid-base",
-                    "title": "অম্ল-ক্ষার বিক্রিয়া",
-                    "description": "বিভিন্ন অম্ল ও ক্ষারের মধ্যে বিক্রিয়া দেখুন",
-                    "chemicals": [
-                        {"id": "HCl", "name": "হাইড্রোক্লোরিক অ্যাসিড", "type": "acid"},
-                        {"id": "H2SO4", "name": "সালফিউরিক অ্যাসিড", "type": "acid"},
-                        {"id": "CH3COOH", "name": "অ্যাসেটিক অ্যাসিড", "type": "acid"},
-                        {"id": "NaOH", "name": "সোডিয়াম হাইড্রক্সাইড", "type": "base"},
-                        {"id": "KOH", "name": "পটাসিয়াম হাইড্রক্সাইড", "type": "base"},
-                        {"id": "NH4OH", "name": "অ্যামোনিয়াম হাইড্রক্সাইড", "type": "base"}
-                    ],
-                    "narration": "অম্ল-ক্ষার বিক্রিয়ায় একটি অম্ল এবং একটি ক্ষার বিক্রিয়া করে লবণ ও পানি উৎপন্ন করে। বিভিন্ন অম্ল ও ক্ষার নির্বাচন করে তাদের বিক্রিয়া দেখুন।"
-                },
-                {
-                    "id": "precipitation",
-                    "title": "অধঃক্ষেপণ বিক্রিয়া",
-                    "description": "দুটি দ্রবণের বিক্রিয়া থেকে অদ্রবণীয় পদার্থ গঠন প্রক্রিয়া",
-                    "chemicals": [
-                        {"id": "AgNO3", "name": "সিলভার নাইট্রেট", "type": "solution"},
-                        {"id": "NaCl", "name": "সোডিয়াম ক্লোরাইড", "type": "solution"},
-                        {"id": "PbNO3", "name": "লেড নাইট্রেট", "type": "solution"},
-                        {"id": "KI", "name": "পটাসিয়াম আয়োডাইড", "type": "solution"},
-                        {"id": "BaCl2", "name": "বেরিয়াম ক্লোরাইড", "type": "solution"},
-                        {"id": "Na2SO4", "name": "সোডিয়াম সালফেট", "type": "solution"}
-                    ],
-                    "narration": "অধঃক্ষেপণ বিক্রিয়ায় দুটি দ্রবণীয় যৌগ বিক্রিয়া করে একটি অদ্রবণীয় পদার্থ বা অধঃক্ষেপ গঠন করে। বিভিন্ন দ্রবণ নির্বাচন করে তাদের বিক্রিয়ার ফলাফল দেখুন।"
-                }
-            ]
-        }
+    from default_content import DEFAULT_CONTENT
+
+    default_data = DEFAULT_CONTENT.get(category, {})
 
     # Save default data
-    os.makedirs(os.path.dirname(f"data/experiments/{category}.json"), exist_ok=True)
-    with open(f"data/experiments/{category}.json", "w", encoding="utf-8") as f:
+    file_path = content_store.path_for(category)
+    os.makedirs(os.path.dirname(file_path), exist_ok=True)
+    with open(file_path, "w", encoding="utf-8") as f:
         json.dump(default_data, f, ensure_ascii=False, indent=2)
 
-    return default_data
+    # Serve the freshly written file from the content store like any other
+    entry = content_store.reload(category)
+    return entry.data if entry is not None else default_data
+
+def get_experiment_entry(category: str):
+    """Content store entry for a category, creating default data if missing"""
+    entry = content_store.get(category)
+    if entry is None:
+        create_default_data(category)
+        entry = content_store.get(category)
+    return entry
+
+def cached_json_response(request: Request, key, build, cache: ResponseCache = response_cache):
+    """Serve a static JSON payload from the response cache.
+
+    ``key`` must include the versions of all content the payload is built
+    from. Supports If-None-Match and gzip/brotli Accept-Encoding.
+    """
+    body = cache.get_or_build(key, build)
+    return body.respond(request, CONTENT_CACHE_CONTROL)
+
+def get_collection_index(entry, key: str) -> Optional[CollectionIndex]:
+    """Id/category index over one item list of a content store entry"""
+    return entry.derive("indexes", build_indexes).get(key)
+
+def check_view(view: Optional[str]):
+    if view not in (None, "full", "summary"):
+        raise HTTPException(status_code=400, detail="view must be 'full' or 'summary'")
+
+def listing_payload(entry, key: str, category: Optional[str], view: Optional[str],
+                    fields: Optional[tuple], limit: Optional[int], offset: int) -> Dict[str, Any]:
+    """Build a listing response for one item list of a content file"""
+    index = get_collection_index(entry, key)
+    items, total = index.listing(category, view, fields, limit, offset) if index is not None else ((), 0)
+
+    # The stored data is shared and read-only, so build the response in a copy
+    payload = entry.data.copy()
+    payload[key] = items
+    if limit is not None or offset:
+        payload.update({"total": total, "offset": offset, "limit": limit})
+    return payload
+
+def listing_cache(entry, key: str, category: Optional[str], fields: Optional[tuple], limit: Optional[int],
+                  offset: int) -> ResponseCache:
+    """static_cache for whole lists and existing categories, response_cache for other variants"""
+    if fields is not None or limit is not None or offset:
+        return response_cache
+    if category is not None:
+        index = get_collection_index(entry, key)
+        if index is None or category not in index.by_category:
+            return response_cache
+    return static_cache
+
+def snapshot_key(path: str, **params) -> str:
+    """Key of a body in the content snapshot: the request path and its query"""
+    query = urlencode(sorted((name, value) for name, value in params.items() if value is not None))
+    return f"{path}?{query}" if query else path
+
+def snapshot_body(path: str, **params) -> Optional[PrecompressedBody]:
+    """The body for a request from the content snapshot, if a current one holds it"""
+    if content_snapshots is None:
+        return None
+    return content_snapshots.body(snapshot_key(path, **params))
+
+def experiment_listing_payload(entry, name: str, category: Optional[str], view: Optional[str],
+                               field_names: Optional[tuple], limit: Optional[int], offset: int) -> Dict[str, Any]:
+    payload = listing_payload(entry, "experiments", category, view, field_names, limit, offset)
+    if view == "summary" or field_names is not None:
+        return payload
+    return with_narration_audio(payload, name)
+
+def experiment_listing_body(name: str, category: Optional[str], view: Optional[str],
+                            field_names: Optional[tuple], limit: Optional[int], offset: int,
+                            build: bool = True) -> Optional[PrecompressedBody]:
+    """Serialized physics or biology experiment list, built once per content version.
+
+    With ``build=False``, None is returned unless the body is already built.
+    """
+    if field_names is None and limit is None and not offset:
+        body = snapshot_body(f"/api/experiments/{name}", category=category, view=view)
+        if body is not None:
+            return body
+
+    entry = get_experiment_entry(name)
+    key = (name, category, view, field_names, limit, offset, entry.version, narration_store.version(MANIFEST_NAME))
+    cache = listing_cache(entry, "experiments", category, field_names, limit, offset)
+    if not build:
+        return cache.get(key)
+    return cache.get_or_build(
+        key, lambda: experiment_listing_payload(entry, name, category, view, field_names, limit, offset)
+    )
+
+async def experiment_listing_response(request: Request, name: str, category: Optional[str], view: Optional[str],
+                                      fields: Optional[str], limit: Optional[int], offset: int):
+    """Serve the physics or biology experiment list with filtering and paging"""
+    check_view(view)
+    args = (name, category, view, parse_fields(fields), limit, offset)
+    body = experiment_listing_body(*args, build=False)
+    if body is None:
+        # Serializing and compressing a listing would stall every other request
+        body = await asyncio.to_thread(experiment_listing_body, *args)
+    return body.respond(request, CONTENT_CACHE_CONTROL)
+
+def experiment_detail_response(request: Request, name: str, experiment_id: str):
+    """Serve a single experiment by id"""
+    body = snapshot_body(f"/api/experiments/{name}/{experiment_id}")
+    if body is not None:
+        return body.respond(request, CONTENT_CACHE_CONTROL)
+
+    entry = get_experiment_entry(name)
+    index = get_collection_index(entry, "experiments")
+    experiment = index.get(experiment_id) if index is not None else None
+    if experiment is None:
+        raise HTTPException(status_code=404, detail=f"Experiment {experiment_id} not found")
+
+    return cached_json_response(request, (name, "detail", experiment_id, entry.version), lambda: experiment, item_cache)
+
+def with_narration_audio(data: Dict[str, Any], category: str) -> Dict[str, Any]:
+    """Add pre-rendered narration audio URLs for ``category`` to a response"""
+    urls = narration_store.derive(
+        MANIFEST_NAME, f"urls:{category}", lambda manifest: category_audio_urls(manifest, category)
+    )
+    if not urls:
+        return data
+    data = data.copy()
+    data["narrationAudio"] = urls
+    return data
+
+def get_reaction_index() -> Optional[ReactionIndex]:
+    """Reaction lookup indexes for the current version of reactions.json"""
+    return content_store.derive("reactions", "reaction_index", ReactionIndex)
+
+def get_reaction_engine() -> Optional[ReactionEngine]:
+    """Reaction lookup plus compiled modifier rules for the current reactions.json"""
+    entry = content_store.get("reactions")
+    if entry is None:
+        return None
+    return entry.derive(
+        "reaction_engine", lambda data: ReactionEngine(entry.derive("reaction_index", ReactionIndex))
+    )
+
+def search_sources_state() -> tuple:
+    """State of the searched content files, to tell when the index is stale"""
+    return tuple(file_state(content_store.path_for(name)) for name, _, _ in SEARCH_SOURCES.values())
+
+def search_source_data(name: str):
+    """Parsed content of ``name`` for the search index.
+
+    The content store's copy is used when it is current. Otherwise the file
+    is parsed only for indexing and not kept, so workers that serve from the
+    content snapshot do not hold every content file just for search.
+    """
+    path = content_store.path_for(name)
+    entry = content_store.peek(name)
+    if entry is not None and file_state(path) == (entry.mtime, entry.size):
+        return entry.data
+    try:
+        with open(path, "rb") as f:
+            return json.loads(f.read().decode("utf-8"))
+    except FileNotFoundError:
+        return None
+
+def update_search_index() -> SearchIndex:
+    """The search index, rebuilt first if a searched file changed. Blocks."""
+    global search_index
+    with search_index_lock:
+        # Read before parsing, so a change made during the build triggers another one
+        state = search_sources_state()
+        current = search_index
+        if current is None or current[0] != state:
+            index = build_search_index(
+                (source, key, search_source_data(name), url) for source, (name, key, url) in SEARCH_SOURCES.items()
+            )
+            current = search_index = (state, index)
+        return current[1]
+
+def content_file_body(name: str) -> Optional[PrecompressedBody]:
+    """A whole content file, e.g. chemicals.json, as a prebuilt body"""
+    body = snapshot_body(f"/api/chemistry/{name}")
+    if body is not None:
+        return body
+
+    entry = content_store.get(name)
+    if entry is None:
+        return None
+    return static_cache.get_or_build((name, entry.version), lambda: entry.data)
+
+def reaction_matrix_version(chemicals_entry, reactions_entry) -> str:
+    return f"{chemicals_entry.version[:12]}-{reactions_entry.version[:12]}"
+
+def reaction_matrix_payload(chemicals_entry, reactions_entry) -> Dict[str, Any]:
+    """Reaction id (or "none") for every pair of chemicals"""
+    chemical_ids = [
+        chemical["id"] for chemical in chemicals_entry.data.get("chemicals", []) if "id" in chemical
+    ]
+    return {
+        "version": reaction_matrix_version(chemicals_entry, reactions_entry),
+        "chemicals": chemical_ids,
+        "none": NO_REACTION,
+        "matrix": reactions_entry.derive("reaction_index", ReactionIndex).matrix(chemical_ids),
+    }
+
+def reaction_matrix_body() -> Optional[PrecompressedBody]:
+    body = snapshot_body("/api/chemistry/reactions/matrix")
+    if body is not None:
+        return body
+
+    chemicals_entry = content_store.get("chemicals")
+    reactions_entry = content_store.get("reactions")
+    if chemicals_entry is None or reactions_entry is None:
+        return None
+    return static_cache.get_or_build(
+        ("reaction_matrix", reaction_matrix_version(chemicals_entry, reactions_entry)),
+        lambda: reaction_matrix_payload(chemicals_entry, reactions_entry)
+    )
+
+def chemistry_listing_payload(chemicals, reactions, view: Optional[str], field_names: Optional[tuple],
+                              limit: Optional[int], offset: int) -> Dict[str, Any]:
+    """Chemicals and reactions in one payload, with the same view and paging applied to both"""
+    chemicals_page = listing_payload(chemicals, "chemicals", None, view, field_names, limit, offset)
+    reactions_page = listing_payload(reactions, "reactions", None, view, field_names, limit, offset)
+    payload = {
+        "chemicals": chemicals_page["chemicals"],
+        "reactions": reactions_page["reactions"]
+    }
+    if limit is not None or offset:
+        payload.update({
+            "total": {"chemicals": chemicals_page["total"], "reactions": reactions_page["total"]},
+            "offset": offset,
+            "limit": limit
+        })
+    if view == "summary" or field_names is not None:
+        return payload
+    return with_narration_audio(payload, "reactions")
+
+def chemistry_listing_body(view: Optional[str], field_names: Optional[tuple], limit: Optional[int],
+                           offset: int, build: bool = True) -> Optional[PrecompressedBody]:
+    """Serialized chemicals and reactions, or None if either file is missing.
+
+    With ``build=False``, None is also returned while the body is not built yet.
+    """
+    whole = field_names is None and limit is None and not offset
+    if whole:
+        body = snapshot_body("/api/experiments/chemistry", view=view)
+        if body is not None:
+            return body
+
+    chemicals = content_store.get("chemicals")
+    reactions = content_store.get("reactions")
+    if chemicals is None or reactions is None:
+        return None
+
+    key = ("chemistry", view, field_names, limit, offset,
+           chemicals.version, reactions.version, narration_store.version(MANIFEST_NAME))
+    cache = static_cache if whole else response_cache
+    if not build:
+        return cache.get(key)
+    return cache.get_or_build(
+        key, lambda: chemistry_listing_payload(chemicals, reactions, view, field_names, limit, offset)
+    )
+
+def build_content_indexes():
+    """Id/category indexes for every content file with an item list"""
+    for name, key in (("physics", "experiments"), ("biology", "experiments"),
+                      ("chemicals", "chemicals"), ("reactions", "reactions")):
+        entry = content_store.get(name)
+        if entry is not None:
+            get_collection_index(entry, key)
+
+def prebuild_bodies():
+    """Serialize and compress the listings every client loads first"""
+    for view in (None, "summary"):
+        for name in ("physics", "biology"):
+            experiment_listing_body(name, None, view, None, None, 0)
+        chemistry_listing_body(view, None, None, 0)
+    content_file_body("chemicals")
+    content_file_body("reactions")
+    reaction_matrix_body()
+
+def current_entry(store: ContentStore, name: str):
+    """Entry for ``name`` that matches the file on disk right now, ignoring the stat rate limit"""
+    entry = store.get(name)
+    if entry is not None and file_state(entry.path) != (entry.mtime, entry.size):
+        entry = store.reload(name)
+    return entry
+
+def content_snapshot_bodies(entries: Dict[str, Any]):
+    """(key, body) for every response the content snapshot holds.
+
+    Built from the same payloads and compression levels as the endpoints, so
+    a response is the same whether it comes from the snapshot or from a
+    worker's own cache.
+    """
+    def body(payload, cache: ResponseCache = static_cache):
+        return PrecompressedBody.build(
+            serialize_json(payload), gzip_level=cache.gzip_level, brotli_quality=cache.brotli_quality
+        )
+
+    for name in ("physics", "biology"):
+        entry = entries[name]
+        index = get_collection_index(entry, "experiments") if entry is not None else None
+        if index is None:
+            continue
+        for view in (None, "summary"):
+            for category in (None, *sorted(index.by_category)):
+                yield (snapshot_key(f"/api/experiments/{name}", category=category, view=view),
+                       body(experiment_listing_payload(entry, name, category, view, None, None, 0)))
+        for experiment_id, experiment in index.by_id.items():
+            yield f"/api/experiments/{name}/{experiment_id}", body(experiment, item_cache)
+
+    chemicals, reactions = entries["chemicals"], entries["reactions"]
+    # The detail endpoint looks in chemicals first, so those ids win
+    items = {}
+    for name, entry in (("reactions", reactions), ("chemicals", chemicals)):
+        if entry is None:
+            continue
+        yield f"/api/chemistry/{name}", body(entry.data)
+        index = get_collection_index(entry, name)
+        if index is not None:
+            items.update(index.by_id)
+    for item_id, item in items.items():
+        yield f"/api/experiments/chemistry/{item_id}", body(item, item_cache)
+
+    if chemicals is not None and reactions is not None:
+        yield "/api/chemistry/reactions/matrix", body(reaction_matrix_payload(chemicals, reactions))
+        for view in (None, "summary"):
+            yield (snapshot_key("/api/experiments/chemistry", view=view),
+                   body(chemistry_listing_payload(chemicals, reactions, view, None, None, 0)))
+
+def update_content_snapshot(force: bool = False) -> Optional[Dict[str, Any]]:
+    """Compile a new content snapshot if the current one is missing or stale.
+
+    Returns None without building when the snapshot is current or another
+    process is already building it.
+    """
+    with content_snapshots.build_lock() as acquired:
+        if not acquired or (not force and content_snapshots.current(refresh=True) is not None):
+            return None
+        entries = {name: current_entry(content_store, name) for name in SNAPSHOT_CONTENT_FILES}
+        manifest = current_entry(narration_store, MANIFEST_NAME)
+        # Record the files as they were parsed, so a change during the build makes it stale
+        sources = {
+            content_store.path_for(name): (entry.mtime, entry.size) if entry is not None else None
+            for name, entry in entries.items()
+        }
+        sources[narration_store.path_for(MANIFEST_NAME)] = (
+            (manifest.mtime, manifest.size) if manifest is not None else None
+        )
+        report = content_snapshots.write(sources, content_snapshot_bodies(entries))
+        print(f"Content snapshot built: {report}")
+        return report
+
+def ensure_content_snapshot() -> bool:
+    """Build a current snapshot, or wait for another process to; False if none arrives in time"""
+    deadline = time.monotonic() + SNAPSHOT_WAIT_TIMEOUT
+    while True:
+        update_content_snapshot()
+        if content_snapshots.current(refresh=True) is not None:
+            return True
+        if time.monotonic() >= deadline:
+            return False
+        time.sleep(0.1)
+
+def drop_snapshot_bodies():
+    """Free the whole listings and items this worker built; the snapshot holds them"""
+    for cache in (static_cache, item_cache):
+        if len(cache):
+            cache.clear()
+
+def snapshot_ready() -> bool:
+    """Whether a current content snapshot is mapped, after building it or
+    waiting for the worker that does"""
+    if content_snapshots is None:
+        return False
+    try:
+        if ensure_content_snapshot():
+            return True
+        print("Content snapshot not ready, building listings in this process")
+    except Exception as e:
+        print(f"Error building content snapshot: {str(e)}")
+    return False
+
+def warm_up():
+    """Build the indexes and bodies the first requests need.
+
+    Blocks, so it runs in a thread; /api/ready reports ready once it is done.
+    With a content snapshot, one worker compiles it and the others wait for
+    it rather than parsing everything themselves; then only the reaction
+    engine and search index are built here, and the search index parses its
+    files without keeping them. Without a snapshot, or if none arrives in
+    time, this worker parses the content and prebuilds its own listings.
+    """
+    started = time.perf_counter()
+
+    def run(name, step):
+        step_started = time.perf_counter()
+        result = step()
+        warmup_state["steps"][name] = round(time.perf_counter() - step_started, 3)
+        return result
+
+    if content_snapshots is not None and run("snapshot", snapshot_ready):
+        steps = (("reactions", get_reaction_engine), ("search", update_search_index))
+    else:
+        steps = (
+            ("content", lambda: content_store.preload(CONTENT_FILES)),
+            ("indexes", build_content_indexes),
+            ("reactions", get_reaction_engine),
+            ("search", update_search_index),
+            ("bodies", prebuild_bodies),
+        )
+    for name, step in steps:
+        run(name, step)
+    warmup_state["seconds"] = round(time.perf_counter() - started, 3)
 
 # Chemistry data handling
 @app.get("/api/chemistry/chemicals")
-async def get_chemistry_chemicals():
+async def get_chemistry_chemicals(request: Request):
     """Get list of all available chemicals for the chemistry simulator"""
     try:
-        file_path = "data/experiments/chemicals.json"
-        if not os.path.exists(file_path):
+        body = content_file_body("chemicals")
+        if body is None:
             raise HTTPException(status_code=404, detail="Chemicals data not found")
 
-        with open(file_path, "r", encoding="utf-8") as f:
-            data = json.load(f)
-            return data
+        return body.respond(request, CONTENT_CACHE_CONTROL)
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"Error getting chemicals: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Failed to get chemicals: {str(e)}")
 
 @app.get("/api/chemistry/reactions")
-async def get_all_reactions():
+async def get_all_reactions(request: Request):
     """Get list of all possible chemical reactions"""
     try:
-        file_path = "data/experiments/reactions.json"
-        if not os.path.exists(file_path):
+        body = content_file_body("reactions")
+        if body is None:
             raise HTTPException(status_code=404, detail="Reactions data not found")
 
-        with open(file_path, "r", encoding="utf-8") as f:
-            data = json.load(f)
-            return data
+        return body.respond(request, CONTENT_CACHE_CONTROL)
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"Error getting reactions: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Failed to get reactions: {str(e)}")
@@ -248,153 +868,252 @@ async def perform_reaction(
     actions: str = Query(None)
 ):
     """Get the reaction result for two chemicals with optional parameters for temperature, mixing speed, and actions"""
-    # Load reactions data
     try:
-        file_path = "data/experiments/reactions.json"
-        if not os.path.exists(file_path):
+        reaction_engine = get_reaction_engine()
+        if reaction_engine is None:
             raise HTTPException(status_code=404, detail="Reactions data not found")
 
-        with open(file_path, "r", encoding="utf-8") as f:
-            reactions_data = json.load(f)
-
-        # Parse actions if provided
-        action_list = actions.split(',') if actions else []
-
-        # Search for match
-        for reaction in reactions_data.get("reactions", []):
-            if ((reaction["reactant1"] == chem1 and reaction["reactant2"] == chem2) or
-                (reaction["reactant1"] == chem2 and reaction["reactant2"] == chem1)):
-
-                # Enhance reaction based on actions and parameters
-                result = reaction.copy()
-
-                # Apply temperature effects
-                if temperature > 50:
-                    # Enhanced effects at higher temperatures
-                    if reaction.get("reactionType") == "acid-carbonate":
-                        result["animation"] = "bubble"
-                        result["description"] = result["description"] + f" At {temperature}°C, the reaction is accelerated."
-                        result["bengaliDescription"] = result.get("bengaliDescription", "") + f" {temperature}°C তাপমাত্রায়, বিক্রিয়াটি ত্বরান্বিত হয়।"
-                    elif reaction.get("reactionType") == "redox":
-                        result["animation"] = "smoke"
-                        result["description"] = result["description"] + f" At {temperature}°C, the redox reaction is intensified."
-                        result["bengaliDescription"] = result.get("bengaliDescription", "") + f" {temperature}°C তাপমাত্রায়, জারণ-বিজারণ বিক্রিয়াটি তীব্র হয়।"
-                    elif reaction.get("animation") == "precipitate":
-                        result["description"] = result["description"] + f" At {temperature}°C, the precipitation forms more quickly."
-                        result["bengaliDescription"] = result.get("bengaliDescription", "") + f" {temperature}°C তাপমাত্রায়, অধঃক্ষেপণ দ্রুত হয়।"
-                elif temperature < 10:
-
-                    result["description"] = result["description"] + f" At {temperature}°C, the reaction is slowed down."
-                    result["bengaliDescription"] = result.get("bengaliDescription", "") + f" {temperature}°C তাপমাত্রায়, বিক্রিয়াটি ধীর হয়।"
-
-                # Apply mixing speed effects
-                if mixing_speed > 75:
-                    if reaction.get("animation") == "precipitate":
-                        result["description"] = result["description"] + f" With vigorous mixing at {mixing_speed}% speed, the precipitation is more uniform."
-                        result["bengaliDescription"] = result.get("bengaliDescription", "") + f" {mixing_speed}% গতিতে তীব্র মিশ্রণে, অধঃক্ষেপণ আরও সমান হয়।"
-                    elif reaction.get("animation") == "bubble":
-                        result["description"] = result["description"] + f" With vigorous mixing at {mixing_speed}% speed, bubbling is more intense."
-                        result["bengaliDescription"] = result.get("bengaliDescription", "") + f" {mixing_speed}% গতিতে তীব্র মিশ্রণে, বাবল উৎপাদন আরও তীব্র হয়।"
-
-                # Check for additional actions (for backward compatibility)
-                if "heat" in action_list:
-                    # Legacy heating action support
-                    if result.get("animation") != "smoke" and reaction.get("reactionType") == "acid-carbonate":
-                        result["animation"] = "bubble"
-
-                if "shake" in action_list:
-                    # Legacy shaking action support
-                    if reaction.get("animation") == "precipitate":
-                        result["description"] = result["description"] + " Shaking accelerates the precipitation."
-                        result["bengaliDescription"] = result.get("bengaliDescription", "") + " ঝাঁকুনি অধঃক্ষেপণ প্রক্রিয়াকে ত্বরান্বিত করে।"
-
-                return result
-
-        # No match found
-        return {
-            "id": f"{chem1}-{chem2}",
-            "reactant1": chem1,
-            "reactant2": chem2,
-            "product": "No Reaction",
-            "description": "The selected chemicals do not react or their reaction is unknown.",
-            "bengaliDescription": "নির্বাচিত রাসায়নিকগুলি এক অপরের সাথে বিক্রিয়া করে না বা তাদের বিক্রিয়া অজানা।",
-            "animation": "none",
-            "color": "#f8f9fa",
-            "reactionType": "none",
-            "hazards": "None"
-        }
+        return FastJSONResponse(reaction_engine.react(chem1, chem2, temperature, mixing_speed, parse_actions(actions)))
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"Error getting reaction: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Failed to get reaction: {str(e)}")
 
+# Model for one entry of a batch reaction request
+class ReactionQuery(BaseModel):
+    chem1: str
+    chem2: str
+    temperature: float = 25.0
+    mixing_speed: float = 50.0
+    actions: Optional[str] = None
+
+class ReactionBatchRequest(BaseModel):
+    reactions: List[ReactionQuery]
+
+# Upper bound on the pairs resolved by one batch request
+MAX_REACTION_BATCH = 1000
+
+@app.post("/api/chemistry/react/batch")
+async def perform_reactions(request: ReactionBatchRequest):
+    """Resolve many reactions at once; results are returned in request order"""
+    try:
+        if len(request.reactions) > MAX_REACTION_BATCH:
+            raise HTTPException(
+                status_code=400,
+                detail=f"At most {MAX_REACTION_BATCH} reactions can be requested at once"
+            )
+
+        reaction_engine = get_reaction_engine()
+        if reaction_engine is None:
+            raise HTTPException(status_code=404, detail="Reactions data not found")
+
+        return FastJSONResponse({
+            "results": [
+                reaction_engine.react(
+                    query.chem1, query.chem2, query.temperature, query.mixing_speed, parse_actions(query.actions)
+                )
+                for query in request.reactions
+            ]
+        })
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"Error getting reactions: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Failed to get reactions: {str(e)}")
+
+@app.get("/api/chemistry/reactions/matrix")
+async def get_reaction_matrix(request: Request):
+    """Reaction id (or "none") for every pair of chemicals, for caching on the client"""
+    try:
+        body = reaction_matrix_body()
+        if body is None:
+            raise HTTPException(status_code=404, detail="Chemistry data not found")
+
+        return body.respond(request, CONTENT_CACHE_CONTROL)
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"Error getting reaction matrix: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Failed to get reaction matrix: {str(e)}")
+
 @app.get("/api/chemistry/reactions-by-type")
 async def get_reactions_by_type(type: str = Query(...)):
     """Get reactions filtered by a specific reaction type"""
     try:
-        file_path = "data/experiments/reactions.json"
-        if not os.path.exists(file_path):
+        reaction_index = get_reaction_index()
+        if reaction_index is None:
             raise HTTPException(status_code=404, detail="Reactions data not found")
 
-        with open(file_path, "r", encoding="utf-8") as f:
-            reactions_data = json.load(f)
-
-        filtered_reactions = [
-            reaction for reaction in reactions_data.get("reactions", [])
-            if reaction.get("reactionType") == type
-        ]
-
-        return {"reactions": filtered_reactions}
+        return FastJSONResponse({"reactions": reaction_index.of_type(type)})
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"Error getting reactions by type: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Failed to get reactions: {str(e)}")
 
+class LeasedFileResponse(FileResponse):
+    """FileResponse that releases its audio cache lease once sent or aborted"""
+
+    def __init__(self, key: str, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.lease_key = key
+
+    async def __call__(self, scope, receive, send):
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            audio_cache.release(self.lease_key)
+
+def audio_file_response(request: Request, key: str, path: str):
+    """Serve a cached audio file with validators derived from its cache key.
+
+    The caller must hold a lease on ``key``; the response releases it.
+    """
+    # The key is a hash of the text, so the content behind it never changes
+    headers = {
+        "ETag": f'"{key}"',
+        "Cache-Control": "public, max-age=31536000, immutable",
+        "Content-Location": f"/api/audio/files/{key}.mp3"
+    }
+    if etag_matches(request.headers.get("if-none-match"), headers["ETag"]):
+        audio_cache.release(key)
+        return Response(status_code=304, headers=headers)
+
+    return LeasedFileResponse(
+        key,
+        path,
+        media_type="audio/mpeg",
+        headers={**headers, "Content-Disposition": f"attachment; filename={key}.mp3"}
+    )
+
 @app.get("/api/audio")
-async def get_audio(text: str = Query(...)):
+async def get_audio(
+    request: Request,
+    text: str = Query(...),
+    lang: str = Query("bn"),
+    slow: bool = Query(False)
+):
     """Generate and return TTS audio for the given text"""
     try:
-        # Create a unique filename for this audio
-        filename = f"{uuid.uuid4()}.mp3"
-        filepath = os.path.join("data/audio", filename)
-
-        # Generate TTS audio
-        tts = gTTS(text=text, lang='bn', slow=False)
-        tts.save(filepath)
+        key, filepath = await tts_service.get_audio(text, lang, slow, lease=True)
 
         # Return the audio file
-        return FileResponse(
-            filepath,
-            media_type="audio/mpeg",
-            headers={"Content-Disposition": f"attachment; filename={filename}"}
+        return audio_file_response(request, key, filepath)
+    except TTSOverloaded as e:
+        raise HTTPException(
+            status_code=503,
+            detail="Audio generation is busy, please try again shortly",
+            headers={"Retry-After": str(e.retry_after)}
         )
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to generate audio: {str(e)}")
 
-# Add a convenience endpoint for the enhanced chemistry simulation
-@app.get("/api/experiments/chemistry")
-async def get_chemistry_data():
-    """Get all chemistry data (chemicals and reactions) in one request"""
+@app.get("/api/audio/stream")
+async def stream_audio(
+    text: str = Query(...),
+    lang: str = Query("bn"),
+    slow: bool = Query(False)
+):
+    """Stream TTS audio sentence by sentence so playback can start early"""
+    chunks = tts_service.stream_audio(text, lang, slow)
     try:
-        # Get chemicals
-        chemicals_path = "data/experiments/chemicals.json"
-        reactions_path = "data/experiments/reactions.json"
+        # Wait for the first sentence so overload and errors get a proper status
+        first_chunk = await chunks.__anext__()
+    except StopAsyncIteration:
+        raise HTTPException(status_code=400, detail="No text to synthesize")
+    except TTSOverloaded as e:
+        await chunks.aclose()
+        raise HTTPException(
+            status_code=503,
+            detail="Audio generation is busy, please try again shortly",
+            headers={"Retry-After": str(e.retry_after)}
+        )
+    except Exception as e:
+        await chunks.aclose()
+        raise HTTPException(status_code=500, detail=f"Failed to generate audio: {str(e)}")
 
-        if not os.path.exists(chemicals_path) or not os.path.exists(reactions_path):
-            raise HTTPException(status_code=404, detail="Chemistry data not found")
+    async def body():
+        yield first_chunk
+        async for chunk in chunks:
+            yield chunk
+
+    return StreamingResponse(
+        body(),
+        media_type="audio/mpeg",
+        headers={"Cache-Control": "public, max-age=86400"}
+    )
+
+@app.get("/api/narrations")
+async def get_narrations():
+    """Get the audio URLs of all pre-rendered narrations, keyed by address"""
+    manifest = narration_store.load(MANIFEST_NAME)
+    return FastJSONResponse({"entries": manifest.get("entries", {}) if manifest is not None else {}})
+
+@app.get("/api/audio/files/{key}.mp3")
+async def get_cached_audio(request: Request, key: str):
+    """Serve previously generated audio by its cache key"""
+    if not is_valid_key(key):
+        raise HTTPException(status_code=404, detail="Audio not found")
+    audio_cache.acquire(key)
+    filepath = audio_cache.get(key)
+    if filepath is None:
+        audio_cache.release(key)
+        raise HTTPException(status_code=404, detail="Audio not found")
+
+    return audio_file_response(request, key, filepath)
 
-        with open(chemicals_path, "r", encoding="utf-8") as f:
-            chemicals_data = json.load(f)
+# Add a convenience endpoint for the enhanced chemistry simulation
+@app.get("/api/experiments/chemistry")
+async def get_chemistry_data(
+    request: Request,
+    view: str = Query(None),
+    fields: str = Query(None),
+    limit: int = Query(None, ge=1, le=1000),
+    offset: int = Query(0, ge=0)
+):
+    """Get all chemistry data (chemicals and reactions) in one request.
 
-        with open(reactions_path, "r", encoding="utf-8") as f:
-            reactions_data = json.load(f)
+    ``view``, ``fields``, ``limit`` and ``offset`` apply to both lists.
+    """
+    try:
+        check_view(view)
+        args = (view, parse_fields(fields), limit, offset)
+        body = chemistry_listing_body(*args, build=False)
+        if body is None:
+            body = await asyncio.to_thread(chemistry_listing_body, *args)
+        if body is None:
+            raise HTTPException(status_code=404, detail="Chemistry data not found")
 
-        return {
-            "chemicals": chemicals_data.get("chemicals", []),
-            "reactions": reactions_data.get("reactions", [])
-        }
+        return body.respond(request, CONTENT_CACHE_CONTROL)
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"Error getting chemistry data: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Failed to get chemistry data: {str(e)}")
 
+@app.get("/api/experiments/chemistry/{item_id}")
+async def get_chemistry_item(request: Request, item_id: str):
+    """Get a single chemical or reaction by id"""
+    try:
+        body = snapshot_body(f"/api/experiments/chemistry/{item_id}")
+        if body is not None:
+            return body.respond(request, CONTENT_CACHE_CONTROL)
+
+        for name in ("chemicals", "reactions"):
+            entry = content_store.get(name)
+            index = get_collection_index(entry, name) if entry is not None else None
+            item = index.get(item_id) if index is not None else None
+            if item is not None:
+                return cached_json_response(request, (name, "detail", item_id, entry.version), lambda: item, item_cache)
+
+        raise HTTPException(status_code=404, detail=f"Chemistry item {item_id} not found")
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"Error getting chemistry item: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Failed to get chemistry item: {str(e)}")
+
 @app.get("/api/reactions")
 async def get_reaction(
     chem1: str = Query(...),
@@ -404,149 +1123,298 @@ async def get_reaction(
 ):
     """Get the reaction data for specific chemicals with temperature and mixing speed parameters"""
     try:
-        file_path = "data/experiments/reactions.json"
-        if not os.path.exists(file_path):
+        reaction_engine = get_reaction_engine()
+        if reaction_engine is None:
             raise HTTPException(status_code=404, detail="Reactions data not found")
 
-        with open(file_path, "r", encoding="utf-8") as f:
-            reactions_data = json.load(f)
-
-        # Search for matching reaction
-        for reaction in reactions_data.get("reactions", []):
-            if ((reaction["reactant1"] == chem1 and reaction["reactant2"] == chem2) or
-                (reaction["reactant1"] == chem2 and reaction["reactant2"] == chem1)):
-
-                # Enhance reaction based on parameters
-                result = reaction.copy()
-
-                # Apply temperature effects (simplified version of the logic in the more complex endpoint)
-                if temperature > 50:
-                    result["description"] = result["description"] + f" At {temperature}°C, the reaction is accelerated."
-                    result["bengaliDescription"] = result.get("bengaliDescription", "") + f" {temperature}°C তাপমাত্রায়, বিক্রিয়াটি ত্বরান্বিত হয়।"
-                elif temperature < 10:
-                    result["description"] = result["description"] + f" At {temperature}°C, the reaction is slowed down."
-                    result["bengaliDescription"] = result.get("bengaliDescription", "") + f" {temperature}°C তাপমাত্রায়, বিক্রিয়াটি ধীর হয়।"
-
-                # Apply mixing speed effects (simplified)
-                if mixing_speed > 75:
-                    result["description"] = result["description"] + f" With vigorous mixing at {mixing_speed}% speed, the reaction is more uniform."
-                    result["bengaliDescription"] = result.get("bengaliDescription", "") + f" {mixing_speed}% গতিতে তীব্র মিশ্রণে, বিক্রিয়াটি আরও সমান হয়।"
-
-                return result
-
-        # No match found
-        return {
-            "id": f"{chem1}-{chem2}",
-            "reactant1": chem1,
-            "reactant2": chem2,
-            "product": "No Reaction",
-            "description": "The selected chemicals do not react or their reaction is unknown.",
-            "bengaliDescription": "নির্বাচিত রাসায়নিকগুলি এক অপরের সাথে বিক্রিয়া করে না বা তাদের বিক্রিয়া অজানা।",
-            "animation": "none",
-            "color": "#f8f9fa",
-            "reactionType": "none",
-            "hazards": "None"
-        }
-
+        return FastJSONResponse(reaction_engine.react(chem1, chem2, temperature, mixing_speed))
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"Error getting reaction: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Failed to get reaction: {str(e)}")
 
+@app.get("/api/search")
+async def search_content(
+    q: str = Query(..., max_length=200),
+    source: str = Query(None),
+    limit: int = Query(20, ge=1, le=100)
+):
+    """Search experiments, chemicals and reactions in Bengali or English.
+
+    Results are ranked by relevance and carry the summary fields of each
+    item, its ``source`` and the ``url`` of its detail endpoint. ``source``
+    limits them to physics, biology, chemicals or reactions.
+    """
+    try:
+        if source is not None and source not in SEARCH_SOURCES:
+            raise HTTPException(status_code=400, detail=f"source must be one of: {', '.join(SEARCH_SOURCES)}")
+
+        current = search_index
+        # Built by the warm-up and rebuilt in the background after content changes
+        index = current[1] if current is not None else await asyncio.to_thread(update_search_index)
+        return FastJSONResponse({"query": q, **index.search(q, source, limit)})
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"Error searching: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Failed to search: {str(e)}")
+
 @app.get("/api/experiments/physics")
-async def get_physics_data():
+async def get_physics_data(
+    request: Request,
+    category: str = Query(None),
+    view: str = Query(None),
+    fields: str = Query(None),
+    limit: int = Query(None, ge=1, le=1000),
+    offset: int = Query(0, ge=0)
+):
     """Get all physics experiments data"""
     try:
-        physics_path = "data/experiments/physics.json"
-
-        if not os.path.exists(physics_path):
-            # Use the default creation function already defined in the file
-            create_default_data("physics")
-
-        with open(physics_path, "r", encoding="utf-8") as f:
-            physics_data = json.load(f)
-
-        return physics_data
+        return await experiment_listing_response(request, "physics", category, view, fields, limit, offset)
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"Error getting physics data: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Failed to get physics data: {str(e)}")
 
-@app.get("/api/experiments/biology")
-async def get_biology_data(category: str = Query(None)):
-    """Get all biology experiments data, optionally filtered by category"""
+@app.get("/api/experiments/physics/{experiment_id}")
+async def get_physics_experiment(request: Request, experiment_id: str):
+    """Get a single physics experiment by id"""
     try:
-        biology_path = "data/experiments/biology.json"
+        return experiment_detail_response(request, "physics", experiment_id)
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"Error getting physics experiment: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Failed to get physics experiment: {str(e)}")
+
+# Query parameters of the simulation endpoint that are not experiment parameters
+SIMULATION_OPTIONS = ("model", "points", "format")
+
+@app.get("/api/physics/simulate/{sim_type}")
+async def simulate_physics(
+    request: Request,
+    sim_type: str,
+    model: str = Query(None),
+    points: int = Query(DEFAULT_POINTS),
+    format: str = Query("base64")
+):
+    """Compute a trajectory for a physics experiment.
 
-        if not os.path.exists(biology_path):
-            # Use the default creation function already defined in the file
-            create_default_data("biology")
+    Experiment parameters are passed as query values (e.g. ``angle=45``) and
+    are checked against the bounds in physics.json. ``format`` is ``base64``
+    (float32 columns in JSON), ``json`` (plain number lists) or ``binary``
+    (the float32 columns back to back).
+    """
+    try:
+        if format not in ("base64", "json", "binary"):
+            raise HTTPException(status_code=400, detail="format must be 'base64', 'json' or 'binary'")
+
+        entry = get_experiment_entry("physics")
+        experiment_params = entry.derive("simulation_params", simulation_params).get(sim_type)
+        if experiment_params is None:
+            raise HTTPException(status_code=404, detail=f"No simulation for type {sim_type}")
+
+        values = {name: value for name, value in request.query_params.items() if name not in SIMULATION_OPTIONS}
+        try:
+            params = validate_params(parameter_schema(sim_type, experiment_params), values)
+            trajectory = simulate(sim_type, params, model, points)
+        except SimulationError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+        if format == "binary":
+            return Response(
+                content=trajectory.to_bytes(),
+                media_type="application/octet-stream",
+                headers={
+                    "Cache-Control": CONTENT_CACHE_CONTROL,
+                    "X-Columns": ",".join(trajectory.columns),
+                    "X-Points": str(trajectory.points),
+                    "X-Time-Step": repr(trajectory.dt),
+                },
+            )
 
-        with open(biology_path, "r", encoding="utf-8") as f:
-            biology_data = json.load(f)
+        def build():
+            return {"type": sim_type, "params": dict(params), **trajectory.encode(format)}
 
-        # If a category is specified, filter the experiments
-        if category:
-            # Filter experiments by their category field
-            filtered_experiments = [
-                exp for exp in biology_data["experiments"]
-                if "category" in exp and exp["category"] == category
-            ]
-            biology_data["experiments"] = filtered_experiments
+        key = ("simulation", sim_type, params, model, points, format, entry.version)
+        return cached_json_response(request, key, build, simulation_cache)
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"Error simulating {sim_type}: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Failed to run simulation: {str(e)}")
+
+# Query parameters of the sweep endpoint that are not experiment parameters
+SWEEP_OPTIONS = ("vary", "model", "format", "trajectories", "points")
+
+@app.get("/api/physics/sweep/{sim_type}")
+async def sweep_physics(
+    request: Request,
+    sim_type: str,
+    vary: str = Query(...),
+    model: str = Query(None),
+    format: str = Query("base64"),
+    trajectories: bool = Query(False),
+    points: int = Query(50)
+):
+    """Summary metrics of a simulation over a grid of parameter values.
+
+    ``vary`` names up to three parameters to sweep. By default each one runs
+    over its full range at its step from physics.json; ``angle=10:80:5``
+    narrows the range and coarsens the step. Other parameters are fixed at
+    their query value or default. Metrics are row-major arrays over the
+    grid; ``trajectories=true`` also returns one trajectory per combination
+    for small sweeps.
+    """
+    try:
+        if format not in ("base64", "json"):
+            raise HTTPException(status_code=400, detail="format must be 'base64' or 'json'")
+
+        entry = get_experiment_entry("physics")
+        experiment_params = entry.derive("simulation_params", simulation_params).get(sim_type)
+        if experiment_params is None:
+            raise HTTPException(status_code=404, detail=f"No simulation for type {sim_type}")
+
+        values = {name: value for name, value in request.query_params.items() if name not in SWEEP_OPTIONS}
+        try:
+            model = check_model(sim_type, model)
+            fixed, axes = parse_sweep(parameter_schema(sim_type, experiment_params), values, vary)
+        except SimulationError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+        def build():
+            try:
+                result = sweep(sim_type, model, fixed, axes)
+                paths = sweep_trajectories(sim_type, model, fixed, axes, points) if trajectories else None
+            except SimulationError as e:
+                raise HTTPException(status_code=400, detail=str(e))
+            payload = {"type": sim_type, "model": model, "params": dict(fixed), **result.encode(format)}
+            if paths is not None:
+                payload["trajectories"] = [path.encode(format) for path in paths]
+            return payload
+
+        key = ("sweep", sim_type, model, fixed, axes, format, points if trajectories else None, entry.version)
+        body = sweep_cache.get(key)
+        if body is None:
+            # Trajectories integrate for seconds; keep other requests going meanwhile
+            body = await asyncio.to_thread(sweep_cache.get_or_build, key, build)
+        return body.respond(request, CONTENT_CACHE_CONTROL)
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"Error sweeping {sim_type}: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Failed to run sweep: {str(e)}")
+
+# Models for circuit solve requests
+class CircuitComponent(BaseModel):
+    id: Optional[str] = None
+    type: str
+    nodes: List[str]
+    voltage: Optional[float] = None
+    resistance: Optional[float] = None
+    internalResistance: Optional[float] = None
+    forwardVoltage: Optional[float] = None
+    closed: Optional[bool] = None
+
+class CircuitSolveRequest(BaseModel):
+    components: List[CircuitComponent]
+    ground: Optional[str] = None
+
+def component_fields(component: CircuitComponent) -> Dict[str, Any]:
+    # model_dump is pydantic 2; pydantic 1 only has dict()
+    dump = getattr(component, "model_dump", None) or component.dict
+    return dump(exclude_none=True)
+
+@app.post("/api/physics/circuit/solve")
+async def solve_circuit(request: CircuitSolveRequest):
+    """Solve node voltages and component currents of a DC circuit.
+
+    Each component connects two named nodes; batteries list their positive
+    terminal first. Currents flow from the first node to the second, except
+    for batteries, whose current is what they deliver from the positive
+    terminal.
+    """
+    try:
+        components = [component_fields(component) for component in request.components]
+        try:
+            # Up to circuit.MAX_COMPONENTS nodes: solve off the event loop
+            result = await asyncio.to_thread(circuit_solver.solve, components, request.ground)
+            return FastJSONResponse(result)
+        except CircuitError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"Error solving circuit: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Failed to solve circuit: {str(e)}")
 
-        return biology_data
+@app.get("/api/experiments/biology")
+async def get_biology_data(
+    request: Request,
+    category: str = Query(None),
+    view: str = Query(None),
+    fields: str = Query(None),
+    limit: int = Query(None, ge=1, le=1000),
+    offset: int = Query(0, ge=0)
+):
+    """Get all biology experiments data, optionally filtered by category.
+
+    ``view=summary`` returns only id, title, description and category;
+    ``fields`` selects specific fields; ``limit`` and ``offset`` page the list.
+    """
+    try:
+        return await experiment_listing_response(request, "biology", category, view, fields, limit, offset)
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"Error getting biology data: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Failed to get biology data: {str(e)}")
 
+@app.get("/api/experiments/biology/{experiment_id}")
+async def get_biology_experiment(request: Request, experiment_id: str):
+    """Get a single biology experiment by id"""
+    try:
+        return experiment_detail_response(request, "biology", experiment_id)
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"Error getting biology experiment: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Failed to get biology experiment: {str(e)}")
+
 @app.get("/api/svg/{filename}")
-async def get_svg_file(filename: str):
+async def get_svg_file(request: Request, filename: str):
     """
     Serve SVG files for physics simulations and other visualizations
     """
     try:
-        svg_path = f"app/svg/{filename}"
-        if not os.path.exists(svg_path):
+        asset = svg_assets.lookup(filename)
+        if asset is None:
             raise HTTPException(status_code=404, detail=f"SVG file {filename} not found")
 
         # Return the SVG file with proper content type
-        return FileResponse(
-            svg_path,
-            media_type="image/svg+xml"
-        )
+        return svg_assets.respond(request, asset)
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"Error retrieving SVG file: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Failed to retrieve SVG: {str(e)}")
 
 @app.get("/api/models/{filename}")
-async def get_model_file(filename: str):
+async def get_model_file(request: Request, filename: str):
     """
-    Serve 3D model files (glb, gltf) for biology and other 3D simulations
+    Serve 3D model files (glb, gltf) for biology and other 3D simulations.
+    Supports Range requests so interrupted downloads can be resumed.
     """
     try:
-        model_path = f"app/webmodel/{filename}"
-        if not os.path.exists(model_path):
+        asset = model_assets.lookup(filename)
+        if asset is None:
             raise HTTPException(status_code=404, detail=f"Model file {filename} not found")
 
-        # Get file size for logging
-        file_size = os.path.getsize(model_path) / (1024 * 1024)  # Size in MB
-        print(f"Serving model file {filename}, size: {file_size:.2f} MB")
-
-        # Determine content type
-        content_type = "model/gltf-binary" if filename.endswith('.glb') else "model/gltf+json"
-
-        # Add caching headers for better performance and CORS headers
-        headers = {
-            "Cache-Control": "public, max-age=604800",  # Cache for 1 week
-            "Access-Control-Allow-Origin": "*",  # Allow CORS
-            "Access-Control-Allow-Methods": "GET, OPTIONS",
-            "Access-Control-Allow-Headers": "Content-Type"
-        }
-
-        # Return the file with appropriate headers
-        return FileResponse(
-            model_path,
-            media_type=content_type,
-            headers=headers
-        )
+        return model_assets.respond(request, asset)
+    except HTTPException:
+        raise
     except Exception as e:
         error_message = f"Error retrieving model file {filename}: {str(e)}"
         print(error_message)
@@ -0,0 +1,226 @@
+"""
+Request metrics in the Prometheus text format, plus an opt-in profiler.
+
+MetricsMiddleware records, per route template, request counts by status,
+latency and response size histograms, and the number of requests in
+flight. Other parts of the app register collectors that turn their own
+counters (caches, the TTS queue) into metric families when /api/metrics
+is scraped, so nothing is counted twice.
+
+RequestProfiler runs cProfile around sampled requests and prints the top
+frames of those that turn out slow. cProfile sees everything that runs on
+the event loop thread while the request is active, including other
+requests' code, so profile under representative but not overlapping load
+when precision matters.
+"""
+import bisect
+import cProfile
+import io
+import pstats
+import random
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+# (labels, value) pairs of one metric family
+Samples = List[Tuple[Mapping[str, Any], float]]
+# (name, type, help, samples)
+Family = Tuple[str, str, str, Samples]
+
+
+def _escape(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(labels: Mapping[str, Any]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in labels.items()) + "}"
+
+
+def _number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def family(name: str, kind: str, help_text: str, samples: Any) -> Family:
+    """A metric family; ``samples`` is a single value or a list of ``(labels, value)``"""
+    if isinstance(samples, (int, float)):
+        samples = [({}, samples)]
+    return name, kind, help_text, samples
+
+
+def by_label(label: str, values: Mapping[str, float]) -> Samples:
+    """Samples for ``{label value: value}``, all under one label name"""
+    return [({label: key}, value) for key, value in values.items()]
+
+
+class Histogram:
+    """Cumulative-bucket histogram, as Prometheus expects it"""
+
+    def __init__(self, buckets: Sequence[float]):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def samples(self, name: str, labels: Mapping[str, Any]) -> List[Tuple[str, Mapping[str, Any], float]]:
+        rows = []
+        cumulative = 0
+        for bound, count in zip((*self.buckets, float("inf")), self.counts):
+            cumulative += count
+            rows.append((f"{name}_bucket", {**labels, "le": _number(bound)}, cumulative))
+        rows.append((f"{name}_sum", labels, self.sum))
+        rows.append((f"{name}_count", labels, self.count))
+        return rows
+
+
+class Metrics:
+    """Registry of request metrics and collectors"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests: Dict[Tuple[str, str, int], int] = {}
+        self.latency: Dict[Tuple[str, str], Histogram] = {}
+        self.sizes: Dict[Tuple[str, str], Histogram] = {}
+        self.in_flight = 0
+        self._collectors: List[Callable[[], Iterable[Family]]] = []
+
+    def register(self, collector: Callable[[], Iterable[Family]]):
+        """Add a function returning metric families, called on every scrape"""
+        self._collectors.append(collector)
+
+    def observe(self, method: str, route: str, status: int, seconds: float, size: int):
+        with self._lock:
+            key = (method, route)
+            self.requests[(method, route, status)] = self.requests.get((method, route, status), 0) + 1
+            self.latency.setdefault(key, Histogram(LATENCY_BUCKETS)).observe(seconds)
+            self.sizes.setdefault(key, Histogram(SIZE_BUCKETS)).observe(size)
+
+    def families(self) -> List[Family]:
+        with self._lock:
+            families = [
+                family("http_requests_total", "counter", "HTTP requests by route and status", [
+                    ({"method": method, "route": route, "status": status}, count)
+                    for (method, route, status), count in sorted(self.requests.items())
+                ]),
+                family("http_requests_in_flight", "gauge", "HTTP requests being handled", self.in_flight),
+            ]
+            histograms = [
+                ("http_request_duration_seconds", "Time until the last response byte was sent", self.latency),
+                ("http_response_size_bytes", "Response body size as sent", self.sizes),
+            ]
+            for name, help_text, by_route in histograms:
+                rows = []
+                for (method, route), histogram in sorted(by_route.items()):
+                    rows.extend(histogram.samples(name, {"method": method, "route": route}))
+                families.append((name, "histogram", help_text, rows))
+
+        for collector in self._collectors:
+            try:
+                families.extend(collector())
+            except Exception as e:
+                print(f"Error collecting metrics: {str(e)}")
+        return families
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format"""
+        lines = []
+        for name, kind, help_text, samples in self.families():
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for sample in samples:
+                # Histograms carry their own sample names
+                sample_name, labels, value = sample if len(sample) == 3 else (name, *sample)
+                lines.append(f"{sample_name}{_labels(labels)} {_number(value)}")
+        return "\n".join(lines) + "\n"
+
+
+class RequestProfiler:
+    """Profiles a sample of requests with cProfile and prints slow ones"""
+
+    def __init__(self, sample_rate: float = 0.0, allow_header: bool = False, slow_seconds: float = 0.5,
+                 top: int = 25):
+        self.sample_rate = sample_rate
+        self.allow_header = allow_header
+        self.slow_seconds = slow_seconds
+        self.top = top
+        self._active = False
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.sample_rate > 0 or self.allow_header
+
+    def start(self, scope) -> Optional[Tuple[cProfile.Profile, bool]]:
+        """Begin profiling this request if it is sampled. Returns ``(profile, forced)``."""
+        forced = self.allow_header and any(name == b"x-profile" for name, _ in scope.get("headers", ()))
+        if not forced and random.random() >= self.sample_rate:
+            return None
+        with self._lock:
+            # Only one profiler can be attached to the thread at a time
+            if self._active:
+                return None
+            self._active = True
+        profile = cProfile.Profile()
+        profile.enable()
+        return profile, forced
+
+    def finish(self, started, label: str, seconds: float):
+        profile, forced = started
+        profile.disable()
+        with self._lock:
+            self._active = False
+        if forced or seconds >= self.slow_seconds:
+            out = io.StringIO()
+            pstats.Stats(profile, stream=out).sort_stats("cumulative").print_stats(self.top)
+            print(f"Profile of {label} ({seconds * 1000:.1f} ms):\n{out.getvalue()}")
+
+
+class MetricsMiddleware:
+    """ASGI middleware feeding Metrics and, if enabled, RequestProfiler"""
+
+    def __init__(self, app, metrics: Metrics, profiler: Optional[RequestProfiler] = None):
+        self.app = app
+        self.metrics = metrics
+        self.profiler = profiler if profiler is not None and profiler.enabled else None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+        size = 0
+
+        async def send_wrapper(message):
+            nonlocal status, size
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            await send(message)
+
+        started = time.perf_counter()
+        profile = self.profiler.start(scope) if self.profiler is not None else None
+        self.metrics.in_flight += 1
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            self.metrics.in_flight -= 1
+            elapsed = time.perf_counter() - started
+            # The router stores the matched route in the scope; label by its
+            # template so ids in paths do not create new series
+            route = getattr(scope.get("route"), "path", None) or "unmatched"
+            self.metrics.observe(scope["method"], route, status, elapsed, size)
+            if profile is not None:
+                self.profiler.finish(profile, f"{scope['method']} {scope['path']}", elapsed)
@@ -0,0 +1,149 @@
+"""
+Pre-rendering of narration audio for all experiment content.
+
+Every narratable string in the experiment files is known ahead of time, so
+its audio can be synthesized before a student first presses play. The
+pipeline walks the content, synthesizes text that is not in the audio
+cache yet and writes a manifest mapping each string's address (category,
+the ids leading to it and the field name) to its audio URL. Because the
+audio cache is keyed on the text itself, unchanged text is never
+re-rendered.
+
+Run it from the backend directory with::
+
+    python narrations.py [--backend stub] [--concurrency N]
+"""
+import argparse
+import asyncio
+import json
+import os
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from audio_cache import audio_key
+from tts import TTSOverloaded
+
+MANIFEST_NAME = "narrations"
+
+# Fields that are read aloud, per content file
+NARRATED_FIELDS = {
+    "physics": ("narration", "description"),
+    "biology": ("narration", "description"),
+    "chemistry": ("narration", "description"),
+    "reactions": ("bengaliDescription",),
+}
+
+
+def _walk(value: Any, fields: Tuple[str, ...], path: List[str], found: Dict[str, str]):
+    if isinstance(value, dict):
+        item_id = value.get("id")
+        if isinstance(item_id, str):
+            path = path + [item_id]
+        for field in fields:
+            text = value.get(field)
+            if isinstance(text, str) and text.strip():
+                found["/".join(path + [field])] = text
+        for child in value.values():
+            if isinstance(child, (dict, list, tuple)):
+                _walk(child, fields, path, found)
+    elif isinstance(value, (list, tuple)):
+        for child in value:
+            _walk(child, fields, path, found)
+
+
+def extract_narrations(content_store, categories: Optional[Iterable[str]] = None) -> Dict[str, str]:
+    """Map ``category/id/.../field`` addresses to the text read aloud there"""
+    found: Dict[str, str] = {}
+    for category in categories or NARRATED_FIELDS:
+        data = content_store.load(category)
+        if data is not None:
+            _walk(data, NARRATED_FIELDS[category], [category], found)
+    return found
+
+
+async def prerender(content_store, tts_service, manifest_path: str, concurrency: Optional[int] = None,
+                    lang: str = "bn") -> Dict[str, Any]:
+    """Synthesize missing narrations and write the manifest. Returns a report."""
+    started = time.perf_counter()
+    narrations = extract_narrations(content_store)
+
+    # Many addresses share the same text; synthesize each text once
+    texts: Dict[str, str] = {}
+    for text in narrations.values():
+        texts.setdefault(audio_key(text, lang), text)
+
+    missing = [key for key in texts if tts_service.cache.get(key) is None]
+    semaphore = asyncio.Semaphore(concurrency or tts_service.max_workers)
+    failed: Dict[str, str] = {}
+
+    async def render(key: str):
+        async with semaphore:
+            while True:
+                try:
+                    await tts_service.get_audio(texts[key], lang)
+                    return
+                except TTSOverloaded as e:
+                    await asyncio.sleep(e.retry_after)
+                except Exception as e:
+                    failed[key] = str(e)
+                    return
+
+    await asyncio.gather(*(render(key) for key in missing))
+
+    entries = {}
+    for address, text in sorted(narrations.items()):
+        key = audio_key(text, lang)
+        if key not in failed:
+            entries[address] = {"key": key, "url": f"/api/audio/files/{key}.mp3"}
+
+    manifest = {"generated_at": time.time(), "lang": lang, "entries": entries}
+    tmp_path = f"{manifest_path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, manifest_path)
+    tts_service.cache.flush()
+
+    return {
+        "narrations": len(narrations),
+        "unique_texts": len(texts),
+        "rendered": len(missing) - len(failed),
+        "reused": len(texts) - len(missing),
+        "failed": len(failed),
+        "seconds": round(time.perf_counter() - started, 3),
+    }
+
+
+def category_audio_urls(manifest: Any, category: str) -> Dict[str, str]:
+    """Audio URLs for one category, keyed by address without the category prefix"""
+    prefix = f"{category}/"
+    return {
+        address[len(prefix):]: entry["url"]
+        for address, entry in (manifest or {}).get("entries", {}).items()
+        if address.startswith(prefix)
+    }
+
+
+def run_cli():
+    parser = argparse.ArgumentParser(description="Pre-render narration audio for all experiments")
+    parser.add_argument("--backend", help="TTS backend to use (gtts or stub); defaults to TTS_BACKEND")
+    parser.add_argument("--concurrency", type=int, default=None, help="Parallel syntheses (default: TTS_MAX_WORKERS)")
+    args = parser.parse_args()
+
+    if args.backend:
+        os.environ["TTS_BACKEND"] = args.backend
+
+    # Reuse the server's configuration for paths, cache limits and the TTS pool
+    import main
+
+    report = asyncio.run(prerender(
+        main.content_store,
+        main.tts_service,
+        main.narration_store.path_for(MANIFEST_NAME),
+        concurrency=args.concurrency
+    ))
+    main.tts_service.shutdown()
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    run_cli()
@@ -0,0 +1,301 @@
+"""
+Server-side trajectories for the physics experiments.
+
+Each simulation samples its motion at a fixed time step with NumPy and
+returns decimated float32 columns, so slow devices only have to draw the
+points instead of integrating the equations themselves. Parameters are
+validated against the min/max/step bounds in physics.json.
+
+- projectile: closed-form path, optionally with linear air drag
+- pendulum: nonlinear pendulum integrated with RK4
+- newton: cart pushed by a constant force, slowed by friction in
+  proportion to its speed as in the experiment's own animation
+"""
+import base64
+import math
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Callable, Dict, Iterable, Mapping, Optional, Tuple
+
+import numpy as np
+
+GRAVITY = 9.81
+
+# Velocity lost per second per unit of the newton experiment's friction
+# parameter: the experiment's animation damps it by 0.1% per frame at 60 fps
+FRICTION_DAMPING = 0.06
+
+# Samples computed per simulation before decimation
+MAX_STEPS = 20000
+
+DEFAULT_POINTS = 200
+MAX_POINTS = 2000
+
+# Parameters some engines accept although physics.json does not list them
+ENGINE_PARAMS = {
+    "pendulum": {
+        "gravity": {"min": 1, "max": 20, "default": GRAVITY, "step": 0.01},
+        "duration": {"min": 1, "max": 60, "default": 10, "step": 1},
+    },
+    "newton": {
+        "duration": {"min": 1, "max": 60, "default": 10, "step": 1},
+    },
+}
+
+MODELS = {
+    "projectile": ("ideal", "drag"),
+    "pendulum": ("rk4",),
+    "newton": ("friction",),
+}
+
+
+class SimulationError(ValueError):
+    """Raised for unknown simulations or parameters outside their bounds"""
+
+
+@dataclass(frozen=True)
+class Trajectory:
+    """Decimated samples of one simulation run"""
+    dt: float
+    columns: Tuple[str, ...]
+    data: Tuple[np.ndarray, ...]
+    summary: Tuple[Tuple[str, float], ...]
+
+    @property
+    def points(self) -> int:
+        return len(self.data[0])
+
+    def to_bytes(self) -> bytes:
+        """All columns as little-endian float32, one column after another"""
+        return b"".join(column.astype("<f4").tobytes() for column in self.data)
+
+    def encode(self, encoding: str) -> Dict[str, Any]:
+        label, columns = encode_arrays(zip(self.columns, self.data), encoding)
+        return {
+            "dt": self.dt,
+            "points": self.points,
+            "encoding": label,
+            "columns": list(self.columns),
+            "data": columns,
+            "summary": dict(self.summary),
+        }
+
+
+def encode_arrays(arrays: Iterable[Tuple[str, np.ndarray]], encoding: str) -> Tuple[str, Dict[str, Any]]:
+    """Named arrays as JSON lists or base64 little-endian float32 for a response"""
+    if encoding == "json":
+        return "json", {name: values.tolist() for name, values in arrays}
+    return "float32-base64", {
+        name: base64.b64encode(values.astype("<f4").tobytes()).decode("ascii") for name, values in arrays
+    }
+
+
+def _on_step(value: float, bounds: Mapping[str, Any]) -> bool:
+    step = bounds.get("step")
+    if not step:
+        return True
+    steps = (value - bounds.get("min", 0)) / step
+    return abs(steps - round(steps)) < 1e-6
+
+
+def check_value(name: str, raw: Any, bounds: Mapping[str, Any]) -> float:
+    """Parse one parameter value and check it against its bounds"""
+    try:
+        value = float(raw)
+    except (TypeError, ValueError):
+        raise SimulationError(f"Parameter {name} must be a number")
+    if not math.isfinite(value):
+        raise SimulationError(f"Parameter {name} must be a number")
+    if "min" in bounds and value < bounds["min"] or "max" in bounds and value > bounds["max"]:
+        raise SimulationError(f"Parameter {name} must be between {bounds.get('min')} and {bounds.get('max')}")
+    if not _on_step(value, bounds):
+        raise SimulationError(f"Parameter {name} must be a multiple of {bounds['step']} from {bounds.get('min', 0)}")
+    return value
+
+
+def validate_params(schema: Mapping[str, Any], values: Mapping[str, str]) -> Tuple[Tuple[str, float], ...]:
+    """Check query values against their bounds, filling in defaults.
+
+    Returns the parameters as a sorted tuple so results can be cached on it.
+    """
+    unknown = set(values) - set(schema)
+    if unknown:
+        raise SimulationError(f"Unknown parameters: {', '.join(sorted(unknown))}")
+
+    params = {}
+    for name, bounds in schema.items():
+        raw = values.get(name)
+        if raw is None:
+            params[name] = float(bounds.get("default", bounds.get("min", 0)))
+        else:
+            params[name] = check_value(name, raw, bounds)
+    return tuple(sorted(params.items()))
+
+
+def parameter_schema(sim_type: str, experiment_params: Mapping[str, Any]) -> Dict[str, Any]:
+    """Bounds for a simulation: the experiment's params plus engine extras"""
+    return {**experiment_params, **ENGINE_PARAMS.get(sim_type, {})}
+
+
+def simulation_params(physics_data: Mapping[str, Any]) -> Dict[str, Mapping[str, Any]]:
+    """Parameter bounds of the first experiment of each simulated type"""
+    params: Dict[str, Mapping[str, Any]] = {}
+    for experiment in physics_data.get("experiments", ()):
+        if experiment.get("type") in SIMULATIONS:
+            params.setdefault(experiment["type"], experiment.get("params", {}))
+    return params
+
+
+def _decimate(points: int, *columns: np.ndarray) -> Tuple[np.ndarray, ...]:
+    if len(columns[0]) <= points:
+        return columns
+    indices = np.linspace(0, len(columns[0]) - 1, points).round().astype(np.intp)
+    return tuple(column[indices] for column in columns)
+
+
+def _time_step(duration: float) -> Tuple[float, np.ndarray]:
+    steps = max(2, min(MAX_STEPS, int(math.ceil(duration / 0.005)) + 1))
+    t = np.linspace(0.0, duration, steps)
+    return float(t[1] - t[0]), t
+
+
+def simulate_projectile(params: Dict[str, float], model: str, points: int) -> Trajectory:
+    angle = math.radians(params.get("angle", 45))
+    velocity = params.get("velocity", 20)
+    mass = params.get("mass", 1)
+    vx, vy = velocity * math.cos(angle), velocity * math.sin(angle)
+    flight_time = 2 * vy / GRAVITY
+
+    # Linear drag coefficient k (kg/s); the path has a closed form
+    k = params.get("friction", 0) if model == "drag" else 0
+    if k > 0:
+        rate = k / mass
+        terminal = GRAVITY / rate
+
+        def path(t):
+            decay = -np.expm1(-rate * t)
+            return vx / rate * decay, (vy + terminal) / rate * decay - terminal * t
+
+        # Flight time is at most the drag-free one; find the landing by bisection
+        low, high = 0.0, max(flight_time, 1e-9)
+        for _ in range(60):
+            mid = (low + high) / 2
+            if path(np.float64(mid))[1] > 0:
+                low = mid
+            else:
+                high = mid
+        flight_time = low if flight_time > 0 else 0.0
+    else:
+        def path(t):
+            return vx * t, vy * t - 0.5 * GRAVITY * t * t
+
+    dt, t = _time_step(flight_time)
+    x, y = path(t)
+    y = np.maximum(y, 0.0)
+    t, x, y = _decimate(points, t, x, y)
+    return Trajectory(
+        dt=float(dt),
+        columns=("t", "x", "y"),
+        data=(t, x, y),
+        summary=(
+            ("flightTime", float(flight_time)),
+            ("range", float(x[-1])),
+            ("maxHeight", float(y.max())),
+        ),
+    )
+
+
+def simulate_pendulum(params: Dict[str, float], model: str, points: int) -> Trajectory:
+    length = params.get("length", 1)
+    gravity = params.get("gravity", GRAVITY)
+    duration = params.get("duration", 10)
+    dt, t = _time_step(duration)
+    omega0 = gravity / length
+
+    def derivative(theta, omega):
+        return omega, -omega0 * math.sin(theta)
+
+    theta = np.empty_like(t)
+    omega = np.empty_like(t)
+    theta[0], omega[0] = math.radians(params.get("angle", 30)), 0.0
+    th, om = float(theta[0]), 0.0
+    for i in range(1, len(t)):
+        k1t, k1o = derivative(th, om)
+        k2t, k2o = derivative(th + dt / 2 * k1t, om + dt / 2 * k1o)
+        k3t, k3o = derivative(th + dt / 2 * k2t, om + dt / 2 * k2o)
+        k4t, k4o = derivative(th + dt * k3t, om + dt * k3o)
+        th += dt / 6 * (k1t + 2 * k2t + 2 * k3t + k4t)
+        om += dt / 6 * (k1o + 2 * k2o + 2 * k3o + k4o)
+        theta[i], omega[i] = th, om
+
+    x = length * np.sin(theta)
+    y = -length * np.cos(theta)
+    t, theta, omega, x, y = _decimate(points, t, theta, omega, x, y)
+    return Trajectory(
+        dt=float(dt),
+        columns=("t", "theta", "omega", "x", "y"),
+        data=(t, theta, omega, x, y),
+        summary=(("smallAnglePeriod", 2 * math.pi * math.sqrt(length / gravity)),),
+    )
+
+
+def newton_motion(force, mass, friction, t) -> Tuple[np.ndarray, np.ndarray]:
+    """Velocity and distance at ``t`` of a cart starting from rest.
+
+    The force accelerates the cart by F/m and friction removes
+    ``friction * FRICTION_DAMPING`` of its velocity per second, so the cart
+    always moves and approaches a terminal velocity. Broadcasts over arrays.
+    """
+    acceleration = np.asarray(force, dtype=float) / mass
+    rate = np.asarray(friction, dtype=float) * FRICTION_DAMPING
+    damped = rate > 0
+    # Cells without friction use a dummy rate and the frictionless formulas
+    safe_rate = np.where(damped, rate, 1.0)
+    decay = np.expm1(-safe_rate * t)
+    v = np.where(damped, acceleration / safe_rate * -decay, acceleration * t)
+    x = np.where(damped, acceleration / safe_rate * (t + decay / safe_rate), 0.5 * acceleration * t * t)
+    return v, x
+
+
+def simulate_newton(params: Dict[str, float], model: str, points: int) -> Trajectory:
+    mass = params.get("mass", 1)
+    force = params.get("force", 0)
+    friction = params.get("friction", 0)
+    duration = params.get("duration", 10)
+
+    dt, t = _time_step(duration)
+    v, x = newton_motion(force, mass, friction, t)
+    t, x, v = _decimate(points, t, x, v)
+    return Trajectory(
+        dt=float(dt),
+        columns=("t", "x", "v"),
+        data=(t, x, v),
+        summary=(("acceleration", force / mass), ("dampingRate", friction * FRICTION_DAMPING)),
+    )
+
+
+SIMULATIONS: Dict[str, Callable[[Dict[str, float], str, int], Trajectory]] = {
+    "projectile": simulate_projectile,
+    "pendulum": simulate_pendulum,
+    "newton": simulate_newton,
+}
+
+
+def check_model(sim_type: str, model: Optional[str]) -> str:
+    """The model to use for a simulation type, defaulting to its first one"""
+    if sim_type not in MODELS:
+        raise SimulationError(f"Unknown simulation type: {sim_type}")
+    model = model or MODELS[sim_type][0]
+    if model not in MODELS[sim_type]:
+        raise SimulationError(f"Model must be one of: {', '.join(MODELS[sim_type])}")
+    return model
+
+
+@lru_cache(maxsize=1024)
+def simulate(sim_type: str, params: Tuple[Tuple[str, float], ...], model: Optional[str] = None,
+             points: int = DEFAULT_POINTS) -> Trajectory:
+    """Run a simulation on validated parameters. Results are shared; do not modify them."""
+    model = check_model(sim_type, model)
+    if not 2 <= points <= MAX_POINTS:
+        raise SimulationError(f"points must be between 2 and {MAX_POINTS}")
+    return SIMULATIONS[sim_type](dict(params), model, points)
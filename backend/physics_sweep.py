@@ -0,0 +1,228 @@
+"""
+Parameter sweeps over the physics simulations.
+
+A sweep varies up to three parameters over a grid of their allowed values
+(by default the full min..max range at the step from physics.json) and
+computes summary metrics such as range, maximum height or period for every
+combination in one vectorized NumPy pass: each varied parameter becomes
+its own broadcast axis, so the formulas run once over the whole grid.
+
+Grid values are always whole steps, so the same sweep is requested again
+and again; results are kept in a bounded LRU keyed on the quantized grid.
+"""
+import itertools
+import math
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Mapping, Optional, Tuple
+
+import numpy as np
+
+from physics_engine import (
+    GRAVITY, SimulationError, Trajectory, check_model, check_value, encode_arrays, newton_motion, simulate,
+    validate_params
+)
+
+MAX_SWEEP_AXES = 3
+MAX_SWEEP_POINTS = 10000
+
+# Sweeps with per-combination trajectories are limited much further, both
+# in combinations and in samples over all trajectories together
+MAX_SWEEP_TRAJECTORIES = 100
+MAX_SWEEP_TRAJECTORY_POINTS = 50000
+
+# Grid values are rounded so equal grids give equal cache keys
+GRID_DECIMALS = 9
+
+Params = Tuple[Tuple[str, float], ...]
+Axes = Tuple[Tuple[str, Tuple[float, ...]], ...]
+
+
+@dataclass(frozen=True)
+class Sweep:
+    """Summary metrics over a grid of parameter values"""
+    axes: Axes
+    metrics: Tuple[Tuple[str, np.ndarray], ...]
+
+    @property
+    def shape(self) -> Tuple[int, ...]:
+        return tuple(len(values) for _, values in self.axes)
+
+    def encode(self, encoding: str) -> Dict[str, Any]:
+        label, metrics = encode_arrays(self.metrics, encoding)
+        return {
+            "axes": [{"name": name, "values": list(values)} for name, values in self.axes],
+            "shape": list(self.shape),
+            "encoding": label,
+            "metrics": metrics,
+        }
+
+
+def _axis_values(name: str, spec: Optional[str], bounds: Mapping[str, Any]) -> Tuple[float, ...]:
+    """Grid values for one varied parameter from a ``min:max[:step]`` spec"""
+    if spec is None:
+        low, high, step = bounds.get("min"), bounds.get("max"), bounds.get("step")
+        if low is None or high is None:
+            raise SimulationError(f"Parameter {name} has no range to sweep over")
+    else:
+        parts = spec.split(":")
+        if len(parts) not in (2, 3):
+            raise SimulationError(f"Sweep range for {name} must be min:max or min:max:step")
+        low, high = check_value(name, parts[0], bounds), check_value(name, parts[1], bounds)
+        step = bounds.get("step")
+        if len(parts) == 3:
+            try:
+                step = float(parts[2])
+            except ValueError:
+                raise SimulationError(f"Sweep step for {name} must be a number")
+            base = bounds.get("step")
+            if not step > 0 or base and abs(step / base - round(step / base)) > 1e-6:
+                raise SimulationError(f"Sweep step for {name} must be a positive multiple of {base}")
+
+    if low > high:
+        raise SimulationError(f"Sweep range for {name} is empty")
+    if not step:
+        raise SimulationError(f"Sweep range for {name} needs a step")
+    count = int(math.floor((high - low) / step + 1e-9)) + 1
+    if count > MAX_SWEEP_POINTS:
+        raise SimulationError(f"Sweeps are limited to {MAX_SWEEP_POINTS} combinations")
+    return tuple(round(low + i * step, GRID_DECIMALS) for i in range(count))
+
+
+def parse_sweep(schema: Mapping[str, Any], values: Mapping[str, str], vary: str) -> Tuple[Params, Axes]:
+    """Split query values into fixed parameters and the axes of the grid.
+
+    ``vary`` lists the swept parameters; their query values, if given, are
+    ``min:max`` or ``min:max:step`` ranges.
+    """
+    names = [name.strip() for name in (vary or "").split(",") if name.strip()]
+    if not names:
+        raise SimulationError("vary must name at least one parameter")
+    if len(names) > MAX_SWEEP_AXES or len(set(names)) != len(names):
+        raise SimulationError(f"vary takes up to {MAX_SWEEP_AXES} different parameters")
+    for name in names:
+        if name not in schema:
+            raise SimulationError(f"Unknown parameter: {name}")
+
+    axes = tuple((name, _axis_values(name, values.get(name), schema[name])) for name in names)
+    if math.prod(len(axis_values) for _, axis_values in axes) > MAX_SWEEP_POINTS:
+        raise SimulationError(f"Sweeps are limited to {MAX_SWEEP_POINTS} combinations")
+
+    fixed = validate_params(
+        {name: bounds for name, bounds in schema.items() if name not in names},
+        {name: value for name, value in values.items() if name not in names},
+    )
+    return fixed, axes
+
+
+def projectile_metrics(p: Dict[str, Any], model: str) -> Dict[str, np.ndarray]:
+    angle = np.radians(p.get("angle", 45))
+    velocity = p.get("velocity", 20)
+    vx, vy = velocity * np.cos(angle), velocity * np.sin(angle)
+
+    ideal_time = 2 * vy / GRAVITY
+    metrics = {
+        "flightTime": ideal_time,
+        "range": vx * ideal_time,
+        "maxHeight": vy * vy / (2 * GRAVITY),
+    }
+    if model != "drag":
+        return metrics
+
+    k = np.asarray(p.get("friction", 0.0), dtype=float)
+    drag = k > 0
+    if not drag.any():
+        return metrics
+
+    # Same closed form as simulate_projectile; cells without drag use a dummy rate
+    rate = np.where(drag, k / p.get("mass", 1), 1.0)
+    terminal = GRAVITY / rate
+
+    def height(t):
+        return (vy + terminal) / rate * -np.expm1(-rate * t) - terminal * t
+
+    low, high = np.zeros_like(ideal_time * rate), ideal_time * np.ones_like(rate)
+    for _ in range(60):
+        mid = (low + high) / 2
+        above = height(mid) > 0
+        low, high = np.where(above, mid, low), np.where(above, high, mid)
+
+    peak = np.log1p(vy * rate / GRAVITY) / rate
+    metrics["flightTime"] = np.where(drag, low, ideal_time)
+    metrics["range"] = np.where(drag, vx / rate * -np.expm1(-rate * low), metrics["range"])
+    metrics["maxHeight"] = np.where(drag, height(peak), metrics["maxHeight"])
+    return metrics
+
+
+def pendulum_metrics(p: Dict[str, Any], model: str) -> Dict[str, np.ndarray]:
+    length = p.get("length", 1)
+    gravity = p.get("gravity", GRAVITY)
+    amplitude = np.radians(p.get("angle", 30))
+
+    # Exact period of the nonlinear pendulum via the arithmetic-geometric mean
+    a, b = np.ones_like(amplitude * length), np.cos(amplitude / 2) * np.ones_like(length)
+    for _ in range(8):
+        a, b = (a + b) / 2, np.sqrt(a * b)
+    small_angle = 2 * np.pi * np.sqrt(length / gravity)
+    return {
+        "period": small_angle / a,
+        "smallAnglePeriod": small_angle * np.ones_like(amplitude),
+        "maxSpeed": np.sqrt(2 * gravity * length * (1 - np.cos(amplitude))),
+    }
+
+
+def newton_metrics(p: Dict[str, Any], model: str) -> Dict[str, np.ndarray]:
+    mass = p.get("mass", 1)
+    force = p.get("force", 0)
+    duration = p.get("duration", 10)
+    velocity, distance = newton_motion(force, mass, p.get("friction", 0), duration)
+    return {
+        "acceleration": force / mass,
+        "finalVelocity": velocity,
+        "distance": distance,
+    }
+
+
+SWEEP_METRICS: Dict[str, Callable[[Dict[str, Any], str], Dict[str, np.ndarray]]] = {
+    "projectile": projectile_metrics,
+    "pendulum": pendulum_metrics,
+    "newton": newton_metrics,
+}
+
+
+@lru_cache(maxsize=256)
+def sweep(sim_type: str, model: Optional[str], fixed: Params, axes: Axes) -> Sweep:
+    """Metrics over a parameter grid. Results are shared; do not modify them."""
+    model = check_model(sim_type, model)
+    params: Dict[str, Any] = dict(fixed)
+    grids = np.meshgrid(*(np.array(values) for _, values in axes), indexing="ij", sparse=True)
+    params.update((name, grid) for (name, _), grid in zip(axes, grids))
+
+    shape = tuple(len(values) for _, values in axes)
+    metrics = SWEEP_METRICS[sim_type](params, model)
+    return Sweep(
+        axes=axes,
+        metrics=tuple(
+            (name, np.ascontiguousarray(np.broadcast_to(values, shape), dtype=np.float64))
+            for name, values in metrics.items()
+        ),
+    )
+
+
+def sweep_trajectories(sim_type: str, model: Optional[str], fixed: Params, axes: Axes,
+                       points: int) -> List[Trajectory]:
+    """Trajectories for every grid combination, in row-major order"""
+    combinations = math.prod(len(values) for _, values in axes)
+    if combinations > MAX_SWEEP_TRAJECTORIES:
+        raise SimulationError(f"Trajectories are limited to sweeps of {MAX_SWEEP_TRAJECTORIES} combinations")
+    if combinations * points > MAX_SWEEP_TRAJECTORY_POINTS:
+        raise SimulationError(
+            f"Trajectories are limited to {MAX_SWEEP_TRAJECTORY_POINTS} points in total; "
+            f"use at most {MAX_SWEEP_TRAJECTORY_POINTS // combinations} points for {combinations} combinations"
+        )
+    names = [name for name, _ in axes]
+    return [
+        simulate(sim_type, tuple(sorted((*fixed, *zip(names, combination)))), model, points)
+        for combination in itertools.product(*(values for _, values in axes))
+    ]
+
@@ -0,0 +1,61 @@
+"""
+Lookup indexes over reactions.json.
+
+Reactions are indexed by their unordered reactant pair, so finding the
+reaction for two chemicals is a single dict lookup regardless of how many
+reactions exist, and by reactionType for the filtered listing endpoint.
+"""
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Tuple
+
+# Matrix cell for a pair of chemicals that do not react
+NO_REACTION = "none"
+
+
+def pair_key(chem1: str, chem2: str) -> Tuple[str, str]:
+    """Canonical key for an unordered pair of reactants"""
+    return (chem1, chem2) if chem1 <= chem2 else (chem2, chem1)
+
+
+class ReactionIndex:
+    """Pair and type indexes built from the parsed reactions data"""
+
+    def __init__(self, reactions_data: Mapping[str, Any]):
+        self.by_pair: Dict[Tuple[str, str], Mapping[str, Any]] = {}
+        by_type: Dict[str, list] = {}
+
+        for reaction in reactions_data.get("reactions", []):
+            # Keep the first reaction for a pair, matching the old linear scan
+            self.by_pair.setdefault(pair_key(reaction["reactant1"], reaction["reactant2"]), reaction)
+            by_type.setdefault(reaction.get("reactionType"), []).append(reaction)
+
+        self.by_type: Dict[str, Tuple[Mapping[str, Any], ...]] = {
+            reaction_type: tuple(reactions) for reaction_type, reactions in by_type.items()
+        }
+
+    def find(self, chem1: str, chem2: str) -> Optional[Mapping[str, Any]]:
+        """Return the reaction between two chemicals in either order, if any"""
+        return self.by_pair.get(pair_key(chem1, chem2))
+
+    def of_type(self, reaction_type: str) -> Tuple[Mapping[str, Any], ...]:
+        return self.by_type.get(reaction_type, ())
+
+    def matrix(self, chemical_ids: Sequence[str]) -> List[List[str]]:
+        """Reaction id (or ``"none"``) for every ordered pair of chemicals.
+
+        Row ``i``, column ``j`` is the reaction between ``chemical_ids[i]`` and
+        ``chemical_ids[j]``; the matrix is symmetric.
+        """
+        rows = []
+        for chem1 in chemical_ids:
+            row = []
+            for chem2 in chemical_ids:
+                reaction = self.find(chem1, chem2)
+                if reaction is None:
+                    row.append(NO_REACTION)
+                else:
+                    row.append(reaction.get("id") or f"{reaction['reactant1']}-{reaction['reactant2']}")
+            rows.append(row)
+        return rows
+
+    def __len__(self):
+        return len(self.by_pair)
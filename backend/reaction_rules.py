@@ -0,0 +1,198 @@
+"""
+Declarative rules for how temperature, mixing speed and legacy actions
+modify a reaction result.
+
+Rules are grouped; within a group the first matching rule applies. A rule
+only looks at the reaction's type and animation, the temperature and mixing
+bands and the requested actions, so the table is compiled once per content
+version into a lookup keyed on those values. Formatted results are
+memoized in a bounded LRU.
+"""
+from functools import lru_cache
+from itertools import combinations
+from typing import Any, Dict, FrozenSet, Iterable, Mapping, Optional, Tuple
+
+from content_store import FrozenDict
+from reaction_index import ReactionIndex
+
+# Applied in this order; at most one rule per group
+RULE_GROUPS = ("temperature", "mixing", "heat", "shake")
+
+REACTION_RULES = (
+    # Temperature effects
+    {
+        "group": "temperature", "temperature": "high", "reactionType": "acid-carbonate",
+        "animation": "bubble",
+        "en": " At {temperature}°C, the reaction is accelerated.",
+        "bn": " {temperature}°C তাপমাত্রায়, বিক্রিয়াটি ত্বরান্বিত হয়।",
+    },
+    {
+        "group": "temperature", "temperature": "high", "reactionType": "redox",
+        "animation": "smoke",
+        "en": " At {temperature}°C, the redox reaction is intensified.",
+        "bn": " {temperature}°C তাপমাত্রায়, জারণ-বিজারণ বিক্রিয়াটি তীব্র হয়।",
+    },
+    {
+        "group": "temperature", "temperature": "high", "reactionAnimation": "precipitate",
+        "en": " At {temperature}°C, the precipitation forms more quickly.",
+        "bn": " {temperature}°C তাপমাত্রায়, অধঃক্ষেপণ দ্রুত হয়।",
+    },
+    {
+        "group": "temperature", "temperature": "low",
+        "en": " At {temperature}°C, the reaction is slowed down.",
+        "bn": " {temperature}°C তাপমাত্রায়, বিক্রিয়াটি ধীর হয়।",
+    },
+    # Mixing speed effects
+    {
+        "group": "mixing", "mixing": "vigorous", "reactionAnimation": "precipitate",
+        "en": " With vigorous mixing at {mixing_speed}% speed, the precipitation is more uniform.",
+        "bn": " {mixing_speed}% গতিতে তীব্র মিশ্রণে, অধঃক্ষেপণ আরও সমান হয়।",
+    },
+    {
+        "group": "mixing", "mixing": "vigorous", "reactionAnimation": "bubble",
+        "en": " With vigorous mixing at {mixing_speed}% speed, bubbling is more intense.",
+        "bn": " {mixing_speed}% গতিতে তীব্র মিশ্রণে, বাবল উৎপাদন আরও তীব্র হয়।",
+    },
+    # Legacy actions, kept for backward compatibility
+    {
+        "group": "heat", "action": "heat", "reactionType": "acid-carbonate", "unlessAnimation": "smoke",
+        "animation": "bubble",
+    },
+    {
+        "group": "shake", "action": "shake", "reactionAnimation": "precipitate",
+        "en": " Shaking accelerates the precipitation.",
+        "bn": " ঝাঁকুনি অধঃক্ষেপণ প্রক্রিয়াকে ত্বরান্বিত করে।",
+    },
+)
+
+TEMPERATURE_BANDS = ("low", "normal", "high")
+MIXING_BANDS = ("normal", "vigorous")
+KNOWN_ACTIONS = frozenset(rule["action"] for rule in REACTION_RULES if "action" in rule)
+
+
+def temperature_band(temperature: float) -> str:
+    if temperature > 50:
+        return "high"
+    if temperature < 10:
+        return "low"
+    return "normal"
+
+
+def mixing_band(mixing_speed: float) -> str:
+    return "vigorous" if mixing_speed > 75 else "normal"
+
+
+def parse_actions(actions: Optional[str]) -> FrozenSet[str]:
+    """The recognized actions in a comma separated ``actions`` value"""
+    if not actions:
+        return frozenset()
+    return frozenset(action.strip() for action in actions.split(",")) & KNOWN_ACTIONS
+
+
+def no_reaction(chem1: str, chem2: str) -> Dict[str, Any]:
+    """Result returned when two chemicals have no known reaction"""
+    return {
+        "id": f"{chem1}-{chem2}",
+        "reactant1": chem1,
+        "reactant2": chem2,
+        "product": "No Reaction",
+        "description": "The selected chemicals do not react or their reaction is unknown.",
+        "bengaliDescription": "নির্বাচিত রাসায়নিকগুলি এক অপরের সাথে বিক্রিয়া করে না বা তাদের বিক্রিয়া অজানা।",
+        "animation": "none",
+        "color": "#f8f9fa",
+        "reactionType": "none",
+        "hazards": "None"
+    }
+
+
+# (animation override, English suffix template, Bengali suffix template)
+Modifier = Tuple[Optional[str], str, str]
+
+
+def compile_modifier(reaction_type: Optional[str], animation: Optional[str], temperature: str,
+                     mixing: str, actions: FrozenSet[str]) -> Modifier:
+    """Evaluate the rules table for one combination of inputs"""
+    override = None
+    english, bengali = [], []
+    for group in RULE_GROUPS:
+        for rule in REACTION_RULES:
+            if rule["group"] != group:
+                continue
+            if "temperature" in rule and rule["temperature"] != temperature:
+                continue
+            if "mixing" in rule and rule["mixing"] != mixing:
+                continue
+            if "action" in rule and rule["action"] not in actions:
+                continue
+            if "reactionType" in rule and rule["reactionType"] != reaction_type:
+                continue
+            if "reactionAnimation" in rule and rule["reactionAnimation"] != animation:
+                continue
+            if "unlessAnimation" in rule and (override or animation) == rule["unlessAnimation"]:
+                continue
+
+            override = rule.get("animation", override)
+            english.append(rule.get("en", ""))
+            bengali.append(rule.get("bn", ""))
+            break
+    return override, "".join(english), "".join(bengali)
+
+
+def _action_sets(actions: Iterable[str]):
+    actions = sorted(actions)
+    for size in range(len(actions) + 1):
+        for subset in combinations(actions, size):
+            yield frozenset(subset)
+
+
+class ReactionEngine:
+    """Finds reactions and applies the compiled modifier rules to them"""
+
+    def __init__(self, index: ReactionIndex, cache_size: int = 4096):
+        self.index = index
+        # (reactionType, animation, temperature band, mixing band, actions) -> Modifier
+        self.modifiers: Dict[Tuple, Modifier] = {}
+        signatures = {(r.get("reactionType"), r.get("animation")) for r in index.by_pair.values()}
+        for reaction_type, animation in signatures:
+            for temperature in TEMPERATURE_BANDS:
+                for mixing in MIXING_BANDS:
+                    for actions in _action_sets(KNOWN_ACTIONS):
+                        key = (reaction_type, animation, temperature, mixing, actions)
+                        self.modifiers[key] = compile_modifier(*key)
+        self._react = lru_cache(maxsize=cache_size)(self._compute)
+
+    def react(self, chem1: str, chem2: str, temperature: float = 25.0, mixing_speed: float = 50.0,
+              actions: FrozenSet[str] = frozenset()) -> Mapping[str, Any]:
+        """The reaction result for two chemicals under the given conditions.
+
+        The result may be shared between requests and must not be modified.
+        """
+        return self._react(chem1, chem2, temperature, mixing_speed, actions)
+
+    def cache_info(self):
+        return self._react.cache_info()
+
+    def _compute(self, chem1: str, chem2: str, temperature: float, mixing_speed: float,
+                 actions: FrozenSet[str]) -> Mapping[str, Any]:
+        reaction = self.index.find(chem1, chem2)
+        if reaction is None:
+            return FrozenDict(no_reaction(chem1, chem2))
+
+        key = (reaction.get("reactionType"), reaction.get("animation"),
+               temperature_band(temperature), mixing_band(mixing_speed), actions)
+        override, english, bengali = self.modifiers.get(key) or compile_modifier(*key)
+        if override is None and not english and not bengali:
+            return reaction
+
+        result = reaction.copy()
+        if override is not None:
+            result["animation"] = override
+        if english:
+            result["description"] = result["description"] + english.format(
+                temperature=temperature, mixing_speed=mixing_speed
+            )
+        if bengali:
+            result["bengaliDescription"] = result.get("bengaliDescription", "") + bengali.format(
+                temperature=temperature, mixing_speed=mixing_speed
+            )
+        return FrozenDict(result)
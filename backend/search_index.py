@@ -0,0 +1,242 @@
+"""
+Bilingual full-text search over experiments, chemicals and reactions.
+
+Text is normalized (NFKC, case folding, Bengali digits to ASCII, no zero
+width joiners) and split into Bengali and Latin words. Stopwords are
+dropped and common inflections stripped, so নিউরনের finds নিউরন and
+reactions finds reaction. Titles, names, formulas and equations weigh more
+than descriptions and narrations; fields nested in models, parts and
+parameters weigh a little less than the same fields on the item itself.
+
+Every term's BM25 weight in every document is computed when the index is
+built, so a query only adds up precomputed arrays. Partial words are
+matched through a character bigram index over the vocabulary: "নিউর" or
+"neur" expand to the indexed words containing them, at a lower weight
+than an exact match.
+"""
+import math
+import re
+import unicodedata
+from collections import defaultdict
+from functools import lru_cache
+from typing import Any, Dict, Iterable, Iterator, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+
+from experiment_index import SUMMARY_FIELDS, project
+
+# BM25 parameters
+K1 = 1.2
+B = 0.75
+
+# Text fields that are searched and their weight
+FIELD_WEIGHTS = {
+    "title": 3.0,
+    "name": 3.0,
+    "bengaliName": 3.0,
+    "formula": 3.0,
+    "equation": 3.0,
+    "product": 2.0,
+    "type": 1.0,
+    "reactionType": 1.0,
+    "description": 1.0,
+    "bengaliDescription": 1.0,
+    "narration": 1.0,
+}
+# Applied to fields of models, parts and parameters inside an item
+NESTED_WEIGHT = 2 / 3
+
+# Weight of a word that only contains a query word, relative to an exact match
+PARTIAL_WEIGHT = 0.5
+# Most vocabulary words a partial query word expands to, most frequent first
+MAX_EXPANSIONS = 32
+MIN_PARTIAL_LENGTH = 2
+
+_BENGALI_DIGITS = str.maketrans("০১২৩৪৫৬৭৮৯", "0123456789")
+_ZERO_WIDTH = dict.fromkeys(map(ord, "\u200c\u200d"))
+_WORD = re.compile(r"[\u0980-\u09ff]+|[0-9a-z]+")
+
+
+def normalize(text: str) -> str:
+    return unicodedata.normalize("NFKC", text).casefold().translate(_BENGALI_DIGITS).translate(_ZERO_WIDTH)
+
+
+STOPWORDS = frozenset(normalize(word) for word in (
+    "a an and are as at be by for from in is it its of on or that the this to was were which with "
+    "এবং ও যা যে এই এর একটি করে হয় থেকে সহ বা কি কী তার এটি এতে হতে করা হলে"
+).split())
+
+# Inflections stripped from Bengali words, longest first
+BENGALI_SUFFIXES = tuple(sorted((
+    normalize(suffix) for suffix in
+    ("গুলোর", "গুলোতে", "গুলো", "গুলি", "দের", "েরা", "ের", "টির", "টিতে", "টি", "টা", "কে", "তে", "য়", "র", "ে")
+), key=len, reverse=True))
+MIN_STEM_LENGTH = 2
+
+
+def stem(word: str) -> str:
+    """Strip one common inflection from a Bengali or English word"""
+    if word.isascii():
+        if len(word) > 4 and word.endswith("ies"):
+            return word[:-3] + "y"
+        if len(word) > 3 and word.endswith("s") and not word.endswith(("ss", "us", "is")):
+            return word[:-1]
+        return word
+    for suffix in BENGALI_SUFFIXES:
+        if word.endswith(suffix) and len(word) - len(suffix) >= MIN_STEM_LENGTH:
+            return word[:-len(suffix)]
+    return word
+
+
+def words(text: str) -> List[str]:
+    """Normalized words of ``text`` without stopwords, not stemmed"""
+    return [word for word in _WORD.findall(normalize(text)) if word not in STOPWORDS]
+
+
+def analyze(text: str) -> List[str]:
+    """The index terms for a piece of text"""
+    return [stem(word) for word in words(text)]
+
+
+def bigrams(word: str) -> Iterator[str]:
+    return (word[i:i + 2] for i in range(len(word) - 1))
+
+
+def text_fields(item: Mapping[str, Any], nested: bool = False) -> Iterator[Tuple[str, float]]:
+    """``(text, weight)`` for every searched field in an item, including nested ones"""
+    for key, value in item.items():
+        if isinstance(value, str):
+            weight = FIELD_WEIGHTS.get(key)
+            if weight is not None:
+                yield value, weight * NESTED_WEIGHT if nested else weight
+        elif isinstance(value, Mapping):
+            yield from text_fields(value, True)
+        elif isinstance(value, (list, tuple)):
+            for child in value:
+                if isinstance(child, Mapping):
+                    yield from text_fields(child, True)
+
+
+class SearchIndex:
+    """Inverted index with precomputed BM25 weights over several item lists"""
+
+    def __init__(self, sources: Mapping[str, Tuple[str, Sequence[Mapping[str, Any]]]],
+                 urls: Mapping[str, str], cache_size: int = 1024):
+        """``sources`` maps a source name to ``(list key, items)``; ``urls`` to a
+        detail URL template with an ``{id}`` placeholder.
+        """
+        self.sources = tuple(sources)
+        self.results: List[Dict[str, Any]] = []
+        source_of: List[int] = []
+        lengths: List[float] = []
+        postings: Dict[str, Tuple[List[int], List[float]]] = defaultdict(lambda: ([], []))
+        # Cloned and repeated texts are analyzed once
+        analyzed: Dict[str, List[str]] = {}
+
+        for source_number, (source, (key, items)) in enumerate(sources.items()):
+            for item in items:
+                item_id = item.get("id")
+                if not isinstance(item_id, str):
+                    continue
+                frequencies: Dict[str, float] = defaultdict(float)
+                for text, weight in text_fields(item):
+                    terms = analyzed.get(text)
+                    if terms is None:
+                        terms = analyzed.setdefault(text, analyze(text))
+                    for term in terms:
+                        frequencies[term] += weight
+
+                document = len(self.results)
+                for term, frequency in frequencies.items():
+                    ids, values = postings[term]
+                    ids.append(document)
+                    values.append(frequency)
+                self.results.append({
+                    **project(item, SUMMARY_FIELDS[key]),
+                    "source": source,
+                    "url": urls[source].format(id=item_id),
+                })
+                source_of.append(source_number)
+                lengths.append(sum(frequencies.values()))
+
+        self.source_of = np.array(source_of, dtype=np.int16)
+        length = np.array(lengths, dtype=np.float32)
+        norm = K1 * (1 - B + B * length / (length.mean() if len(length) else 1.0))
+
+        # term -> (document numbers, BM25 weight of the term in each)
+        self.postings: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+        count = len(self.results)
+        for term, (ids, values) in postings.items():
+            ids_array = np.array(ids, dtype=np.int32)
+            frequency = np.array(values, dtype=np.float32)
+            idf = math.log(1 + (count - len(ids) + 0.5) / (len(ids) + 0.5))
+            self.postings[term] = ids_array, idf * frequency * (K1 + 1) / (frequency + norm[ids_array])
+
+        # bigram -> vocabulary words containing it, for partial matches
+        vocabulary: Dict[str, set] = defaultdict(set)
+        for term in self.postings:
+            for gram in bigrams(term):
+                vocabulary[gram].add(term)
+        self._bigrams = {gram: frozenset(terms) for gram, terms in vocabulary.items()}
+        self._search = lru_cache(maxsize=cache_size)(self._compute)
+
+    def __len__(self):
+        return len(self.results)
+
+    def search(self, query: str, source: Optional[str] = None, limit: int = 20) -> Dict[str, Any]:
+        """Ranked results for ``query``, optionally from one source only.
+
+        The result may be shared between requests and must not be modified.
+        """
+        return self._search(" ".join(words(query)), source, limit)
+
+    def cache_info(self):
+        return self._search.cache_info()
+
+    def expand(self, word: str) -> List[str]:
+        """Indexed words that contain ``word``, most frequent first"""
+        if len(word) < MIN_PARTIAL_LENGTH:
+            return []
+        candidates = None
+        for gram in sorted(set(bigrams(word)), key=lambda gram: len(self._bigrams.get(gram, ()))):
+            terms = self._bigrams.get(gram)
+            if not terms:
+                return []
+            candidates = terms if candidates is None else candidates & terms
+        matches = [term for term in candidates if word in term]
+        matches.sort(key=lambda term: (-len(self.postings[term][0]), term))
+        return matches[:MAX_EXPANSIONS]
+
+    def _compute(self, query: str, source: Optional[str], limit: int) -> Dict[str, Any]:
+        scores = np.zeros(len(self.results), dtype=np.float32)
+        for word in dict.fromkeys(query.split()):
+            term = stem(word)
+            weights = {term: 1.0} if term in self.postings else {}
+            for match in self.expand(word):
+                weights.setdefault(match, PARTIAL_WEIGHT * len(word) / len(match))
+            for match, weight in weights.items():
+                ids, values = self.postings[match]
+                scores[ids] += values * weight
+
+        if source is not None:
+            scores[self.source_of != self.sources.index(source)] = 0
+        matched = np.flatnonzero(scores)
+        if len(matched) > limit:
+            matched = matched[np.argpartition(-scores[matched], limit - 1)[:limit]]
+        # Highest score first; ties keep content order
+        matched = matched[np.lexsort((matched, -scores[matched]))]
+        return {
+            "total": int(np.count_nonzero(scores)),
+            "results": [
+                {**self.results[document], "score": round(float(scores[document]), 3)} for document in matched
+            ],
+        }
+
+
+def build_search_index(collections: Iterable[Tuple[str, str, Optional[Mapping[str, Any]], str]]) -> SearchIndex:
+    """Index ``(source, list key, parsed content file, detail URL template)`` entries"""
+    sources, urls = {}, {}
+    for source, key, data, url in collections:
+        sources[source] = (key, data.get(key, ()) if data is not None else ())
+        urls[source] = url
+    return SearchIndex(sources, urls)
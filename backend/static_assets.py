@@ -0,0 +1,307 @@
+"""
+Serving of static asset files (3D models, SVGs) with HTTP caching support.
+
+File metadata is cached in memory and re-checked with a rate-limited stat,
+names from the URL are resolved safely inside the asset directory, and
+responses support ETag/Last-Modified validators, single byte ranges for
+resumable downloads and precompressed ``.gz``/``.br`` sidecar files that
+are generated once in the background.
+"""
+import glob
+import gzip
+import os
+import re
+import threading
+import time
+from dataclasses import dataclass, field
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Dict, Iterator, Optional, Tuple
+
+from starlette.requests import Request
+from starlette.responses import Response, StreamingResponse
+
+from http_cache import accepted_encodings, brotli, etag_matches
+
+CHUNK_SIZE = 64 * 1024
+
+# Files smaller than this are served as-is
+MIN_COMPRESS_SIZE = 1024
+
+# A sidecar is only kept if it saves at least this fraction of the size
+MIN_COMPRESS_SAVING = 0.05
+
+SIDECAR_SUFFIXES = {"br": ".br", "gzip": ".gz"}
+
+# Sidecar temp files left behind by a worker that stopped while writing
+TEMP_FILE_MAX_AGE = 3600
+
+_RANGE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+def _remove_stale_temp_files(sidecar: str):
+    cutoff = time.time() - TEMP_FILE_MAX_AGE
+    for path in glob.glob(glob.escape(sidecar) + ".*.tmp"):
+        try:
+            if os.path.getmtime(path) < cutoff:
+                os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+@dataclass
+class StaticAsset:
+    """Cached metadata for one file in an asset directory"""
+    name: str
+    path: str
+    size: int
+    mtime: float
+    media_type: str
+    etag: str
+    last_modified: str
+    checked_at: float
+    # encoding -> (sidecar path, size); None once found not worth compressing
+    variants: Dict[str, Optional[Tuple[str, int]]] = field(default_factory=dict)
+
+    def variant_etag(self, encoding: Optional[str]) -> str:
+        return self.etag if encoding is None else f'{self.etag[:-1]}-{encoding}"'
+
+
+def parse_range(range_header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """Parse a single ``bytes=`` range into inclusive ``(start, end)``.
+
+    Returns None when there is no usable range, in which case the whole file
+    is served. Raises ValueError for a range that cannot be satisfied.
+    """
+    if not range_header:
+        return None
+    match = _RANGE.match(range_header.strip())
+    if match is None:
+        # Multiple ranges or other units: serving the full file is allowed
+        return None
+
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        # Suffix range: the last N bytes
+        length = int(last)
+        if length == 0:
+            raise ValueError("empty suffix range")
+        return max(0, size - length), size - 1
+
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        raise ValueError("range not satisfiable")
+    return start, end
+
+
+def iter_file(path: str, start: int, end: int) -> Iterator[bytes]:
+    """Yield the bytes ``start..end`` (inclusive) of a file in chunks"""
+    with open(path, "rb") as f:
+        f.seek(start)
+        remaining = end - start + 1
+        while remaining > 0:
+            chunk = f.read(min(CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+
+class AssetDirectory:
+    """Looks up and serves files from one directory"""
+
+    def __init__(self, root: str, media_types: Dict[str, str], cache_control: str,
+                 check_interval: float = 5.0, extra_headers: Optional[Dict[str, str]] = None):
+        self.root = os.path.realpath(root)
+        self.media_types = media_types
+        self.cache_control = cache_control
+        self.check_interval = check_interval
+        self.extra_headers = extra_headers or {}
+        self._assets: Dict[str, StaticAsset] = {}
+        self._compressing: set = set()
+        self._lock = threading.Lock()
+
+    @property
+    def compressing(self) -> int:
+        """Sidecar files being generated in the background"""
+        with self._lock:
+            return len(self._compressing)
+
+    def resolve(self, name: str) -> Optional[str]:
+        """Path of ``name`` inside the directory, or None if it is not allowed"""
+        if not name or name.startswith(".") or "/" in name or "\\" in name or "\x00" in name:
+            return None
+        if os.path.splitext(name)[1].lower() not in self.media_types:
+            return None
+        path = os.path.realpath(os.path.join(self.root, name))
+        if os.path.dirname(path) != self.root:
+            return None
+        return path
+
+    def lookup(self, name: str) -> Optional[StaticAsset]:
+        """Metadata for ``name``, or None if it does not exist or is not allowed"""
+        now = time.monotonic()
+        asset = self._assets.get(name)
+        if asset is not None and now - asset.checked_at < self.check_interval:
+            return asset
+
+        path = self.resolve(name)
+        if path is None:
+            return None
+        try:
+            st = os.stat(path)
+        except (FileNotFoundError, NotADirectoryError):
+            with self._lock:
+                self._assets.pop(name, None)
+            return None
+
+        if asset is not None and asset.mtime == st.st_mtime and asset.size == st.st_size:
+            asset.checked_at = now
+            return asset
+
+        asset = StaticAsset(
+            name=name,
+            path=path,
+            size=st.st_size,
+            mtime=st.st_mtime,
+            media_type=self.media_types[os.path.splitext(name)[1].lower()],
+            etag=f'"{int(st.st_mtime):x}-{st.st_size:x}"',
+            last_modified=formatdate(st.st_mtime, usegmt=True),
+            checked_at=now,
+        )
+        self._find_variants(asset)
+        with self._lock:
+            self._assets[name] = asset
+        return asset
+
+    def respond(self, request: Request, asset: StaticAsset) -> Response:
+        headers = {
+            **self.extra_headers,
+            "Cache-Control": self.cache_control,
+            "Last-Modified": asset.last_modified,
+            "Accept-Ranges": "bytes",
+            "Vary": "Accept-Encoding",
+        }
+        range_header = request.headers.get("range")
+        if_range = request.headers.get("if-range")
+        if range_header and if_range and if_range not in (asset.etag, asset.last_modified):
+            # The client's partial copy is outdated; send the whole file
+            range_header = None
+
+        # Ranges always refer to the uncompressed file
+        encoding, path, size = None, asset.path, asset.size
+        if not range_header:
+            encoding, path, size = self._select_variant(asset, request.headers.get("accept-encoding"))
+        headers["ETag"] = asset.variant_etag(encoding)
+
+        if self._not_modified(request, asset):
+            return Response(status_code=304, headers=headers)
+
+        try:
+            byte_range = parse_range(range_header, asset.size)
+        except ValueError:
+            headers["Content-Range"] = f"bytes */{asset.size}"
+            return Response(status_code=416, headers=headers)
+
+        if byte_range is not None:
+            start, end = byte_range
+            headers["Content-Range"] = f"bytes {start}-{end}/{asset.size}"
+            headers["Content-Length"] = str(end - start + 1)
+            return StreamingResponse(
+                iter_file(path, start, end), status_code=206, media_type=asset.media_type, headers=headers
+            )
+
+        if encoding is not None:
+            headers["Content-Encoding"] = encoding
+        headers["Content-Length"] = str(size)
+        return StreamingResponse(iter_file(path, 0, size - 1), media_type=asset.media_type, headers=headers)
+
+    def _not_modified(self, request: Request, asset: StaticAsset) -> bool:
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match:
+            return any(
+                etag_matches(if_none_match, asset.variant_etag(encoding))
+                for encoding in (None, *SIDECAR_SUFFIXES)
+            )
+        if_modified_since = request.headers.get("if-modified-since")
+        if if_modified_since:
+            try:
+                return int(asset.mtime) <= parsedate_to_datetime(if_modified_since).timestamp()
+            except (TypeError, ValueError):
+                return False
+        return False
+
+    def _select_variant(self, asset: StaticAsset, accept_encoding: Optional[str]):
+        accepted = accepted_encodings(accept_encoding)
+        for encoding in SIDECAR_SUFFIXES:
+            variant = asset.variants.get(encoding)
+            if variant is not None and accepted.get(encoding, 0) > 0:
+                return encoding, variant[0], variant[1]
+        return None, asset.path, asset.size
+
+    def _find_variants(self, asset: StaticAsset):
+        """Register up-to-date sidecars and start building missing ones"""
+        if asset.size < MIN_COMPRESS_SIZE:
+            return
+        missing = False
+        for encoding, suffix in SIDECAR_SUFFIXES.items():
+            if encoding == "br" and brotli is None:
+                continue
+            try:
+                st = os.stat(asset.path + suffix)
+            except FileNotFoundError:
+                missing = True
+                continue
+            if st.st_mtime >= asset.mtime:
+                asset.variants[encoding] = (asset.path + suffix, st.st_size)
+            else:
+                missing = True
+
+        if missing:
+            with self._lock:
+                if asset.path in self._compressing:
+                    return
+                self._compressing.add(asset.path)
+            threading.Thread(target=self._compress, args=(asset,), daemon=True).start()
+
+    def _compress(self, asset: StaticAsset):
+        try:
+            with open(asset.path, "rb") as f:
+                data = f.read()
+            for encoding, suffix in SIDECAR_SUFFIXES.items():
+                if encoding in asset.variants:
+                    continue
+                if encoding == "br":
+                    if brotli is None:
+                        continue
+                    compressed = brotli.compress(data, quality=11)
+                else:
+                    compressed = gzip.compress(data, compresslevel=9, mtime=0)
+
+                if len(compressed) > len(data) * (1 - MIN_COMPRESS_SAVING):
+                    asset.variants[encoding] = None
+                    continue
+
+                sidecar = asset.path + suffix
+                _remove_stale_temp_files(sidecar)
+                # Unique per process and thread: every worker compresses on its
+                # first request, and they must not write into each other's file
+                tmp_path = f"{sidecar}.{os.getpid()}.{threading.get_ident()}.tmp"
+                try:
+                    with open(tmp_path, "wb") as f:
+                        f.write(compressed)
+                    os.replace(tmp_path, sidecar)
+                except BaseException:
+                    try:
+                        os.remove(tmp_path)
+                    except FileNotFoundError:
+                        pass
+                    raise
+                asset.variants[encoding] = (sidecar, len(compressed))
+        except Exception as e:
+            print(f"Error compressing {asset.name}: {str(e)}")
+        finally:
+            with self._lock:
+                self._compressing.discard(asset.path)
@@ -0,0 +1,180 @@
+import asyncio
+import base64
+import io
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+
+import image_analysis
+from image_analysis import (AnalysisOverloaded, ImageAnalysisError, ImageAnalyzer, SampleVisionBackend,
+                            pinned_target)
+
+# Stands in for a public host name; the test analyzer resolves it to the local server
+PUBLIC_HOST = "images.example"
+
+
+def gradient_png(width: int, height: int, blue: int = 80) -> bytes:
+    from PIL import Image
+
+    image = Image.new("RGB", (width, height))
+    image.putdata([(x * 255 // width, y * 255 // height, blue) for y in range(height) for x in range(width)])
+    out = io.BytesIO()
+    image.save(out, "PNG")
+    return out.getvalue()
+
+
+class ImageHandler(BaseHTTPRequestHandler):
+    # path -> (status, headers, body); set per test
+    routes = {}
+    hosts = []
+
+    def do_GET(self):
+        self.hosts.append(self.headers["Host"])
+        status, headers, body = self.routes.get(self.path, (404, {}, b""))
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class LocalAnalyzer(ImageAnalyzer):
+    """Resolves PUBLIC_HOST to the loopback test server as if it had passed
+    the public address check; every other host gets the real check."""
+
+    async def _check_url(self, url):
+        if image_analysis.urlsplit(url).hostname == PUBLIC_HOST:
+            return "127.0.0.1"
+        return await super()._check_url(url)
+
+
+class ImageAnalyzerTest(unittest.IsolatedAsyncioTestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), ImageHandler)
+        cls.port = cls.server.server_address[1]
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        ImageHandler.routes = {}
+        ImageHandler.hosts = []
+        self.backend = SampleVisionBackend()
+        self.analyzer = LocalAnalyzer(self.backend)
+
+    async def asyncTearDown(self):
+        await self.analyzer.close()
+
+    def url(self, path: str) -> str:
+        return f"http://{PUBLIC_HOST}:{self.port}{path}"
+
+    def serve(self, path: str, body: bytes, status: int = 200, **headers):
+        headers.setdefault("Content-Length", str(len(body)))
+        ImageHandler.routes[path] = (status, headers, body)
+
+    async def test_private_addresses_are_refused(self):
+        analyzer = ImageAnalyzer(self.backend)
+        for url in ("http://127.0.0.1/a.png", "http://localhost/a.png", "http://[::1]/a.png",
+                    "http://10.0.0.8/a.png", "http://169.254.169.254/latest/meta-data"):
+            with self.subTest(url=url), self.assertRaisesRegex(ImageAnalysisError, "public host"):
+                await analyzer.fetch(url)
+
+    async def test_other_schemes_are_refused(self):
+        with self.assertRaisesRegex(ImageAnalysisError, "http"):
+            await self.analyzer.fetch("file:///etc/passwd")
+
+    async def test_redirect_to_private_address_is_refused(self):
+        self.serve("/secret.png", b"secret")
+        self.serve("/photo.png", b"", status=302, Location=f"http://127.0.0.1:{self.port}/secret.png")
+        with self.assertRaisesRegex(ImageAnalysisError, "public host"):
+            await self.analyzer.fetch(self.url("/photo.png"))
+        self.assertEqual(ImageHandler.hosts, [f"{PUBLIC_HOST}:{self.port}"])
+
+    async def test_download_connects_to_the_checked_address(self):
+        self.serve("/photo.png", b"image")
+        self.assertEqual(await self.analyzer.fetch(self.url("/photo.png")), b"image")
+        # The request went to 127.0.0.1 but kept the host name it was checked for
+        self.assertEqual(ImageHandler.hosts, [f"{PUBLIC_HOST}:{self.port}"])
+
+    def test_pinned_target_keeps_host_and_server_name(self):
+        target = pinned_target("https://u:p@Example.com:8443/a?b=1", "2001:db8::1")
+        self.assertEqual(target["url"], "https://u:p@[2001:db8::1]:8443/a?b=1")
+        self.assertEqual(target["headers"], {"Host": "Example.com:8443"})
+        self.assertEqual(target["extensions"], {"sni_hostname": "example.com"})
+
+    async def test_images_over_the_size_limit_are_refused(self):
+        body = b"x" * 2048
+        self.serve("/declared.png", body)
+        # No Content-Length: the body is cut off while it streams in
+        ImageHandler.routes["/streamed.png"] = (200, {"Connection": "close"}, body)
+        with mock.patch.object(image_analysis, "MAX_IMAGE_BYTES", 1024):
+            for path in ("/declared.png", "/streamed.png"):
+                with self.subTest(path=path), self.assertRaisesRegex(ImageAnalysisError, "too large"):
+                    await self.analyzer.fetch(self.url(path))
+            data_url = "data:image/png;base64," + base64.b64encode(body).decode()
+            with self.assertRaisesRegex(ImageAnalysisError, "too large"):
+                await self.analyzer.fetch(data_url)
+            self.serve("/small.png", body[:1024])
+            self.assertEqual(len(await self.analyzer.fetch(self.url("/small.png"))), 1024)
+
+    @unittest.skipIf(image_analysis._pillow() is None, "Pillow is not installed")
+    async def test_same_bytes_are_answered_from_the_cache(self):
+        image = gradient_png(64, 48)
+        self.serve("/a.png", image)
+        self.serve("/b.png", image)
+        result, source = await self.analyzer.analyze(self.url("/a.png"))
+        self.assertEqual(source, "miss")
+        self.assertEqual(await self.analyzer.analyze(self.url("/b.png")), (result, "hit"))
+        self.assertEqual(self.backend.calls, 1)
+
+    @unittest.skipIf(image_analysis._pillow() is None, "Pillow is not installed")
+    async def test_similar_image_is_analyzed_again(self):
+        await self.analyzer.analyze("data:image/png;base64," + base64.b64encode(gradient_png(64, 48)).decode())
+        # Same picture at another size: other bytes, same perceptual hash
+        _, source = await self.analyzer.analyze(
+            "data:image/png;base64," + base64.b64encode(gradient_png(32, 24)).decode())
+        self.assertEqual(source, "miss")
+        self.assertEqual(self.backend.calls, 2)
+        self.assertEqual(self.analyzer.cache.stats["similar"], 1)
+
+    @unittest.skipIf(image_analysis._pillow() is None, "Pillow is not installed")
+    async def test_concurrent_requests_share_one_analysis(self):
+        self.backend.delay = 0.05
+        data_url = "data:image/png;base64," + base64.b64encode(gradient_png(64, 48)).decode()
+        results = await asyncio.gather(*(self.analyzer.analyze(data_url) for _ in range(3)))
+        self.assertEqual(sorted(source for _, source in results), ["miss", "shared", "shared"])
+        self.assertEqual(self.backend.calls, 1)
+
+    async def test_overload_is_refused_before_downloading(self):
+        analyzer = ImageAnalyzer(self.backend, max_workers=1, max_queue=0)
+        release = asyncio.Event()
+        fetched = []
+
+        async def fetch(url):
+            fetched.append(url)
+            await release.wait()
+            raise ImageAnalysisError("not an image")
+
+        analyzer.fetch = fetch
+        first = asyncio.ensure_future(analyzer.analyze("http://images.example/1.png"))
+        await asyncio.sleep(0)
+        with self.assertRaises(AnalysisOverloaded) as raised:
+            await analyzer.analyze("http://images.example/2.png")
+        self.assertGreaterEqual(raised.exception.retry_after, 1)
+        self.assertEqual(fetched, ["http://images.example/1.png"])
+        release.set()
+        with self.assertRaises(ImageAnalysisError):
+            await first
+        self.assertEqual(analyzer.pending, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
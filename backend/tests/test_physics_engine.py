@@ -0,0 +1,49 @@
+import json
+import os
+import unittest
+
+import numpy as np
+
+from physics_engine import parameter_schema, simulate, simulation_params, validate_params
+from physics_sweep import parse_sweep, sweep
+
+PHYSICS_JSON = os.path.join(os.path.dirname(__file__), "..", "data", "experiments", "physics.json")
+
+
+def newton_schema():
+    with open(PHYSICS_JSON, encoding="utf-8") as f:
+        return parameter_schema("newton", simulation_params(json.load(f))["newton"])
+
+
+class NewtonTest(unittest.TestCase):
+    def test_default_parameters_move_the_cart(self):
+        trajectory = simulate("newton", validate_params(newton_schema(), {}))
+        t, x, v = trajectory.data
+        self.assertGreater(x[-1], 0)
+        self.assertTrue(np.all(np.diff(x) > 0))
+        self.assertTrue(np.all(np.diff(v) > 0))
+
+    def test_friction_slows_the_cart(self):
+        schema = newton_schema()
+        distances = [
+            simulate("newton", validate_params(schema, {"friction": friction})).data[1][-1]
+            for friction in ("0", "0.5", "1")
+        ]
+        self.assertGreater(distances[0], distances[1])
+        self.assertGreater(distances[1], distances[2])
+        self.assertGreater(distances[2], 0)
+
+    def test_sweep_matches_simulation(self):
+        schema = newton_schema()
+        fixed, axes = parse_sweep(schema, {}, "friction,force")
+        distance = dict(sweep("newton", None, fixed, axes).metrics)["distance"]
+        self.assertTrue(np.all(distance > 0))
+        simulated = simulate("newton", validate_params(schema, {"friction": "0.3", "force": "0.05"})).data[1][-1]
+        frictions, forces = (values for _, values in axes)
+        self.assertAlmostEqual(
+            distance[frictions.index(0.3), forces.index(0.05)], simulated, delta=1e-4 * simulated
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,124 @@
+import asyncio
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from audio_cache import AudioCache
+from tts import StubTTSBackend, TTSOverloaded, TTSService, create_backend
+
+# main reads TTS_BACKEND when it is imported
+os.environ.setdefault("TTS_BACKEND", "stub")
+
+
+class FailingBackend(StubTTSBackend):
+    def synthesize(self, text, lang, slow, path):
+        super().synthesize(text, lang, slow, path)
+        raise RuntimeError("synthesis failed")
+
+
+class TTSServiceTest(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.cache = AudioCache(self.directory.name)
+        self.services = []
+
+    def tearDown(self):
+        for service in self.services:
+            service.shutdown()
+        self.directory.cleanup()
+
+    def service(self, backend=None, **kwargs) -> TTSService:
+        service = TTSService(self.cache, backend or create_backend("stub"), **kwargs)
+        self.services.append(service)
+        return service
+
+    async def test_cached_audio_is_not_synthesized_again(self):
+        service = self.service()
+        key, path = await service.get_audio("নমস্কার")
+        self.assertEqual(await service.get_audio("নমস্কার"), (key, path))
+        self.assertEqual(service.backend.calls, 1)
+        self.assertTrue(os.path.exists(path))
+
+    async def test_concurrent_requests_share_one_synthesis(self):
+        service = self.service(StubTTSBackend(delay=0.05))
+        results = await asyncio.gather(*(service.get_audio("একই বাক্য") for _ in range(5)))
+        self.assertEqual(len(set(results)), 1)
+        self.assertEqual(service.backend.calls, 1)
+        self.assertEqual(service.stats["coalesced"], 4)
+
+    async def test_full_queue_is_refused_with_retry_after(self):
+        service = self.service(StubTTSBackend(delay=0.2), max_workers=1, max_queue=0)
+        running = asyncio.ensure_future(service.get_audio("প্রথম"))
+        await asyncio.sleep(0)
+        with self.assertRaises(TTSOverloaded) as raised:
+            await service.get_audio("দ্বিতীয়")
+        self.assertGreaterEqual(raised.exception.retry_after, 1)
+        self.assertEqual(service.stats["rejected"], 1)
+        await running
+
+    async def test_lease_is_held_until_released(self):
+        service = self.service()
+        key, _ = await service.get_audio("ধরে রাখা", lease=True)
+        self.assertEqual(self.cache.usage()["leased"], 1)
+        self.cache.release(key)
+        self.assertEqual(self.cache.usage()["leased"], 0)
+
+    async def test_failed_synthesis_releases_its_lease(self):
+        service = self.service(FailingBackend())
+        with self.assertRaises(RuntimeError):
+            await service.get_audio("ব্যর্থ", lease=True)
+        self.assertEqual(self.cache.usage()["leased"], 0)
+        self.assertEqual(service.stats["failed"], 1)
+        self.assertEqual([name for name in os.listdir(self.directory.name) if name.endswith(".tmp")], [])
+
+    async def test_stream_joins_sentences(self):
+        service = self.service()
+        chunks = [chunk async for chunk in service.stream_audio("এক। দুই। তিন।")]
+        self.assertEqual(len(chunks), 3)
+        self.assertEqual(service.backend.calls, 3)
+        self.assertEqual(self.cache.usage()["leased"], 0)
+
+
+class AudioEndpointTest(unittest.IsolatedAsyncioTestCase):
+    @classmethod
+    def setUpClass(cls):
+        # main creates its data directories and audio index relative to the
+        # working directory on import; keep them out of the source tree
+        cls.workdir = tempfile.TemporaryDirectory()
+        cls.previous_cwd = os.getcwd()
+        os.chdir(cls.workdir.name)
+        import main
+
+        cls.main = main
+
+    @classmethod
+    def tearDownClass(cls):
+        os.chdir(cls.previous_cwd)
+        cls.workdir.cleanup()
+
+    async def test_overload_answers_503_with_retry_after(self):
+        import httpx
+
+        main = self.main
+        with tempfile.TemporaryDirectory() as directory:
+            cache = AudioCache(directory)
+            service = TTSService(cache, StubTTSBackend(delay=0.2), max_workers=1, max_queue=0)
+            try:
+                with mock.patch.object(main, "audio_cache", cache), mock.patch.object(main, "tts_service", service):
+                    transport = httpx.ASGITransport(app=main.app)
+                    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                        first = asyncio.ensure_future(client.get("/api/audio", params={"text": "প্রথম"}))
+                        while not service.pending:
+                            await asyncio.sleep(0.01)
+                        busy = await client.get("/api/audio", params={"text": "দ্বিতীয়"})
+                        self.assertEqual(busy.status_code, 503)
+                        self.assertGreaterEqual(int(busy.headers["Retry-After"]), 1)
+                        self.assertEqual((await first).status_code, 200)
+                self.assertEqual(cache.usage()["leased"], 0)
+            finally:
+                service.shutdown()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,257 @@
+"""
+Text-to-speech synthesis off the event loop.
+
+gTTS makes a blocking network request and writes a file, so synthesis runs
+in a bounded thread pool. gTTS and its HTTP stack are only imported when
+the first text is synthesized. Concurrent requests for the same text share one
+synthesis, and once the pool and its queue are full new work is refused
+with TTSOverloaded instead of piling up.
+"""
+import asyncio
+import math
+import os
+import re
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+
+from audio_cache import AudioCache, audio_key
+
+# One silent MPEG-1 Layer III frame (128 kbps, 44.1 kHz)
+SILENT_MP3_FRAME = b"\xff\xfb\x90\x64" + b"\x00" * 413
+
+# A sentence runs up to and including its terminator (দাঁড়ি, ? or !) or a line break
+_SENTENCE = re.compile(r"[^।?!\n]+(?:[।?!]+|\n|$)")
+
+# Attempts made for a streamed chunk while the pool is full
+STREAM_OVERLOAD_RETRIES = 10
+
+
+def split_sentences(text: str) -> List[str]:
+    """Split narration text into sentences at Bengali sentence boundaries"""
+    return [sentence.strip() for sentence in _SENTENCE.findall(text) if sentence.strip()]
+
+
+def strip_id3(data: bytes) -> bytes:
+    """Remove a leading ID3v2 tag so MP3 chunks can be concatenated"""
+    if len(data) < 10 or data[:3] != b"ID3":
+        return data
+    size = (data[6] << 21) | (data[7] << 14) | (data[8] << 7) | data[9]
+    footer = 10 if data[5] & 0x10 else 0
+    return data[10 + size + footer:]
+
+
+def _read_file(path: str) -> bytes:
+    with open(path, "rb") as f:
+        return f.read()
+
+
+class TTSOverloaded(Exception):
+    """Raised when the synthesis queue is full"""
+
+    def __init__(self, retry_after: int):
+        super().__init__(f"TTS queue is full, retry after {retry_after}s")
+        self.retry_after = retry_after
+
+
+class GTTSBackend:
+    """Synthesizes speech with Google Translate's TTS service"""
+
+    name = "gtts"
+
+    def synthesize(self, text: str, lang: str, slow: bool, path: str):
+        from gtts import gTTS
+
+        tts = gTTS(text=text, lang=lang, slow=slow)
+        tts.save(path)
+
+
+class StubTTSBackend:
+    """Offline stand-in for gTTS that writes silent MP3 frames.
+
+    The output length grows with the text, and ``delay`` simulates network
+    latency, which makes it suitable for tests and benchmarks.
+    """
+
+    name = "stub"
+
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.calls = 0
+
+    def synthesize(self, text: str, lang: str, slow: bool, path: str):
+        self.calls += 1
+        if self.delay:
+            time.sleep(self.delay)
+        frames = max(1, len(text) // 10)
+        with open(path, "wb") as f:
+            f.write(SILENT_MP3_FRAME * frames)
+
+
+def create_backend(name: str):
+    if name == "stub":
+        return StubTTSBackend(delay=float(os.environ.get("TTS_STUB_DELAY", "0")))
+    if name == "gtts":
+        return GTTSBackend()
+    raise ValueError(f"Unknown TTS backend: {name}")
+
+
+class TTSService:
+    """Serves audio from the cache, synthesizing missing entries in a pool"""
+
+    def __init__(self, cache: AudioCache, backend, max_workers: int = 4, max_queue: int = 32):
+        self.cache = cache
+        self.backend = backend
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._executor_lock = threading.Lock()
+        # key -> future shared by every request waiting on that synthesis
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._pending = 0
+        self._avg_seconds = 1.0
+        self.stats = {"synthesized": 0, "coalesced": 0, "rejected": 0, "failed": 0, "seconds_total": 0.0}
+
+    @property
+    def pending(self) -> int:
+        """Syntheses queued or running"""
+        return self._pending
+
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="tts")
+            return self._executor
+
+    async def get_audio(self, text: str, lang: str = "bn", slow: bool = False,
+                        lease: bool = False) -> Tuple[str, str]:
+        """Return ``(key, path)`` of the audio for ``text``, synthesizing it if needed.
+
+        With ``lease`` the file is kept from eviction until the caller calls
+        ``cache.release(key)``.
+        """
+        key = audio_key(text, lang, slow)
+        if not lease:
+            return key, await self._get_audio(key, text, lang, slow)
+        self.cache.acquire(key)
+        try:
+            return key, await self._get_audio(key, text, lang, slow)
+        except BaseException:
+            self.cache.release(key)
+            raise
+
+    async def _get_audio(self, key: str, text: str, lang: str, slow: bool) -> str:
+        path = self.cache.get(key)
+        if path is not None:
+            return path
+
+        future = self._inflight.get(key)
+        if future is not None:
+            self.stats["coalesced"] += 1
+            return await asyncio.shield(future)
+
+        if self._pending >= self.max_workers + self.max_queue:
+            self.stats["rejected"] += 1
+            raise TTSOverloaded(self.retry_after())
+
+        self._pending += 1
+        future = asyncio.get_running_loop().run_in_executor(
+            self.executor, self._synthesize, key, text, lang, slow
+        )
+        self._inflight[key] = future
+        try:
+            return await asyncio.shield(future)
+        finally:
+            if future.done():
+                self._finish(key, future)
+            else:
+                # The caller went away; others may still be waiting on it
+                future.add_done_callback(lambda f: self._finish(key, f))
+
+    async def stream_audio(self, text: str, lang: str = "bn", slow: bool = False) -> AsyncIterator[bytes]:
+        """Yield MP3 data sentence by sentence, in order, as each is ready.
+
+        Each sentence is synthesized and cached on its own, so sentences
+        shared between narrations are reused. Up to ``max_workers`` sentences
+        are synthesized ahead of the one currently being sent.
+        """
+        sentences = split_sentences(text)
+        if not sentences:
+            return
+        loop = asyncio.get_running_loop()
+        # The first sentence raises TTSOverloaded before anything is sent
+        tasks: deque = deque([asyncio.ensure_future(self.get_audio(sentences[0], lang, slow, lease=True))])
+        remaining = iter(sentences[1:])
+
+        def schedule():
+            for sentence in remaining:
+                tasks.append(asyncio.ensure_future(self._stream_chunk(sentence, lang, slow)))
+                if len(tasks) >= self.max_workers:
+                    break
+
+        schedule()
+        first = True
+        try:
+            while tasks:
+                key, path = await tasks.popleft()
+                schedule()
+                try:
+                    data = await loop.run_in_executor(None, _read_file, path)
+                finally:
+                    self.cache.release(key)
+                yield data if first else strip_id3(data)
+                first = False
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+                elif not task.cancelled() and task.exception() is None:
+                    # Finished ahead of the client; give its lease back
+                    self.cache.release(task.result()[0])
+
+    async def _stream_chunk(self, sentence: str, lang: str, slow: bool) -> Tuple[str, str]:
+        # Once a stream has started it can no longer answer 503, so wait for room
+        for _ in range(STREAM_OVERLOAD_RETRIES - 1):
+            try:
+                return await self.get_audio(sentence, lang, slow, lease=True)
+            except TTSOverloaded as e:
+                await asyncio.sleep(min(e.retry_after, 1))
+        return await self.get_audio(sentence, lang, slow, lease=True)
+
+    def retry_after(self) -> int:
+        """Seconds until a slot is likely to free up"""
+        waves = (self._pending + 1) / max(1, self.max_workers)
+        return max(1, math.ceil(waves * self._avg_seconds))
+
+    def shutdown(self):
+        with self._executor_lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False)
+                self._executor = None
+
+    def _finish(self, key: str, future: asyncio.Future):
+        if self._inflight.get(key) is future:
+            del self._inflight[key]
+            self._pending -= 1
+
+    def _synthesize(self, key: str, text: str, lang: str, slow: bool) -> str:
+        temp_path = self.cache.temp_path(key)
+        started = time.perf_counter()
+        try:
+            self.backend.synthesize(text, lang, slow, temp_path)
+            path = self.cache.put(key, temp_path)
+        except Exception:
+            self.stats["failed"] += 1
+            raise
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+        elapsed = time.perf_counter() - started
+        self._avg_seconds = 0.8 * self._avg_seconds + 0.2 * elapsed
+        self.stats["synthesized"] += 1
+        self.stats["seconds_total"] += elapsed
+        return path